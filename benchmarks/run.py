@@ -0,0 +1,176 @@
+"""Benchmark each pipeline stage on synthetic decks against a fake Claude CLI.
+
+Run from the repository root:
+
+    python -m benchmarks.run                                   # print results
+    python -m benchmarks.run --save benchmarks/baselines/local.json
+    python -m benchmarks.run --compare benchmarks/baselines/local.json
+
+Every (pages, kind) scenario runs in a fresh interpreter so that its peak RSS
+is not inflated by earlier scenarios.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import fitz
+
+from benchmarks.synthetic import make_deck
+from lecture_split import fake_claude
+from lecture_split.context_generator import generate_all_preambles
+from lecture_split.extractor import extract_slide_texts
+from lecture_split.section_detector import detect_sections
+from lecture_split.splitter import split_pdf
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+DEFAULT_KINDS = ["text", "image"]
+
+# Stage timings below this many seconds are too noisy to flag as regressions.
+MIN_SIGNIFICANT_SECONDS = 0.05
+
+
+def _stage(results: dict, name: str, fn):
+    tracemalloc.reset_peak()
+    wall, cpu = time.perf_counter(), time.process_time()
+    value = fn()
+    results[name] = {
+        "wall_s": round(time.perf_counter() - wall, 4),
+        "cpu_s": round(time.process_time() - cpu, 4),
+        "py_peak_kb": tracemalloc.get_traced_memory()[1] // 1024,
+    }
+    return value
+
+
+def run_scenario(pages: int, kind: str, latency: float) -> dict:
+    """Time every stage for one synthetic deck; runs in the current process."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pdf_path = make_deck(tmp / f"deck-{pages}-{kind}.pdf", pages, kind)
+        fake_claude.install(tmp / "bin", latency=latency)
+        os.environ["PATH"] = f"{tmp / 'bin'}{os.pathsep}{os.environ['PATH']}"
+
+        stages: dict = {}
+        tracemalloc.start()
+        slides = _stage(stages, "extract_slide_texts", lambda: extract_slide_texts(pdf_path))
+        plan = _stage(stages, "detect_sections", lambda: detect_sections(slides))
+        paths = _stage(stages, "split_pdf", lambda: split_pdf(pdf_path, plan.sections, tmp / "out"))
+        _stage(stages, "generate_all_preambles", lambda: generate_all_preambles(plan))
+        tracemalloc.stop()
+
+        return {
+            "pages": pages,
+            "kind": kind,
+            "input_kb": pdf_path.stat().st_size // 1024,
+            "output_kb": sum(p.stat().st_size for p in paths) // 1024,
+            "sections": len(plan.sections),
+            "stages": stages,
+            # ru_maxrss is KiB on Linux and bytes on macOS.
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            // (1024 if sys.platform == "darwin" else 1),
+        }
+
+
+def run_all(sizes: list[int], kinds: list[str], latency: float) -> dict:
+    results = []
+    for pages in sizes:
+        for kind in kinds:
+            print(f"  {pages:>5} pages, {kind}...", file=sys.stderr, flush=True)
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.run", "--scenario", f"{pages}:{kind}",
+                 "--latency", str(latency)],
+                capture_output=True, text=True, check=True,
+            )
+            # PyMuPDF may print warnings to stdout; the result is the last line.
+            results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "pymupdf": fitz.VersionBind,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "fake_claude_latency_s": latency,
+        },
+        "results": results,
+    }
+
+
+def format_results(report: dict) -> str:
+    lines = [f"{'deck':<12} {'stage':<24} {'wall s':>8} {'cpu s':>8} {'py peak KB':>11}"]
+    for r in report["results"]:
+        deck = f"{r['pages']} {r['kind']}"
+        for name, st in r["stages"].items():
+            lines.append(f"{deck:<12} {name:<24} {st['wall_s']:>8.3f} {st['cpu_s']:>8.3f} {st['py_peak_kb']:>11}")
+        lines.append(f"{deck:<12} {'(max RSS KB)':<24} {r['max_rss_kb']:>29}")
+    return "\n".join(lines)
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> tuple[str, bool]:
+    """Diff stage wall times against a baseline; return (table, regressed)."""
+    base = {(r["pages"], r["kind"]): r for r in baseline["results"]}
+    lines = [f"{'deck':<12} {'stage':<24} {'base s':>8} {'now s':>8} {'ratio':>7}"]
+    regressed = False
+    for r in report["results"]:
+        old = base.get((r["pages"], r["kind"]))
+        if old is None:
+            continue
+        for name, st in r["stages"].items():
+            before = old["stages"].get(name, {}).get("wall_s")
+            if before is None:
+                continue
+            now = st["wall_s"]
+            ratio = now / before if before else float("inf")
+            flag = ""
+            if ratio > 1 + tolerance and now - before > MIN_SIGNIFICANT_SECONDS:
+                flag = "  REGRESSION"
+                regressed = True
+            deck = f"{r['pages']} {r['kind']}"
+            lines.append(f"{deck:<12} {name:<24} {before:>8.3f} {now:>8.3f} {ratio:>6.2f}x{flag}")
+    return "\n".join(lines), regressed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated page counts (default: %(default)s)")
+    parser.add_argument("--kinds", default=",".join(DEFAULT_KINDS),
+                        help="comma-separated deck kinds: text, image (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds the fake claude waits before answering")
+    parser.add_argument("--save", type=Path, help="write the results JSON here")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to diff against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before a stage counts as regressed (default: %(default)s)")
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.scenario:
+        pages, kind = args.scenario.split(":")
+        print(json.dumps(run_scenario(int(pages), kind, args.latency)))
+        return 0
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    kinds = args.kinds.split(",")
+    report = run_all(sizes, kinds, args.latency)
+    print(format_results(report))
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(report, indent=2) + "\n")
+    if args.compare:
+        table, regressed = compare(report, json.loads(args.compare.read_text()), args.tolerance)
+        print()
+        print(table)
+        return 1 if regressed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
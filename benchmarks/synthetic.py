@@ -0,0 +1,53 @@
+"""Generate synthetic lecture decks for benchmarking."""
+from pathlib import Path
+
+import fitz
+
+TOPICS = [
+    "Introduction", "Motivation", "Definitions", "Examples", "Algorithms",
+    "Complexity", "Proofs", "Applications", "Case Study", "Summary",
+]
+
+BULLETS = [
+    "Key idea: decompose the problem into smaller subproblems",
+    "Running time grows with the number of input elements",
+    "Worked example with a small input, step by step",
+    "Common pitfall: forgetting the base case",
+    "Compare against the naive approach from last week",
+]
+
+
+def _images(count: int = 4, size: int = 256) -> list[fitz.Pixmap]:
+    """A few distinct noisy RGB images, so image streams don't deduplicate."""
+    images = []
+    for n in range(count):
+        pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, size, size), False)
+        samples = bytearray(pix.samples)
+        seed = n * 7919 + 1
+        for i in range(0, len(samples), 3):
+            seed = (seed * 1103515245 + 12345) & 0x7FFFFFFF
+            samples[i:i + 3] = bytes(((seed >> 16) & 0xFF, (seed >> 8) & 0xFF, seed & 0xFF))
+        images.append(fitz.Pixmap(fitz.csRGB, size, size, bytes(samples), False))
+    return images
+
+
+def make_deck(path: Path, pages: int, kind: str = "text") -> Path:
+    """Write a ``pages``-page deck; ``kind`` is "text" or "image" (one picture per slide)."""
+    if kind not in ("text", "image"):
+        raise ValueError(f"unknown deck kind: {kind}")
+    images = _images() if kind == "image" else []
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page(width=720, height=540)
+        topic = TOPICS[(i * len(TOPICS)) // pages]
+        page.insert_text((48, 60), f"{topic}: part {i + 1}", fontsize=28)
+        y = 120
+        for j in range(4):
+            page.insert_text((64, y), f"- {BULLETS[(i + j) % len(BULLETS)]}", fontsize=16)
+            y += 32
+        page.insert_text((48, 520), f"CS 101 Lecture Notes    {i + 1}", fontsize=10)
+        if images:
+            page.insert_image(fitz.Rect(420, 260, 680, 500), pixmap=images[i % len(images)])
+    doc.save(str(path), deflate=True)
+    doc.close()
+    return path
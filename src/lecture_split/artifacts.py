@@ -0,0 +1,145 @@
+"""Versioned intermediate files for running the pipeline in stages.
+
+    lecture-split extract deck.pdf             -> deck.slides.json
+    lecture-split detect deck.slides.json      -> deck.plan.json
+    lecture-split split deck.pdf --plan deck.plan.json
+    lecture-split render deck.plan.json -o deck_sections
+
+Both files record the PDF they came from, so a plan can be checked against
+the deck it is applied to.
+"""
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from lecture_split.document import PDFDocument, PDFSource
+from lecture_split.models import LecturePlan, SlideText
+from lecture_split.store import file_hash
+
+# Bump when the layout of either file changes incompatibly.
+ARTIFACT_VERSION = 1
+
+PLAN_FILE = "plan.json"
+
+
+class ArtifactError(ValueError):
+    """An artifact file is missing fields, of the wrong kind, or from a newer version."""
+
+
+@dataclass
+class SourceInfo:
+    """The PDF an artifact was made from."""
+    name: str
+    page_count: int
+    sha256: str
+
+    @classmethod
+    def of_pdf(cls, pdf: PDFSource, page_count: int | None = None) -> "SourceInfo":
+        """Describe a PDF given by path or as an open PDFDocument (which is not re-read)."""
+        if isinstance(pdf, PDFDocument):
+            return cls(name=pdf.path.name, page_count=pdf.page_count, sha256=pdf.sha256)
+        if page_count is None:
+            with PDFDocument(pdf) as doc:
+                return cls.of_pdf(doc)
+        return cls(name=Path(pdf).name, page_count=page_count, sha256=file_hash(pdf))
+
+
+def slides_path_for(pdf_path: Path) -> Path:
+    """Return <pdf_name>.slides.json next to the PDF."""
+    pdf_path = Path(pdf_path)
+    return pdf_path.with_name(f"{pdf_path.stem}.slides.json")
+
+
+def plan_path_for(path: Path) -> Path:
+    """Return <name>.plan.json next to a PDF or a slides file."""
+    path = Path(path)
+    stem = path.name.removesuffix(".slides.json") if path.name.endswith(".slides.json") else path.stem
+    return path.with_name(f"{stem}.plan.json")
+
+
+def _document(kind: str, source: SourceInfo | None, key: str, value) -> dict:
+    return {
+        "kind": kind,
+        "version": ARTIFACT_VERSION,
+        "source": asdict(source) if source else None,
+        key: value,
+    }
+
+
+def _parse(text: str | bytes, kind: str, name: str) -> dict:
+    try:
+        data = json.loads(text)
+    except ValueError as exc:
+        raise ArtifactError(f"{name} is not valid JSON: {exc}") from exc
+    if kind == "plan" and isinstance(data, dict) and "lecture_title" in data:
+        return _document("plan", None, "plan", data)  # a bare plan, e.g. written by hand
+    if not isinstance(data, dict) or data.get("kind") != kind:
+        raise ArtifactError(f"{name} is not a {kind} file")
+    if data.get("version") != ARTIFACT_VERSION:
+        raise ArtifactError(
+            f"{name} has version {data.get('version')}; this lecture-split reads version {ARTIFACT_VERSION}"
+        )
+    return data
+
+
+def _read(path: Path) -> str:
+    try:
+        return Path(path).read_text()
+    except OSError as exc:
+        raise ArtifactError(f"cannot read {path}: {exc.strerror}") from exc
+
+
+def _source(data: dict) -> SourceInfo | None:
+    source = data.get("source")
+    return SourceInfo(**source) if source else None
+
+
+def _write(path: Path, data: dict) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n")
+    tmp.replace(path)
+    return path
+
+
+def save_slides(path: Path, slides: list[SlideText], source: SourceInfo | None = None) -> Path:
+    """Write extracted slide text to a slides file."""
+    entries = [{"page_number": s.page_number, "text": s.text} for s in slides]
+    return _write(path, _document("slides", source, "slides", entries))
+
+
+def load_slides(path: Path) -> tuple[list[SlideText], SourceInfo | None]:
+    """Read a slides file; return the slides and the PDF they were extracted from."""
+    data = _parse(_read(path), "slides", str(path))
+    try:
+        return [SlideText(s["page_number"], s["text"]) for s in data["slides"]], _source(data)
+    except (KeyError, TypeError) as exc:
+        raise ArtifactError(f"{path} has a malformed slide entry") from exc
+
+
+def plan_json(plan: LecturePlan, source: SourceInfo | None = None) -> str:
+    """Serialize a plan in the plan.json format."""
+    return json.dumps(_document("plan", source, "plan", plan.to_dict()), indent=2, ensure_ascii=False) + "\n"
+
+
+def parse_plan(text: str | bytes, name: str = "plan") -> tuple[LecturePlan, SourceInfo | None]:
+    """Parse plan.json contents; a bare LecturePlan dict is accepted too."""
+    data = _parse(text, "plan", name)
+    try:
+        return LecturePlan.from_dict(data["plan"]), _source(data)
+    except (KeyError, TypeError) as exc:
+        raise ArtifactError(f"{name} has a malformed plan") from exc
+
+
+def save_plan(path: Path, plan: LecturePlan, source: SourceInfo | None = None) -> Path:
+    """Write a plan.json file."""
+    return _write(path, _document("plan", source, "plan", plan.to_dict()))
+
+
+def load_plan(path: Path) -> tuple[LecturePlan, SourceInfo | None]:
+    """Read a plan.json file, or the plan.json inside an output directory."""
+    path = Path(path)
+    if path.is_dir():
+        path = path / PLAN_FILE
+    return parse_plan(_read(path), str(path))
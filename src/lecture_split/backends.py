@@ -0,0 +1,503 @@
+"""Ways of sending a prompt to Claude and getting its reply text back.
+
+detect_sections() talks to a Backend; everything about processes, sockets
+and wire formats lives here. Backends raise subprocess.TimeoutExpired or
+TimeoutError when a call times out and subprocess.CalledProcessError or
+BackendError when it fails. Backend.stream() yields the reply as it is
+generated: the CLI's stream-json events or the API's server-sent events.
+"""
+import codecs
+import http.client
+import json
+import os
+import queue
+import socket
+import subprocess
+import tempfile
+import threading
+from typing import BinaryIO, Callable, Iterator, Protocol
+from urllib.parse import urlsplit
+
+# Size of each write into the claude subprocess's stdin, or of each chunk of
+# an HTTP request body, in streaming mode.
+STDIN_CHUNK_SIZE = 64 * 1024
+
+DEFAULT_BASE_URL = "https://api.anthropic.com"
+ANTHROPIC_VERSION = "2023-06-01"
+DEFAULT_MAX_TOKENS = 8192
+DEFAULT_MAX_CONNECTIONS = 8
+
+# The CLI accepts short model names; the messages API needs model IDs.
+MODEL_ALIASES = {
+    "sonnet": "claude-sonnet-4-5",
+    "haiku": "claude-haiku-4-5",
+    "opus": "claude-opus-4-1",
+}
+
+# Called with a function that aborts the call in flight, for hedged requests.
+Register = Callable[[Callable[[], None]], None]
+
+
+class BackendError(RuntimeError):
+    """A backend call failed (bad status, malformed reply, connection lost)."""
+
+
+class Backend(Protocol):
+    def complete(
+        self,
+        model: str,
+        system: str,
+        prompt: str,
+        *,
+        timeout: float | None = None,
+        register: Register | None = None,
+    ) -> str:
+        """Return Claude's reply to ``prompt``. With ``register``, hand it a function that cancels the call."""
+
+    def complete_streaming(
+        self,
+        model: str,
+        system: str,
+        header: bytes,
+        body: BinaryIO,
+        *,
+        timeout: float | None = None,
+    ) -> str:
+        """Like complete(), for the UTF-8 prompt ``header`` + ``body`` read from a file in chunks."""
+
+    def stream(
+        self,
+        model: str,
+        system: str,
+        prompt: str,
+        *,
+        timeout: float | None = None,
+    ) -> Iterator[str]:
+        """Like complete(), but yield the reply in pieces as Claude writes it."""
+
+
+def _cli_event_text(line: str, streamed: bool) -> str | None:
+    """Return the reply text carried by one line of ``claude --output-format stream-json``.
+
+    With --include-partial-messages, the text arrives in content_block_delta
+    stream events; older CLIs only send the whole reply in the final result
+    event, which is used if no deltas were ``streamed``.
+    """
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(event, dict):
+        return None
+    if event.get("type") == "stream_event":
+        inner = event.get("event") or {}
+        delta = inner.get("delta") or {}
+        if inner.get("type") == "content_block_delta" and delta.get("type") == "text_delta":
+            return delta.get("text", "")
+    elif event.get("type") == "result":
+        if event.get("is_error") or event.get("subtype", "success") != "success":
+            raise BackendError(f"claude reported an error: {str(event.get('result', event))[:500]}")
+        if not streamed:
+            return event.get("result", "")
+    return None
+
+
+class ClaudeCLIBackend:
+    """Run the ``claude`` CLI once per call, with the prompt on stdin."""
+
+    name = "cli"
+
+    def __init__(self, executable: str = "claude"):
+        self.executable = executable
+
+    def _args(self, model: str, system: str, output_format: str = "text") -> list[str]:
+        return [
+            self.executable,
+            "--print",
+            "--model", model,
+            "--system-prompt", system,
+            "--output-format", output_format,
+        ]
+
+    def complete(self, model, system, prompt, *, timeout=None, register=None) -> str:
+        args = self._args(model, system)
+        if register is None:
+            result = subprocess.run(
+                args,
+                input=prompt,
+                capture_output=True,
+                text=True,
+                check=True,
+                timeout=timeout,
+            )
+            return result.stdout
+
+        proc = subprocess.Popen(
+            args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        register(lambda: proc.poll() is None and proc.kill())
+        try:
+            stdout, stderr = proc.communicate(prompt, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise
+        if proc.returncode:
+            raise subprocess.CalledProcessError(proc.returncode, args, output=stdout, stderr=stderr)
+        return stdout
+
+    def complete_streaming(self, model, system, header, body, *, timeout=None) -> str:
+        args = self._args(model, system)
+        with tempfile.TemporaryFile() as stderr:
+            proc = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr)
+
+            def feed():
+                try:
+                    proc.stdin.write(header)
+                    while chunk := body.read(STDIN_CHUNK_SIZE):
+                        proc.stdin.write(chunk)
+                except BrokenPipeError:
+                    pass  # claude exited early; its return code reports why
+                finally:
+                    proc.stdin.close()
+
+            timed_out = threading.Event()
+
+            def kill():
+                timed_out.set()
+                proc.kill()
+
+            # Feed stdin from a thread while reading stdout here, so neither pipe
+            # can fill up and block the other side.
+            writer = threading.Thread(target=feed, daemon=True)
+            writer.start()
+            watchdog = threading.Timer(timeout, kill) if timeout is not None else None
+            if watchdog is not None:
+                watchdog.start()
+            stdout = proc.stdout.read()
+            proc.stdout.close()
+            writer.join()
+            returncode = proc.wait()
+            if watchdog is not None:
+                watchdog.cancel()
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(args, timeout, output=stdout)
+            if returncode:
+                stderr.seek(0)
+                raise subprocess.CalledProcessError(returncode, args, output=stdout, stderr=stderr.read())
+        return stdout.decode()
+
+    def stream(self, model, system, prompt, *, timeout=None) -> Iterator[str]:
+        args = [*self._args(model, system, "stream-json"), "--verbose", "--include-partial-messages"]
+        with tempfile.TemporaryFile() as stderr:
+            proc = subprocess.Popen(
+                args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr, text=True
+            )
+
+            def feed():
+                try:
+                    proc.stdin.write(prompt)
+                except BrokenPipeError:
+                    pass
+                finally:
+                    try:
+                        proc.stdin.close()
+                    except BrokenPipeError:
+                        pass
+
+            timed_out = threading.Event()
+
+            def kill():
+                timed_out.set()
+                proc.kill()
+
+            writer = threading.Thread(target=feed, daemon=True)
+            writer.start()
+            watchdog = threading.Timer(timeout, kill) if timeout is not None else None
+            if watchdog is not None:
+                watchdog.start()
+            try:
+                streamed = False
+                for line in proc.stdout:
+                    text = _cli_event_text(line, streamed)
+                    if text:
+                        streamed = True
+                        yield text
+                returncode = proc.wait()
+            finally:
+                # Also runs if the caller stops early or the stream is broken.
+                if watchdog is not None:
+                    watchdog.cancel()
+                if proc.poll() is None:
+                    proc.kill()
+                proc.stdout.close()
+                writer.join()
+                proc.wait()
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(args, timeout)
+            if returncode:
+                stderr.seek(0)
+                raise subprocess.CalledProcessError(returncode, args, stderr=stderr.read())
+
+
+class ConnectionPool:
+    """Thread-safe pool of keep-alive HTTP(S) connections to one host.
+
+    Idle connections are reused by later requests, so a run with many calls
+    (windows, batches, a long-running server) pays for TCP and TLS setup only
+    once per concurrent request. At most ``max_connections`` idle
+    connections are kept.
+    """
+
+    def __init__(self, base_url: str, *, max_connections: int = DEFAULT_MAX_CONNECTIONS):
+        url = urlsplit(base_url)
+        if url.scheme not in ("http", "https"):
+            raise ValueError(f"unsupported URL scheme: {base_url}")
+        self._connection_class = (
+            http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        )
+        self.host = url.hostname
+        self.port = url.port
+        self.path_prefix = url.path.rstrip("/")
+        self._idle: queue.LifoQueue[http.client.HTTPConnection] = queue.LifoQueue(max_connections)
+        self.created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float | None) -> tuple[http.client.HTTPConnection, bool]:
+        """Return a connection and whether it was reused from the pool."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self.created += 1
+            conn = self._connection_class(self.host, self.port, timeout=timeout)
+            reused = False
+        else:
+            reused = True
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, reused
+
+    def release(self, conn: http.client.HTTPConnection) -> None:
+        """Return a connection whose response has been read completely."""
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _abort(conn: http.client.HTTPConnection) -> None:
+    """Close ``conn``, waking a thread that is blocked reading from it.
+
+    close() alone leaves a recv() in another thread waiting for the server;
+    shutting the socket down makes that recv() return at once.
+    """
+    sock = conn.sock
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # not connected (any more)
+    conn.close()
+
+
+def _json_string_chunks(header: bytes, body: BinaryIO) -> Iterator[bytes]:
+    """Yield the JSON-escaped contents of header + body, without the quotes, chunk by chunk."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in (header, *iter(lambda: body.read(STDIN_CHUNK_SIZE), b"")):
+        text = decoder.decode(chunk)
+        if text:
+            yield json.dumps(text)[1:-1].encode()
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield json.dumps(tail)[1:-1].encode()
+
+
+class AnthropicHTTPBackend:
+    """Call the Anthropic messages API over a pool of keep-alive connections.
+
+    ``api_key`` and ``base_url`` default to $ANTHROPIC_API_KEY and
+    $ANTHROPIC_BASE_URL. Short model names (sonnet, haiku, opus) are mapped
+    to model IDs via MODEL_ALIASES; anything else is sent as-is. ``timeout``
+    applies to connecting and to each socket read, not to the whole call.
+    """
+
+    name = "http"
+
+    def __init__(
+        self,
+        *,
+        api_key: str | None = None,
+        base_url: str | None = None,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    ):
+        self.api_key = api_key if api_key is not None else os.environ.get("ANTHROPIC_API_KEY", "")
+        if not self.api_key:
+            raise BackendError("the http backend needs an API key; set ANTHROPIC_API_KEY")
+        self.base_url = base_url or os.environ.get("ANTHROPIC_BASE_URL") or DEFAULT_BASE_URL
+        self.max_tokens = max_tokens
+        self.pool = ConnectionPool(self.base_url, max_connections=max_connections)
+
+    def _headers(self) -> dict[str, str]:
+        return {
+            "x-api-key": self.api_key,
+            "anthropic-version": ANTHROPIC_VERSION,
+            "content-type": "application/json",
+        }
+
+    def _payload_parts(self, model: str, system: str, stream: bool = False) -> tuple[bytes, bytes]:
+        """Return the JSON request body before and after the (escaped) user prompt."""
+        marker = "\x00PROMPT\x00"
+        request = {
+            "model": MODEL_ALIASES.get(model, model),
+            "max_tokens": self.max_tokens,
+            "system": system,
+            "messages": [{"role": "user", "content": marker}],
+        }
+        if stream:
+            request["stream"] = True
+        before, after = json.dumps(request).split(json.dumps(marker)[1:-1])
+        return before.encode(), after.encode()
+
+    def _request(
+        self, body: Callable[[], bytes | Iterator[bytes]], timeout: float | None,
+        register: Register | None, chunked: bool,
+    ) -> tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """POST a fresh copy of ``body()`` to /v1/messages; return the connection and a 200 response."""
+        path = f"{self.pool.path_prefix}/v1/messages"
+        headers = self._headers()
+        if chunked:
+            headers["transfer-encoding"] = "chunked"
+        cancelled = threading.Event()
+        while True:
+            conn, reused = self.pool.acquire(timeout)
+            if register is not None:
+                register(lambda conn=conn: (cancelled.set(), _abort(conn)))
+            try:
+                if conn.sock is None:
+                    conn.connect()  # a cancel from here on finds a socket to shut down
+                if cancelled.is_set():
+                    conn.close()
+                    raise BackendError("request cancelled")
+                conn.request("POST", path, body=body(),
+                             headers=headers, encode_chunked=chunked)
+                response = conn.getresponse()
+                if response.status != 200:
+                    data = response.read()
+                    self._done(conn, response)
+                    raise BackendError(f"HTTP {response.status}: {data[:500].decode(errors='replace')}")
+                return conn, response
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as exc:
+                conn.close()
+                if reused and not cancelled.is_set():
+                    continue  # the server dropped an idle connection; retry on a fresh one
+                raise BackendError(f"connection to {self.base_url} lost: {exc}") from exc
+            except TimeoutError:
+                conn.close()
+                raise
+            except (OSError, http.client.HTTPException) as exc:
+                conn.close()
+                raise BackendError(f"request to {self.base_url} failed: {exc}") from exc
+
+    def _done(self, conn: http.client.HTTPConnection, response: http.client.HTTPResponse) -> None:
+        """Return ``conn`` to the pool once ``response`` has been read completely."""
+        if response.will_close:
+            conn.close()
+        else:
+            self.pool.release(conn)
+
+    def _post(
+        self, body: Callable[[], bytes | Iterator[bytes]], timeout: float | None,
+        register: Register | None, chunked: bool,
+    ) -> dict:
+        """POST a fresh copy of ``body()`` to /v1/messages and return the decoded reply."""
+        conn, response = self._request(body, timeout, register, chunked)
+        try:
+            data = response.read()
+        except TimeoutError:
+            conn.close()
+            raise
+        except (OSError, http.client.HTTPException) as exc:
+            conn.close()
+            raise BackendError(f"request to {self.base_url} failed: {exc}") from exc
+        self._done(conn, response)
+        try:
+            return json.loads(data)
+        except ValueError as exc:
+            raise BackendError(f"malformed response: {data[:200]!r}") from exc
+
+    @staticmethod
+    def _text(reply: dict) -> str:
+        try:
+            return "".join(block["text"] for block in reply["content"] if block.get("type") == "text")
+        except (KeyError, TypeError) as exc:
+            raise BackendError(f"unexpected response: {str(reply)[:200]}") from exc
+
+    def complete(self, model, system, prompt, *, timeout=None, register=None) -> str:
+        before, after = self._payload_parts(model, system)
+        body = before + json.dumps(prompt)[1:-1].encode() + after
+        return self._text(self._post(lambda: body, timeout, register, chunked=False))
+
+    def complete_streaming(self, model, system, header, body, *, timeout=None) -> str:
+        before, after = self._payload_parts(model, system)
+        start = body.tell()
+
+        def chunks():
+            body.seek(start)
+            yield before
+            yield from _json_string_chunks(header, body)
+            yield after
+
+        return self._text(self._post(chunks, timeout, None, chunked=True))
+
+    def stream(self, model, system, prompt, *, timeout=None) -> Iterator[str]:
+        before, after = self._payload_parts(model, system, stream=True)
+        body = before + json.dumps(prompt)[1:-1].encode() + after
+        conn, response = self._request(lambda: body, timeout, None, chunked=False)
+        complete = False
+        try:
+            for line in response:
+                if not line.startswith(b"data:"):
+                    continue  # event names, keep-alive comments and blank separators
+                try:
+                    event = json.loads(line[5:])
+                except ValueError as exc:
+                    raise BackendError(f"malformed event: {line[:200]!r}") from exc
+                if event.get("type") == "content_block_delta" and event["delta"].get("type") == "text_delta":
+                    yield event["delta"]["text"]
+                elif event.get("type") == "error":
+                    raise BackendError(f"stream error: {str(event.get('error', event))[:500]}")
+            response.read()  # reaching the end by lines does not mark the response as done
+            complete = True
+        except TimeoutError:
+            raise
+        except (OSError, http.client.HTTPException) as exc:
+            raise BackendError(f"request to {self.base_url} failed: {exc}") from exc
+        finally:
+            if complete:
+                self._done(conn, response)
+            else:
+                conn.close()
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+BACKENDS = {"cli": ClaudeCLIBackend, "http": AnthropicHTTPBackend}
+
+
+def get_backend(name: str) -> Backend:
+    """Return a new backend by name: "cli" or "http"."""
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"unknown backend {name!r}; choose from {', '.join(BACKENDS)}") from None
@@ -0,0 +1,238 @@
+import os
+import shutil
+import threading
+import uuid
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from lecture_split import instrumentation
+from lecture_split.artifacts import PLAN_FILE, SourceInfo, save_plan
+from lecture_split.bundle import bundle_path_for, write_bundle
+from lecture_split.context_generator import write_context_files
+from lecture_split.extractor import extract_slide_texts
+from lecture_split.incremental import OutputState
+from lecture_split.leases import LeaseManager, in_shard, lease_path_for
+from lecture_split.models import LecturePlan, SlideText
+from lecture_split.section_detector import detect_sections
+from lecture_split.splitter import split_pdf
+from lecture_split.store import ExtractionStore
+
+# Coordinator threads only wait on pool futures, so they are cheap, but there
+# is no point in having thousands of them for a very large corpus.
+MAX_COORDINATORS = 64
+
+
+@dataclass
+class BatchResult:
+    pdf_path: Path
+    output_dir: Path
+    sections: int = 0
+    error: str | None = None
+    plan: LecturePlan | None = None
+    skipped: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def find_pdfs(paths: list[Path]) -> list[Path]:
+    """Expand directories into the PDFs they contain, keeping file arguments as-is."""
+    found = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            found.extend(sorted(p for p in path.iterdir() if p.suffix.lower() == ".pdf"))
+        else:
+            found.append(path)
+    return found
+
+
+def default_output_dir(pdf_path: Path, output_root: Path | None = None) -> Path:
+    """Return <pdf_name>_sections/ next to the PDF, or under output_root if given."""
+    parent = pdf_path.parent if output_root is None else Path(output_root)
+    return parent / f"{pdf_path.stem}_sections"
+
+
+def is_complete(output_dir: Path, bundle: bool = False) -> bool:
+    """Whether a previous run finished writing ``output_dir`` (a bundle file if ``bundle``).
+
+    plan.json is the last file a run writes, so a directory without it is
+    left over from an interrupted run.
+    """
+    output_dir = Path(output_dir)
+    return output_dir.is_file() if bundle else (output_dir / PLAN_FILE).is_file()
+
+
+def _publish(tmp_dir: Path, output_dir: Path) -> None:
+    """Rename a finished ``tmp_dir`` to ``output_dir``, replacing any incomplete leftover."""
+    old = None
+    if output_dir.exists():
+        old = output_dir.with_name(f".{output_dir.name}.{uuid.uuid4().hex}.old")
+        os.rename(output_dir, old)
+    os.rename(tmp_dir, output_dir)
+    if old is not None:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def _emit_section_outputs(sizes: list[int]) -> None:
+    for index, size in enumerate(sizes, start=1):
+        instrumentation.emit("section_output", index=index, bytes=size)
+
+
+def process_pdf(
+    pdf_path: Path,
+    output_dir: Path,
+    *,
+    detect: Callable[[list[SlideText]], LecturePlan],
+    procs: Executor,
+    detect_slots: threading.Semaphore,
+    optimize: bool = False,
+    outline: bool = False,
+    store: ExtractionStore | None = None,
+    bundle: bool = False,
+    preamble_token_budget: int | None = None,
+    atomic: bool = False,
+) -> BatchResult:
+    """Run the full pipeline for one PDF; failures are recorded in the result, not raised.
+
+    Extraction and splitting are submitted to ``procs``; ``detect`` runs in
+    the calling thread while holding ``detect_slots``. ``output_dir`` is the
+    bundle file when ``bundle`` is set. With ``atomic``, a directory is
+    written under a temporary name and renamed into place when complete
+    (bundles always are). See process_batch() for the other options.
+    """
+    result = BatchResult(pdf_path=pdf_path, output_dir=output_dir)
+    target = output_dir
+    if atomic and not bundle:
+        output_dir = output_dir.with_name(f".{output_dir.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        # The workers' own stage and section_output events go to hooks in
+        # their process, not this one, so they are measured from here.
+        with instrumentation.stage("extract"):
+            slides = procs.submit(
+                extract_slide_texts, pdf_path, outline=outline, store=store
+            ).result()
+        with detect_slots:
+            plan = detect(slides)
+        source = SourceInfo.of_pdf(pdf_path, page_count=len(slides))
+        if bundle:
+            with instrumentation.stage("bundle"):
+                procs.submit(
+                    write_bundle, pdf_path, plan, output_dir, optimize=optimize,
+                    preamble_token_budget=preamble_token_budget, source=source,
+                ).result()
+            if instrumentation.enabled():
+                with zipfile.ZipFile(output_dir) as zf:
+                    sizes = [zf.getinfo(f"section-{n:02d}.pdf").file_size for n in range(1, len(plan.sections) + 1)]
+                _emit_section_outputs(sizes)
+        else:
+            with instrumentation.stage("split"):
+                section_pdfs = procs.submit(
+                    split_pdf, pdf_path, plan.sections, output_dir, optimize=optimize
+                ).result()
+            if instrumentation.enabled():
+                _emit_section_outputs([path.stat().st_size for path in section_pdfs])
+            write_context_files(plan, output_dir, token_budget=preamble_token_budget)
+            save_plan(output_dir / PLAN_FILE, plan, source)
+            OutputState.discard(output_dir)  # left by an earlier single-file run
+            if output_dir != target:
+                _publish(output_dir, target)
+        result.sections = len(plan.sections)
+        result.plan = plan
+    except Exception as exc:
+        result.error = f"{type(exc).__name__}: {exc}"
+        if output_dir != target:
+            shutil.rmtree(output_dir, ignore_errors=True)
+    return result
+
+
+def process_batch(
+    pdf_paths: list[Path],
+    *,
+    output_root: Path | None = None,
+    detect: Callable[[list[SlideText]], LecturePlan] = detect_sections,
+    jobs: int | None = None,
+    max_detect_calls: int = 4,
+    optimize: bool = False,
+    outline: bool = False,
+    store: ExtractionStore | None = None,
+    bundle: bool = False,
+    preamble_token_budget: int | None = None,
+    shard: tuple[int, int] | None = None,
+    leases: LeaseManager | None = None,
+    on_result: Callable[[BatchResult], None] | None = None,
+) -> list[BatchResult]:
+    """Run the full pipeline over many PDFs concurrently.
+
+    Extraction and splitting (with split_pdf's ``optimize``) run in a process
+    pool of ``jobs`` workers, while at most ``max_detect_calls`` calls to
+    ``detect`` are in flight at once. Failures are recorded per file instead
+    of aborting the batch. ``outline`` extracts slide outlines instead of
+    full text and ``store`` reuses earlier extractions (see
+    extract_slide_texts). With ``bundle``, each PDF's outputs are written
+    into one zip file (see write_bundle) instead of a directory.
+    ``preamble_token_budget`` caps the size of each preamble. Results are
+    returned in input order; ``on_result`` is called as each file finishes.
+
+    For several workers sharing one corpus (e.g. on a shared filesystem),
+    ``shard`` = (I, N) keeps only the PDFs that in_shard() assigns to shard
+    I of N, and ``leases`` claims each PDF through a lease file first, so
+    any number of workers can run over the same PDFs without coordination.
+    In either mode, PDFs whose output is already complete are skipped and
+    outputs are renamed into place only when complete; skipped PDFs have a
+    ``skipped`` reason in their result.
+    """
+    pdf_paths = [Path(p) for p in pdf_paths]
+    if shard is not None:
+        pdf_paths = [p for p in pdf_paths if in_shard(p, shard)]
+    resume = shard is not None or leases is not None
+    if not pdf_paths:
+        return []
+
+    detect_slots = threading.BoundedSemaphore(max(1, max_detect_calls))
+    coordinators = min(len(pdf_paths), MAX_COORDINATORS)
+
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as procs, \
+            ThreadPoolExecutor(max_workers=coordinators) as threads:
+
+        def run_one(pdf_path: Path) -> BatchResult:
+            output_dir = default_output_dir(pdf_path, output_root)
+            if bundle:
+                output_dir = bundle_path_for(output_dir)
+            result = BatchResult(pdf_path=pdf_path, output_dir=output_dir)
+            lease = None
+            if resume and is_complete(output_dir, bundle):
+                result.skipped = "already done"
+            elif leases is not None:
+                lease = leases.claim(lease_path_for(output_dir))
+                if lease is None:
+                    result.skipped = "claimed by another worker"
+                elif is_complete(output_dir, bundle):
+                    # Finished by the worker whose lease we just replaced.
+                    result.skipped = "already done"
+            if result.skipped is None:
+                result = process_pdf(
+                    pdf_path,
+                    output_dir,
+                    detect=detect,
+                    procs=procs,
+                    detect_slots=detect_slots,
+                    optimize=optimize,
+                    outline=outline,
+                    store=store,
+                    bundle=bundle,
+                    preamble_token_budget=preamble_token_budget,
+                    atomic=resume,
+                )
+            if lease is not None:
+                leases.release(lease)
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        futures = [threads.submit(run_one, p) for p in pdf_paths]
+        return [f.result() for f in futures]
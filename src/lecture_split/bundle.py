@@ -0,0 +1,127 @@
+import os
+import zipfile
+from pathlib import Path
+
+from lecture_split import instrumentation
+from lecture_split.artifacts import PLAN_FILE, SourceInfo, parse_plan, plan_json
+from lecture_split.context_generator import generate_all_preambles, generate_manifest
+from lecture_split.document import PDFSource
+from lecture_split.models import LecturePlan
+from lecture_split.splitter import iter_section_pdfs
+
+PLAN_ENTRY = PLAN_FILE
+MANIFEST_ENTRY = "manifest.md"
+
+
+def _pdf_entry(number: int) -> str:
+    return f"section-{number:02d}.pdf"
+
+
+def _preamble_entry(number: int) -> str:
+    return f"section-{number:02d}.md"
+
+
+def bundle_path_for(output_dir: Path) -> Path:
+    """Return the bundle file that replaces ``output_dir`` in bundle mode."""
+    output_dir = Path(output_dir)
+    return output_dir.with_name(output_dir.name + ".zip")
+
+
+@instrumentation.timed("bundle")
+def write_bundle(
+    pdf: PDFSource,
+    plan: LecturePlan,
+    bundle_path: Path,
+    *,
+    workers: int = 1,
+    optimize: bool = False,
+    preamble_token_budget: int | None = None,
+    source: SourceInfo | None = None,
+) -> Path:
+    """Write every output of a run into one zip file in a single sequential pass.
+
+    The archive holds plan.json, manifest.md and section-XX.pdf/section-XX.md,
+    the same names as the files of a normal run; ``source`` is recorded in
+    plan.json (see lecture_split.artifacts). Section PDFs are rendered in
+    memory (by ``workers`` processes, see splitter.iter_section_pdfs) and
+    stored uncompressed, since PDF streams are already compressed; text
+    entries are deflated. ``preamble_token_budget`` caps each preamble as in
+    write_context_files(). The zip central directory is the index that lets
+    Bundle read any one entry without unpacking the rest. The bundle is
+    written under a temporary name and renamed into place when complete.
+    """
+    bundle_path = Path(bundle_path)
+    bundle_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = bundle_path.with_name(f".{bundle_path.name}.{os.getpid()}.tmp")
+    preambles = generate_all_preambles(plan, token_budget=preamble_token_budget)
+    try:
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(PLAN_ENTRY, plan_json(plan, source))
+            zf.writestr(MANIFEST_ENTRY, generate_manifest(plan))
+            pdfs = iter_section_pdfs(pdf, plan.sections, workers=workers, optimize=optimize)
+            for number, (pdf_bytes, preamble) in enumerate(zip(pdfs, preambles), start=1):
+                zf.writestr(_pdf_entry(number), pdf_bytes, compress_type=zipfile.ZIP_STORED)
+                zf.writestr(_preamble_entry(number), preamble)
+                if instrumentation.enabled():
+                    instrumentation.emit("section_output", index=number, bytes=len(pdf_bytes))
+        os.replace(tmp, bundle_path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return bundle_path
+
+
+class Bundle:
+    """Random-access reader for a file written by write_bundle().
+
+    >>> with Bundle("lecture_sections.zip") as bundle:
+    ...     print(bundle.plan.sections[2].title)
+    ...     pdf = bundle.section_pdf(3)
+    ...     preamble = bundle.preamble(3)
+
+    Sections are numbered from 1, like the section-XX entries. Only the
+    entries that are asked for are read from disk.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._zip = zipfile.ZipFile(self.path)
+        self.plan, self.source = parse_plan(self._zip.read(PLAN_ENTRY), f"{self.path}:{PLAN_ENTRY}")
+
+    def __enter__(self) -> "Bundle":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def __len__(self) -> int:
+        return len(self.plan.sections)
+
+    def _check(self, number: int) -> None:
+        if not 1 <= number <= len(self):
+            raise IndexError(f"section {number} out of range 1..{len(self)}")
+
+    def manifest(self) -> str:
+        return self._zip.read(MANIFEST_ENTRY).decode()
+
+    def section_pdf(self, number: int) -> bytes:
+        """Return the PDF of section ``number`` as bytes."""
+        self._check(number)
+        return self._zip.read(_pdf_entry(number))
+
+    def preamble(self, number: int) -> str:
+        """Return the markdown preamble of section ``number``."""
+        self._check(number)
+        return self._zip.read(_preamble_entry(number)).decode()
+
+    def extract_section(self, number: int, directory: Path) -> tuple[Path, Path]:
+        """Write one section's PDF and preamble into ``directory``; return their paths."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        pdf_path = directory / _pdf_entry(number)
+        md_path = directory / _preamble_entry(number)
+        pdf_path.write_bytes(self.section_pdf(number))
+        md_path.write_text(self.preamble(number))
+        return pdf_path, md_path
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterable
+
+from lecture_split.models import LecturePlan, SlideText
+
+# Bump when the cached JSON layout or the key derivation changes.
+CACHE_VERSION = 2
+
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+
+def cache_root() -> Path:
+    """Return $LECTURE_SPLIT_CACHE_DIR, else $XDG_CACHE_HOME/lecture-split.
+
+    Everything lecture-split caches lives under this one directory.
+    """
+    override = os.environ.get("LECTURE_SPLIT_CACHE_DIR")
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "lecture-split"
+
+
+def default_cache_dir() -> Path:
+    """Return the plans/ directory in cache_root()."""
+    return cache_root() / "plans"
+
+
+def normalize_text(text: str) -> str:
+    """Normalize slide text so that whitespace-only differences hash identically."""
+    return " ".join(text.replace("\x00", "").split())
+
+
+class PlanKeyHasher:
+    """Incrementally build a plan_cache_key() for slides that arrive one at a time."""
+
+    def __init__(self, *, model: str, system_prompt: str):
+        self._h = hashlib.sha256()
+        for part in (f"v{CACHE_VERSION}", model, system_prompt):
+            self._h.update(part.encode())
+            self._h.update(b"\x00")
+
+    def update(self, slide: SlideText) -> None:
+        self._h.update(f"{slide.page_number}\x00{normalize_text(slide.text)}\x00".encode())
+
+    def hexdigest(self) -> str:
+        return self._h.hexdigest()
+
+
+def plan_cache_key(
+    slides: Iterable[SlideText],
+    *,
+    model: str,
+    system_prompt: str,
+) -> str:
+    """Hash the normalized slide texts together with everything that shapes the plan."""
+    hasher = PlanKeyHasher(model=model, system_prompt=system_prompt)
+    for s in slides:
+        hasher.update(s)
+    return hasher.hexdigest()
+
+
+class PlanCache:
+    """On-disk cache of LecturePlans keyed by plan_cache_key().
+
+    Each entry is one JSON file. Entries older than ``max_age`` seconds are
+    ignored and removed; beyond that, the least recently used entries are
+    evicted until the cache holds at most ``max_entries`` files and
+    ``max_bytes`` bytes.
+    """
+
+    def __init__(
+        self,
+        directory: Path | None = None,
+        *,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = DEFAULT_MAX_AGE,
+    ):
+        self.directory = Path(directory) if directory is not None else default_cache_dir()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> LecturePlan | None:
+        path = self._path(key)
+        try:
+            age = time.time() - path.stat().st_mtime
+            if age > self.max_age:
+                path.unlink(missing_ok=True)
+                raise FileNotFoundError(path)
+            plan = LecturePlan.from_dict(json.loads(path.read_text()))
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError, KeyError, TypeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return plan
+
+    def put(self, key: str, plan: LecturePlan) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(plan.to_dict()))
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self) -> int:
+        """Apply the age and size limits; return the number of entries removed."""
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort(reverse=True)  # most recently used first
+
+        now = time.time()
+        kept = total = removed = 0
+        full = False
+        for mtime, size, path in entries:
+            full = full or kept >= self.max_entries or total + size > self.max_bytes
+            if full or now - mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                kept += 1
+                total += size
+        return removed
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
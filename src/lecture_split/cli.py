@@ -1,79 +1,1049 @@
+from functools import partial
 from pathlib import Path
+from typing import Callable
 
 import click
+from click.core import ParameterSource
 
-from lecture_split.context_generator import generate_all_preambles
-from lecture_split.extractor import extract_slide_texts
-from lecture_split.section_detector import detect_sections
-from lecture_split.splitter import split_pdf
+from lecture_split.artifacts import (
+    PLAN_FILE, ArtifactError, SourceInfo, load_plan, load_slides, plan_path_for, save_plan,
+    save_slides, slides_path_for,
+)
+from lecture_split.backends import BACKENDS, Backend, BackendError, get_backend
+from lecture_split.batch import BatchResult, default_output_dir, find_pdfs, process_batch
+from lecture_split.bundle import bundle_path_for, write_bundle
+from lecture_split.cache import PlanCache
+from lecture_split.compaction import compact_slides
+from lecture_split.context_generator import write_context_files
+from lecture_split.dedup import collapse_builds, expand_plan
+from lecture_split.document import PDFDocument
+from lecture_split.extractor import extract_slide_texts, iter_slide_texts
+from lecture_split.incremental import OutputState, changed_sections, remove_stale_sections, update_plan
+from lecture_split.instrumentation import TimingsRecorder
+from lecture_split.leases import DEFAULT_LEASE_TTL, LeaseManager, in_shard, parse_shard
+from lecture_split.models import LecturePlan, SlideText
+from lecture_split.search import SearchIndex, find_outputs
+from lecture_split.section_detector import Attempt, detect_sections
+from lecture_split.server import DEFAULT_MAX_FINISHED_JOBS, DEFAULT_PORT, JobServer
+from lecture_split.splitter import SectionWriter, split_pdf, total_size
+from lecture_split.store import ExtractionStore
+from lecture_split.texttiling import detect_sections_local
+from lecture_split.validation import repair_plan
+from lecture_split.windowed import DEFAULT_WINDOW_OVERLAP, detect_sections_windowed
+
+
+def _echo_batch_result(result: BatchResult) -> None:
+    if result.skipped:
+        click.echo(f"  - {result.pdf_path.name}: skipped ({result.skipped})")
+    elif result.ok:
+        target = result.output_dir if result.output_dir.is_file() else f"{result.output_dir}/"
+        click.echo(f"  \u2713 {result.pdf_path.name}: {result.sections} sections -> {target}")
+    else:
+        click.echo(f"  \u2717 {result.pdf_path.name}: {result.error}")
+
+
+def _parse_shard(ctx: click.Context, param: click.Parameter, value: str | None) -> tuple[int, int] | None:
+    if value is None:
+        return None
+    try:
+        return parse_shard(value)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint="--shard") from None
+
+
+def _backend(name: str) -> Backend:
+    try:
+        return get_backend(name)
+    except BackendError as exc:
+        raise click.BadParameter(str(exc), param_hint="--backend") from None
+
+
+def _echo_cache_stats(cache: PlanCache | None, refresh: bool) -> None:
+    if cache is None:
+        return
+    if refresh:
+        click.echo("  Plan cache: refreshed")
+    else:
+        click.echo(f"  Plan cache: {cache.hits} hit(s), {cache.misses} miss(es)")
+
+
+def _echo_attempts(attempts: list[Attempt]) -> None:
+    if len(attempts) < 2 and all(a.outcome == "ok" for a in attempts):
+        return
+    click.echo("  Claude calls:")
+    for i, a in enumerate(attempts):
+        kind = " (hedge)" if a.hedge else ""
+        used = " <- used" if a.won else ""
+        click.echo(f"    #{i + 1} {a.model}{kind}: {a.outcome} after {a.duration:.1f}s{used}")
+
+
+def _report_timings(recorder: TimingsRecorder, show: bool, json_path: Path | None) -> None:
+    if show:
+        click.echo("\nTimings:")
+        click.echo(recorder.format())
+    if json_path is not None:
+        recorder.write_json(json_path)
+
+
+def _make_detector(
+    detect_kwargs: dict,
+    window_size: int | None,
+    window_overlap: int,
+    compact: bool = False,
+    max_prompt_tokens: int | None = None,
+    report: bool = False,
+    offline: bool = False,
+    collapse: bool = False,
+) -> Callable[[list[SlideText]], LecturePlan]:
+    """Build the slides -> LecturePlan function selected by the CLI options.
+
+    ``detect_kwargs`` are passed to every detect_sections() call. ``offline``
+    uses the local TextTiling detector instead of Claude. ``collapse``
+    sends each run of animation build slides once.
+    """
+    if offline:
+        detect = detect_sections_local
+    elif window_size:
+        detect = partial(
+            detect_sections_windowed,
+            window_size=window_size,
+            overlap=window_overlap,
+            **detect_kwargs,
+        )
+    else:
+        detect = partial(detect_sections, **detect_kwargs)
+
+    if compact or max_prompt_tokens:
+        detect = _compacting(detect, max_prompt_tokens, report)
+    if collapse:
+        detect = _collapsing(detect, report)
+    return detect
+
+
+def _compacting(
+    detect: Callable[[list[SlideText]], LecturePlan], max_prompt_tokens: int | None, report: bool
+) -> Callable[[list[SlideText]], LecturePlan]:
+    def compact_then_detect(slides: list[SlideText]) -> LecturePlan:
+        compacted, stats = compact_slides(slides, max_tokens=max_prompt_tokens)
+        if report:
+            click.echo(
+                f"  Compacted prompt: ~{stats.tokens_before} -> ~{stats.tokens_after} tokens "
+                f"({stats.boilerplate_lines} boilerplate lines removed, "
+                f"{stats.truncated_slides} slides truncated)"
+            )
+        return detect(compacted)
+
+    return compact_then_detect
+
+
+def _collapsing(
+    detect: Callable[[list[SlideText]], LecturePlan], report: bool
+) -> Callable[[list[SlideText]], LecturePlan]:
+    def collapse_then_detect(slides: list[SlideText]) -> LecturePlan:
+        collapsed, runs = collapse_builds(slides)
+        if report and len(collapsed) < len(slides):
+            click.echo(f"  Collapsed {len(slides)} slides with animation builds into {len(collapsed)}")
+        return expand_plan(detect(collapsed), runs)
 
+    return collapse_then_detect
 
-def _generate_manifest(plan) -> str:
-    from lecture_split.context_generator import TEACHING_PROMPT
 
-    lines = [
-        f"# {plan.lecture_title}",
-        "",
-        "## System Prompt",
-        "",
-        TEACHING_PROMPT,
-        "",
-        "## Lecture Outline",
-        "",
+# Options that only shape calls to Claude, which --offline never makes.
+_CLAUDE_OPTIONS = ("model", "backend_name", "window_size", "window_overlap", "hedge_after", "hedge_model", "timeout", "retries")
+
+
+def _reject_claude_options_offline(ctx: click.Context) -> None:
+    """Fail if options in _CLAUDE_OPTIONS were given on the command line together with --offline."""
+    given = [
+        param.opts[0] for param in ctx.command.params
+        if param.name in _CLAUDE_OPTIONS and ctx.get_parameter_source(param.name) is ParameterSource.COMMANDLINE
     ]
-    for i, s in enumerate(plan.sections):
-        lines.append(
-            f"{i + 1}. **{s.title}** (slides {s.start_page}\u2013{s.end_page}): {s.summary}"
+    if given:
+        raise click.UsageError(f"{', '.join(given)} cannot be combined with --offline", ctx)
+
+
+def _write_bundle_output(
+    pdf: PDFDocument,
+    plan: LecturePlan,
+    bundle_path: Path,
+    workers: int,
+    optimize: bool,
+    preamble_token_budget: int | None,
+    source: SourceInfo | None = None,
+) -> None:
+    click.echo(f"Writing {len(plan.sections)} sections into {bundle_path.name}...")
+    write_bundle(
+        pdf, plan, bundle_path, workers=workers, optimize=optimize,
+        preamble_token_budget=preamble_token_budget, source=source,
+    )
+    input_bytes = pdf.path.stat().st_size
+    output_bytes = bundle_path.stat().st_size
+    click.echo(
+        f"  {output_bytes / 1024:.0f} KB written for a {input_bytes / 1024:.0f} KB input "
+        f"({output_bytes / input_bytes:.0%})"
+    )
+    click.echo(f"\nDone! Output written to {bundle_path}")
+    click.echo(f"  {len(plan.sections)} section PDFs and context preambles, plus manifest.md and plan.json")
+    click.echo("\nUsage: read sections with lecture_split.bundle.Bundle, or unzip the file")
+
+
+def _plan_for_pdf(plan_path: Path, pdf: PDFDocument) -> tuple[LecturePlan, SourceInfo]:
+    """Load a plan.json and check it against the PDF it is about to be applied to."""
+    try:
+        plan, recorded = load_plan(plan_path)
+    except ArtifactError as exc:
+        raise click.BadParameter(str(exc), param_hint="--plan") from None
+    source = SourceInfo.of_pdf(pdf)
+    if recorded is not None and recorded.page_count != source.page_count:
+        raise click.BadParameter(
+            f"the plan is for {recorded.name} ({recorded.page_count} pages), "
+            f"but {pdf.path.name} has {source.page_count} pages",
+            param_hint="--plan",
         )
-    lines.append("")
-    lines.append("## Files")
-    lines.append("")
-    for i, s in enumerate(plan.sections):
-        num = f"{i + 1:02d}"
-        lines.append(f"- `section-{num}.pdf` + `section-{num}.md` \u2014 {s.title}")
-    return "\n".join(lines)
+    if recorded is not None and recorded.sha256 != source.sha256:
+        click.echo(f"  Note: the plan was made from a different version of {recorded.name}")
+    try:
+        repair = repair_plan(plan, source.page_count)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint="--plan") from None
+    if repair.issues:
+        issues = "; ".join(str(issue) for issue in repair.issues)
+        click.echo(f"  Fixed the plan to cover all {source.page_count} pages ({issues})")
+    return repair.plan, source
+
+
+def _previous_state(output: Path) -> OutputState | None:
+    """The state saved by the last run into ``output``, if it still describes the output."""
+    state = OutputState.load(output)
+    if state is None or not (output / PLAN_FILE).exists():
+        return state  # plan.json is missing from outputs written before it existed
+    try:
+        plan, _ = load_plan(output)
+    except ArtifactError:
+        plan = None
+    if plan != state.plan:
+        click.echo("  The saved fingerprints do not match plan.json; detecting from scratch.")
+        return None
+    return state
+
+
+def _run_batch(
+    pdf_paths: list[Path],
+    output: Path | None,
+    detect: Callable[[list[SlideText]], LecturePlan],
+    jobs: int | None,
+    max_claude_calls: int,
+    optimize: bool,
+    outline: bool,
+    store: ExtractionStore | None,
+    bundle: bool,
+    preamble_token_budget: int | None,
+    cache: PlanCache | None,
+    refresh: bool,
+    shard: tuple[int, int] | None = None,
+    leases: LeaseManager | None = None,
+):
+    count = len(pdf_paths)
+    if shard is not None:
+        count = sum(in_shard(p, shard) for p in pdf_paths)
+        click.echo(f"Shard {shard[0]}/{shard[1]}: {count} of {len(pdf_paths)} PDFs")
+    click.echo(f"Processing {count} PDFs...")
+    results = process_batch(
+        pdf_paths,
+        output_root=output,
+        detect=detect,
+        jobs=jobs,
+        max_detect_calls=max_claude_calls,
+        optimize=optimize,
+        outline=outline,
+        store=store,
+        bundle=bundle,
+        preamble_token_budget=preamble_token_budget,
+        shard=shard,
+        leases=leases,
+        on_result=_echo_batch_result,
+    )
+    failed = [r for r in results if not r.ok]
+    skipped = [r for r in results if r.skipped]
+    summary = f"{len(results) - len(failed) - len(skipped)} succeeded, {len(failed)} failed"
+    if skipped:
+        summary += f", {len(skipped)} skipped"
+    click.echo(f"\nDone! {summary}.")
+    _echo_cache_stats(cache, refresh)
+    if failed:
+        raise SystemExit(1)
+
 
+class _DefaultGroup(click.Group):
+    """A command group that runs ``default_command`` when no subcommand is named.
 
-@click.command()
-@click.argument("pdf_path", type=click.Path(exists=True, path_type=Path))
+    Keeps ``lecture-split lecture.pdf`` working as short for
+    ``lecture-split split lecture.pdf``.
+    """
+
+    def __init__(self, *args, default_command: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default_command = default_command
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if not args or (args[0] not in self.commands and args[0] not in ctx.help_option_names):
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=_DefaultGroup, default_command="split")
+def main():
+    """Split lecture slide PDFs into semantically grouped sections with AI context.
+
+    Run `lecture-split PDF...` (short for `lecture-split split PDF...`), or
+    `lecture-split serve` to start a job server. To run the pipeline in
+    stages, use `extract`, `detect`, `split --plan` and `render`.
+    """
+
+
+@main.command("split")
+@click.argument("pdf_paths", nargs=-1, required=True, type=click.Path(exists=True, path_type=Path))
 @click.option(
     "--output", "-o",
     type=click.Path(path_type=Path),
     default=None,
-    help="Output directory (default: <pdf_name>_sections/)",
+    help="Output directory (default: <pdf_name>_sections/). In batch mode, "
+         "the directory that holds one <pdf_name>_sections/ per PDF.",
 )
 @click.option(
     "--model", "-m",
     default="sonnet",
     help="Claude model alias or full name (e.g. 'sonnet', 'opus', 'haiku').",
 )
-def main(pdf_path: Path, output: Path | None, model: str):
-    """Split lecture slide PDFs into semantically grouped sections with AI context."""
+@click.option(
+    "--backend",
+    "backend_name",
+    type=click.Choice(list(BACKENDS)),
+    default="cli",
+    show_default=True,
+    envvar="LECTURE_SPLIT_BACKEND",
+    help="How to reach Claude: 'cli' runs the claude CLI per call; 'http' calls the "
+         "messages API over pooled keep-alive connections (needs ANTHROPIC_API_KEY). "
+         "Also read from $LECTURE_SPLIT_BACKEND.",
+)
+@click.option(
+    "--jobs", "-j",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Batch mode: worker processes for extraction and splitting (default: CPU count).",
+)
+@click.option(
+    "--max-claude-calls",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Batch mode: maximum number of concurrent Claude calls.",
+)
+@click.option(
+    "--shard",
+    callback=_parse_shard,
+    default=None,
+    metavar="I/N",
+    help="Batch mode: process only the PDFs assigned to shard I of N (by a hash of "
+         "the file name), e.g. run 1/4 ... 4/4 on four hosts. Skips finished outputs.",
+)
+@click.option(
+    "--claim",
+    is_flag=True,
+    help="Batch mode: claim each PDF through a lease file next to its output before "
+         "processing it, so several workers can run over the same PDFs on a shared "
+         "filesystem. Skips finished outputs.",
+)
+@click.option(
+    "--lease-ttl",
+    type=click.FloatRange(min=1),
+    default=DEFAULT_LEASE_TTL,
+    show_default=True,
+    metavar="SECONDS",
+    help="With --claim: a lease not renewed for this long (e.g. its worker crashed) "
+         "can be taken over by another worker.",
+)
+@click.option(
+    "--extract-workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Worker processes for text extraction of very large PDFs.",
+)
+@click.option(
+    "--memory-budget",
+    type=click.IntRange(min=1),
+    default=None,
+    metavar="MB",
+    help="Stream slides into the Claude prompt, holding at most this many MB "
+         "of prompt text in memory (the rest is spooled to a temp file).",
+)
+@click.option(
+    "--window-size",
+    type=click.IntRange(min=2),
+    default=None,
+    help="Detect sections in overlapping windows of this many slides, "
+         "concurrently, and stitch them together (for very long decks).",
+)
+@click.option(
+    "--window-overlap",
+    type=click.IntRange(min=0),
+    default=DEFAULT_WINDOW_OVERLAP,
+    show_default=True,
+    help="Slides shared by neighbouring windows in --window-size mode.",
+)
+@click.option(
+    "--compact",
+    is_flag=True,
+    help="Strip repeated headers/footers, slide numbers and extra whitespace "
+         "from the prompt sent to Claude.",
+)
+@click.option(
+    "--max-prompt-tokens",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Compact the prompt and truncate slide text to fit this many "
+         "(estimated) tokens. Implies --compact.",
+)
+@click.option(
+    "--collapse-builds",
+    "collapse",
+    is_flag=True,
+    help="Send runs of near-identical consecutive slides (animation builds) to "
+         "Claude once; section page ranges still cover every page.",
+)
+@click.option(
+    "--outline",
+    is_flag=True,
+    help="Send Claude only each slide's title and top-level bullets (detected from "
+         "font sizes and indentation) instead of all slide text.",
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    help="Detect sections locally from slide vocabulary instead of asking Claude "
+         "(rougher, but needs no network; requires NumPy).",
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Stream Claude's answer and write each section PDF as soon as Claude has "
+         "finished describing it, while it is still writing the later sections. "
+         "The output is the same as without --stream.",
+)
+@click.option(
+    "--split-workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Worker processes for writing section PDFs.",
+)
+@click.option(
+    "--optimize",
+    is_flag=True,
+    help="Subset fonts and compress section PDFs (smaller files, slower to write).",
+)
+@click.option(
+    "--timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    metavar="SECONDS",
+    help="Kill a Claude call that takes longer than this.",
+)
+@click.option(
+    "--retries",
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+    help="Retry failed, timed-out or unparseable Claude calls this many times, with exponential backoff.",
+)
+@click.option(
+    "--hedge-after",
+    type=click.FloatRange(min=0),
+    default=None,
+    metavar="SECONDS",
+    help="If a Claude call has not answered after this long, start a second one and use whichever answers first.",
+)
+@click.option(
+    "--hedge-model",
+    default=None,
+    help="Model for the hedged second request (default: same as --model).",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["files", "bundle"]),
+    default="files",
+    show_default=True,
+    help="'files' writes a directory of section PDFs and preambles; 'bundle' writes "
+         "everything into one zip file (-o then names the file).",
+)
+@click.option(
+    "--preamble-token-budget",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Keep every section-XX.md under this many (estimated) tokens by leaving out "
+         "the oldest previous-section summaries and distant outline entries.",
+)
+@click.option(
+    "--plan",
+    "plan_path",
+    type=click.Path(exists=True, path_type=Path),
+    default=None,
+    help="Use the section plan in this plan.json (from `lecture-split detect` or an "
+         "earlier run's output directory) instead of detecting one. Slide text is still "
+         "extracted for --format files, so a later --incremental run can start from the plan.",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Reuse the previous run in the output directory: only re-detect slides "
+         "around changed pages and only rewrite affected section files.",
+)
+@click.option(
+    "--timings",
+    is_flag=True,
+    help="Print wall/CPU time and peak memory per stage, prompt size, Claude call "
+         "durations and output sizes at the end of the run.",
+)
+@click.option(
+    "--timings-json",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Write the same metrics as a JSON report to this file.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Do not read or write the section plan cache or the extracted text store.",
+)
+@click.option(
+    "--refresh",
+    is_flag=True,
+    help="Ignore cached section plans and re-detect (the new plan is still cached).",
+)
+def split_command(
+    pdf_paths: tuple[Path, ...],
+    output: Path | None,
+    model: str,
+    backend_name: str,
+    jobs: int | None,
+    max_claude_calls: int,
+    shard: tuple[int, int] | None,
+    claim: bool,
+    lease_ttl: float,
+    extract_workers: int,
+    memory_budget: int | None,
+    window_size: int | None,
+    window_overlap: int,
+    compact: bool,
+    max_prompt_tokens: int | None,
+    collapse: bool,
+    outline: bool,
+    offline: bool,
+    stream: bool,
+    split_workers: int,
+    optimize: bool,
+    timeout: float | None,
+    retries: int,
+    hedge_after: float | None,
+    hedge_model: str | None,
+    output_format: str,
+    preamble_token_budget: int | None,
+    plan_path: Path | None,
+    incremental: bool,
+    timings: bool,
+    timings_json: Path | None,
+    no_cache: bool,
+    refresh: bool,
+):
+    """Split lecture slide PDFs into sections with AI context preambles.
+
+    Pass a single PDF, or several PDFs / a directory of PDFs to process them as a batch.
+    """
+    if offline:
+        _reject_claude_options_offline(click.get_current_context())
+    if window_size is not None and window_overlap >= window_size:
+        raise click.BadParameter("must be smaller than --window-size", param_hint="--window-overlap")
+    if memory_budget is not None and hedge_after is not None:
+        raise click.BadParameter("cannot be combined with --memory-budget", param_hint="--hedge-after")
+    if memory_budget is not None and incremental:
+        raise click.BadParameter("cannot be combined with --memory-budget", param_hint="--incremental")
+    if memory_budget is not None and offline:
+        raise click.BadParameter("cannot be combined with --memory-budget", param_hint="--offline")
+    if memory_budget is not None and collapse:
+        raise click.BadParameter("cannot be combined with --memory-budget", param_hint="--collapse-builds")
+    if memory_budget is not None and window_size is not None:
+        raise click.BadParameter("cannot be combined with --memory-budget", param_hint="--window-size")
+    if memory_budget is not None and (compact or max_prompt_tokens):
+        raise click.BadParameter("cannot be combined with --memory-budget", param_hint="--compact/--max-prompt-tokens")
+    if output_format == "bundle" and incremental:
+        raise click.BadParameter("cannot be combined with --format bundle", param_hint="--incremental")
+    if plan_path is not None and (incremental or memory_budget is not None):
+        raise click.BadParameter("cannot be combined with --incremental or --memory-budget", param_hint="--plan")
+    batch = len(pdf_paths) > 1 or pdf_paths[0].is_dir() or shard is not None or claim
+    if batch:
+        # A batch runs the normal pipeline on each PDF; these only apply to one.
+        single_pdf_only = {
+            "--plan": plan_path is not None,
+            "--incremental": incremental,
+            "--memory-budget": memory_budget is not None,
+            "--extract-workers": extract_workers > 1,
+            "--split-workers": split_workers > 1,
+        }
+        for name, given in single_pdf_only.items():
+            if given:
+                raise click.BadParameter("applies to a single PDF, not a batch", param_hint=name)
+    if stream:
+        conflicts = {
+            "a batch": batch,
+            "--format bundle": output_format == "bundle",
+            "--plan": plan_path is not None,
+            "--incremental": incremental,
+            "--memory-budget": memory_budget is not None,
+            "--window-size": window_size is not None,
+            "--hedge-after": hedge_after is not None,
+            "--collapse-builds": collapse,
+            "--offline": offline,
+        }
+        for name, given in conflicts.items():
+            if given:
+                raise click.BadParameter(f"cannot be combined with {name}", param_hint="--stream")
+    if timings or timings_json:
+        ctx = click.get_current_context()
+        recorder = ctx.with_resource(TimingsRecorder())
+        ctx.call_on_close(lambda: _report_timings(recorder, timings, timings_json))
+
+    cache = None if no_cache or offline else PlanCache()
+    store = None if no_cache else ExtractionStore()
+    detect_kwargs = dict(
+        model=model,
+        backend=None if offline or plan_path is not None else _backend(backend_name),
+        cache=cache,
+        refresh=refresh,
+        timeout=timeout,
+        retries=retries,
+        hedge_after=hedge_after,
+        hedge_model=hedge_model,
+    )
+    pdfs = find_pdfs(list(pdf_paths))
+    if batch:
+        detect = _make_detector(
+            detect_kwargs, window_size, window_overlap, compact, max_prompt_tokens,
+            offline=offline, collapse=collapse,
+        )
+        _run_batch(
+            pdfs, output, detect, jobs, max_claude_calls, optimize, outline, store,
+            output_format == "bundle", preamble_token_budget, cache, refresh,
+            shard=shard,
+            leases=click.get_current_context().with_resource(LeaseManager(ttl=lease_ttl)) if claim else None,
+        )
+        return
+
+    pdf_path = pdfs[0]
     if output is None:
-        output = pdf_path.parent / f"{pdf_path.stem}_sections"
+        output = default_output_dir(pdf_path)
+        if output_format == "bundle":
+            output = bundle_path_for(output)
 
-    click.echo(f"Extracting text from {pdf_path.name}...")
-    slides = extract_slide_texts(pdf_path)
-    click.echo(f"  Found {len(slides)} slides.")
+    # Extraction, hashing and splitting all share one parse of the PDF.
+    pdf = click.get_current_context().with_resource(PDFDocument(pdf_path))
+    attempts: list[Attempt] = []
+    detect_kwargs["attempts"] = attempts
+    slides = None
+    state = None
+    writer = None
+    if plan_path is not None:
+        plan, source = _plan_for_pdf(plan_path, pdf)
+        click.echo(f"Using {len(plan.sections)} sections from {plan_path}")
+        if output_format == "files":
+            # Only for fingerprints.json, so a later --incremental run starts from this plan.
+            slides = extract_slide_texts(pdf, workers=extract_workers, outline=outline, store=store)
+    elif memory_budget is not None:
+        click.echo(f"Streaming text from {pdf_path.name} into Claude...")
+        plan = detect_sections(
+            iter_slide_texts(pdf, outline=outline),
+            memory_budget=memory_budget * 1024 * 1024,
+            **detect_kwargs,
+        )
+    else:
+        click.echo(f"Extracting {'slide outlines' if outline else 'text'} from {pdf_path.name}...")
+        slides = extract_slide_texts(pdf, workers=extract_workers, outline=outline, store=store)
+        reused = " (reused from an earlier extraction)" if store is not None and store.hits else ""
+        click.echo(f"  Found {len(slides)} slides{reused}.")
 
-    click.echo("Detecting section boundaries with Claude...")
-    plan = detect_sections(slides, model=model)
-    click.echo(f"  Identified {len(plan.sections)} sections in \"{plan.lecture_title}\"")
+        if stream:
+            writer = click.get_current_context().with_resource(SectionWriter(pdf, output, optimize=optimize))
+            detect_kwargs["on_section"] = writer
+        detect = _make_detector(
+            detect_kwargs, window_size, window_overlap, compact, max_prompt_tokens,
+            report=True, offline=offline, collapse=collapse,
+        )
+        state = _previous_state(output) if incremental else None
+        if state is not None:
+            click.echo("Updating the previous section plan...")
+            update = update_plan(state, slides, detect)
+            plan = update.plan
+            if update.redetected:
+                ranges = ", ".join(f"{a}\u2013{b}" for a, b in update.redetected)
+                click.echo(f"  Re-detected sections for slides {ranges}")
+            else:
+                click.echo("  No slide changes since the last run.")
+        else:
+            click.echo(f"Detecting section boundaries {'locally' if offline else 'with Claude'}...")
+            plan = detect(slides)
+    if plan_path is None:
+        _echo_attempts(attempts)
+        click.echo(f"  Identified {len(plan.sections)} sections in \"{plan.lecture_title}\"")
+        _echo_cache_stats(cache, refresh)
+        source = SourceInfo.of_pdf(pdf)
+
+    if output_format == "bundle":
+        _write_bundle_output(pdf, plan, output, split_workers, optimize, preamble_token_budget, source)
+        return
+
+    new_state = OutputState.build(slides, plan) if slides is not None else None
+    only = changed_sections(state, new_state, output) if state is not None else None
 
     click.echo(f"Splitting PDF into {len(plan.sections)} section files...")
-    pdf_paths = split_pdf(pdf_path, plan.sections, output)
+    if writer is not None:
+        section_pdfs = writer.finish(plan.sections)
+        click.echo(f"  {writer.early} of {len(section_pdfs)} written while Claude was still answering")
+    else:
+        section_pdfs = split_pdf(
+            pdf, plan.sections, output, workers=split_workers, optimize=optimize, only=only
+        )
+    remove_stale_sections(output, len(plan.sections))
+    if only is not None:
+        click.echo(f"  Rewrote {len(only)} of {len(section_pdfs)} section PDFs")
+    input_bytes = pdf_path.stat().st_size
+    output_bytes = total_size(section_pdfs)
+    click.echo(
+        f"  {output_bytes / 1024:.0f} KB written for a {input_bytes / 1024:.0f} KB input "
+        f"({output_bytes / input_bytes:.0%})"
+    )
 
     click.echo("Generating context preambles...")
-    preambles = generate_all_preambles(plan)
-    for i, preamble in enumerate(preambles):
-        md_path = output / f"section-{i + 1:02d}.md"
-        md_path.write_text(preamble)
-
-    manifest_path = output / "manifest.md"
-    manifest_path.write_text(_generate_manifest(plan))
+    md_paths = write_context_files(
+        plan, output, skip_unchanged=state is not None, token_budget=preamble_token_budget
+    )
+    if new_state is not None:
+        new_state.save(output)
+    else:
+        OutputState.discard(output)  # it would describe sections that were just replaced
+    save_plan(output / PLAN_FILE, plan, source)
 
     click.echo(f"\nDone! Output written to {output}/")
-    click.echo(f"  {len(pdf_paths)} section PDFs")
-    click.echo(f"  {len(preambles)} context preambles")
-    click.echo(f"  1 manifest.md")
+    click.echo(f"  {len(section_pdfs)} section PDFs")
+    click.echo(f"  {len(md_paths)} context preambles")
+    click.echo(f"  1 manifest.md, 1 plan.json")
     click.echo(f"\nUsage: paste section-XX.md into your AI chat, then attach section-XX.pdf")
+
+
+@main.command("extract")
+@click.argument("pdf_path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option(
+    "--output", "-o",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Slides file to write (default: <pdf_name>.slides.json next to the PDF).",
+)
+@click.option("--outline", is_flag=True, help="Keep only slide titles and top-level bullets.")
+@click.option("--extract-workers", type=click.IntRange(min=1), default=1, show_default=True)
+@click.option("--no-cache", is_flag=True, help="Do not use the extracted text store.")
+def extract_command(pdf_path: Path, output: Path | None, outline: bool, extract_workers: int, no_cache: bool):
+    """Extract slide text from a PDF into a slides JSON file for `lecture-split detect`."""
+    output = output or slides_path_for(pdf_path)
+    store = None if no_cache else ExtractionStore()
+    with PDFDocument(pdf_path) as pdf:
+        slides = extract_slide_texts(pdf, workers=extract_workers, outline=outline, store=store)
+        save_slides(output, slides, SourceInfo.of_pdf(pdf))
+    click.echo(f"Extracted {len(slides)} slides -> {output}")
+
+
+@main.command("detect")
+@click.argument("input_path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option(
+    "--output", "-o",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Plan file to write (default: <name>.plan.json next to the input).",
+)
+@click.option("--model", "-m", default="sonnet", show_default=True, help="Claude model to use.")
+@click.option(
+    "--backend",
+    "backend_name",
+    type=click.Choice(list(BACKENDS)),
+    default="cli",
+    show_default=True,
+    envvar="LECTURE_SPLIT_BACKEND",
+    help="How to reach Claude (see `split --help`).",
+)
+@click.option("--window-size", type=click.IntRange(min=2), default=None)
+@click.option("--window-overlap", type=click.IntRange(min=0), default=DEFAULT_WINDOW_OVERLAP, show_default=True)
+@click.option("--compact", is_flag=True, help="Strip boilerplate from prompts (see `split --help`).")
+@click.option("--max-prompt-tokens", type=click.IntRange(min=1), default=None)
+@click.option("--collapse-builds", "collapse", is_flag=True, help="Send animation builds once.")
+@click.option("--offline", is_flag=True, help="Detect sections locally (requires NumPy).")
+@click.option("--timeout", type=click.FloatRange(min=0, min_open=True), default=None, metavar="SECONDS")
+@click.option("--retries", type=click.IntRange(min=0), default=0, show_default=True)
+@click.option("--no-cache", is_flag=True, help="Do not read or write the section plan cache.")
+@click.option("--refresh", is_flag=True, help="Ignore cached section plans and re-detect.")
+def detect_command(
+    input_path: Path,
+    output: Path | None,
+    model: str,
+    backend_name: str,
+    window_size: int | None,
+    window_overlap: int,
+    compact: bool,
+    max_prompt_tokens: int | None,
+    collapse: bool,
+    offline: bool,
+    timeout: float | None,
+    retries: int,
+    no_cache: bool,
+    refresh: bool,
+):
+    """Detect sections in a slides file (or a PDF) and write them to a plan.json.
+
+    Apply the plan with `lecture-split split PDF --plan PLAN`, or regenerate
+    preambles from it with `lecture-split render PLAN`.
+    """
+    if offline:
+        _reject_claude_options_offline(click.get_current_context())
+    if window_size is not None and window_overlap >= window_size:
+        raise click.BadParameter("must be smaller than --window-size", param_hint="--window-overlap")
+    if input_path.suffix.lower() == ".pdf":
+        with PDFDocument(input_path) as pdf:
+            slides = extract_slide_texts(pdf, store=None if no_cache else ExtractionStore())
+            source = SourceInfo.of_pdf(pdf)
+    else:
+        try:
+            slides, source = load_slides(input_path)
+        except ArtifactError as exc:
+            raise click.BadParameter(str(exc), param_hint="INPUT_PATH") from None
+    output = output or plan_path_for(input_path)
+
+    cache = None if no_cache or offline else PlanCache()
+    attempts: list[Attempt] = []
+    detect_kwargs = dict(
+        model=model,
+        backend=None if offline else _backend(backend_name),
+        cache=cache,
+        refresh=refresh,
+        timeout=timeout,
+        retries=retries,
+        attempts=attempts,
+    )
+    detect = _make_detector(
+        detect_kwargs, window_size, window_overlap, compact, max_prompt_tokens,
+        report=True, offline=offline, collapse=collapse,
+    )
+    click.echo(f"Detecting section boundaries in {len(slides)} slides {'locally' if offline else 'with Claude'}...")
+    plan = detect(slides)
+    _echo_attempts(attempts)
+    _echo_cache_stats(cache, refresh)
+    save_plan(output, plan, source)
+    click.echo(f"  Identified {len(plan.sections)} sections in \"{plan.lecture_title}\" -> {output}")
+
+
+@main.command("render")
+@click.argument("plan_path", type=click.Path(exists=True, path_type=Path))
+@click.option(
+    "--output", "-o",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Directory for manifest.md and section-XX.md (default: the plan's directory).",
+)
+@click.option("--preamble-token-budget", type=click.IntRange(min=1), default=None)
+def render_command(plan_path: Path, output: Path | None, preamble_token_budget: int | None):
+    """Write manifest.md and section-XX.md preambles from a plan.json, without the PDF.
+
+    PLAN_PATH is a plan.json file or an output directory that contains one.
+    """
+    try:
+        plan, _ = load_plan(plan_path)
+    except ArtifactError as exc:
+        raise click.BadParameter(str(exc), param_hint="PLAN_PATH") from None
+    if output is None:
+        output = plan_path if plan_path.is_dir() else plan_path.parent
+    md_paths = write_context_files(plan, output, skip_unchanged=True, token_budget=preamble_token_budget)
+    click.echo(f"Rendered {len(plan.sections)} preambles ({len(md_paths)} changed) and manifest.md in {output}/")
+
+
+_INDEX_OPTION = click.option(
+    "--index",
+    "index_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Search index file (default: search.sqlite3 in $LECTURE_SPLIT_CACHE_DIR or ~/.cache/lecture-split).",
+)
+
+
+@main.command("index")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True, path_type=Path))
+@_INDEX_OPTION
+def index_command(paths: tuple[Path, ...], index_path: Path | None):
+    """Add split lectures to the search index used by `lecture-split search`.
+
+    PATHS are output directories, bundles, or directories that contain them
+    (such as a batch's -o directory). Outputs that have not changed since
+    they were last indexed are skipped, so re-run this after each new run.
+    """
+    outputs = find_outputs(list(paths))
+    if not outputs:
+        raise click.BadParameter("no output directories or bundles found", param_hint="PATHS")
+    index = SearchIndex(index_path)
+    update = index.update(outputs)
+    for output, error in update.failed.items():
+        click.echo(f"  \u2717 {output}: {error}")
+    failed = f", {len(update.failed)} failed" if update.failed else ""
+    click.echo(
+        f"Indexed {update.sections} sections from {update.added} new and {update.updated} changed "
+        f"lectures ({update.unchanged} unchanged, {update.removed} removed{failed}) in {index.path}"
+    )
+    if update.failed:
+        raise SystemExit(1)
+
+
+@main.command("search")
+@click.argument("query", nargs=-1, required=True)
+@_INDEX_OPTION
+@click.option("--limit", "-n", type=click.IntRange(min=1), default=10, show_default=True)
+def search_command(query: tuple[str, ...], index_path: Path | None, limit: int):
+    """Find the sections that best match QUERY across all indexed lectures.
+
+    End a word with * to match every word it starts, e.g. `backprop*`.
+    """
+    hits = SearchIndex(index_path).search(" ".join(query), limit=limit)
+    if not hits:
+        click.echo("No matching sections.")
+        return
+    for hit in hits:
+        click.echo(
+            f"{hit.score:6.2f}  {hit.lecture_title} \u2014 {hit.number}. {hit.title} "
+            f"(slides {hit.start_page}\u2013{hit.end_page})"
+        )
+        click.echo(f"        {hit.section_pdf}")
+
+
+@main.command("serve")
+@click.option("--host", default="127.0.0.1", show_default=True, help="Address to listen on.")
+@click.option("--port", type=click.IntRange(min=0), default=DEFAULT_PORT, show_default=True)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=2,
+    show_default=True,
+    help="Jobs processed at the same time; further jobs wait in the queue.",
+)
+@click.option(
+    "--jobs", "-j",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Worker processes for extraction and splitting, shared by all jobs (default: CPU count).",
+)
+@click.option(
+    "--max-claude-calls",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Maximum concurrent Claude calls across all jobs.",
+)
+@click.option(
+    "--output-root",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Write job outputs under this directory instead of next to each PDF. "
+         "Requests may only name an output inside it.",
+)
+@click.option(
+    "--upload-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Accept PDF uploads and store them here (uploads are refused without it).",
+)
+@click.option(
+    "--max-finished-jobs",
+    type=click.IntRange(min=0),
+    default=DEFAULT_MAX_FINISHED_JOBS,
+    show_default=True,
+    help="Finished jobs to remember; older ones disappear from /jobs.",
+)
+@click.option("--model", "-m", default="sonnet", show_default=True, help="Claude model to use.")
+@click.option(
+    "--backend",
+    "backend_name",
+    type=click.Choice(list(BACKENDS)),
+    default="cli",
+    show_default=True,
+    envvar="LECTURE_SPLIT_BACKEND",
+    help="How to reach Claude (see `split --help`).",
+)
+@click.option("--timeout", type=click.FloatRange(min=0, min_open=True), default=None, metavar="SECONDS")
+@click.option("--retries", type=click.IntRange(min=0), default=0, show_default=True)
+@click.option("--compact", is_flag=True, help="Strip boilerplate from prompts (see `split --help`).")
+@click.option("--outline", is_flag=True, help="Send only slide titles and top-level bullets.")
+@click.option("--optimize", is_flag=True, help="Subset fonts and compress section PDFs.")
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["files", "bundle"]),
+    default="files",
+    show_default=True,
+)
+@click.option("--preamble-token-budget", type=click.IntRange(min=1), default=None)
+@click.option("--no-cache", is_flag=True, help="Do not use the plan cache or the extracted text store.")
+def serve_command(
+    host: str,
+    port: int,
+    workers: int,
+    jobs: int | None,
+    max_claude_calls: int,
+    output_root: Path | None,
+    upload_dir: Path | None,
+    max_finished_jobs: int,
+    model: str,
+    backend_name: str,
+    timeout: float | None,
+    retries: int,
+    compact: bool,
+    outline: bool,
+    optimize: bool,
+    output_format: str,
+    preamble_token_budget: int | None,
+    no_cache: bool,
+):
+    """Run a local HTTP job server that keeps caches and worker processes warm.
+
+    POST {"pdf_path": ...} to /jobs, then poll /jobs/<id> and fetch
+    /jobs/<id>/result. All jobs share the plan cache, the extracted text
+    store, the worker processes and the --max-claude-calls limit.
+    """
+    cache = None if no_cache else PlanCache()
+    detect_kwargs = dict(
+        model=model, backend=_backend(backend_name), cache=cache, timeout=timeout, retries=retries
+    )
+    server = JobServer(
+        (host, port),
+        detect=_make_detector(detect_kwargs, None, 0, compact),
+        workers=workers,
+        jobs=jobs,
+        max_detect_calls=max_claude_calls,
+        output_root=output_root,
+        upload_dir=upload_dir,
+        max_finished_jobs=max_finished_jobs,
+        optimize=optimize,
+        outline=outline,
+        store=None if no_cache else ExtractionStore(),
+        bundle=output_format == "bundle",
+        preamble_token_budget=preamble_token_budget,
+    )
+    click.echo(f"Serving lecture-split jobs on http://{host}:{server.port}/ (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        click.echo("\nFinishing queued jobs...")
+    finally:
+        server.close()
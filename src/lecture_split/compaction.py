@@ -0,0 +1,128 @@
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+from lecture_split.models import SlideText
+
+# Rough characters-per-token ratio for English slide text; good enough for
+# budgeting and reporting, not for billing.
+CHARS_PER_TOKEN = 4
+
+# Prompt characters spent per slide outside its text ("--- SLIDE n ---" etc.).
+SLIDE_OVERHEAD_CHARS = 24
+
+ELLIPSIS = " …"
+
+_NOISE_LINE = re.compile(
+    r"""^(
+        \d+                                   # bare slide number
+        | \d+\s*(/|of)\s*\d+                  # 3/40, 3 of 40
+        | (page|slide)\s+\d+(\s+of\s+\d+)?    # Slide 3 of 40
+        | (©|\(c\)|copyright\b).*             # copyright notices
+    )$""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+
+@dataclass
+class CompactionStats:
+    tokens_before: int
+    tokens_after: int
+    boilerplate_lines: int
+    truncated_slides: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of ``text`` from its length."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _prompt_tokens(slides: list[SlideText]) -> int:
+    chars = sum(len(s.text) + SLIDE_OVERHEAD_CHARS for s in slides)
+    return -(-chars // CHARS_PER_TOKEN)
+
+
+def find_boilerplate(
+    slides: list[SlideText], *, min_fraction: float = 0.5, min_pages: int = 3
+) -> set[str]:
+    """Return whitespace-normalized lines that repeat on many pages (headers, footers, course codes)."""
+    counts = Counter()
+    for s in slides:
+        counts.update({" ".join(line.split()) for line in s.text.splitlines()} - {""})
+    threshold = max(min_pages, min_fraction * len(slides))
+    return {line for line, n in counts.items() if n >= threshold}
+
+
+def _clean_lines(text: str, boilerplate: set[str]) -> list[str]:
+    lines = []
+    for line in text.replace("\x00", "").splitlines():
+        line = " ".join(line.split())
+        if line and line not in boilerplate and not _NOISE_LINE.match(line):
+            lines.append(line)
+    return lines
+
+
+def _truncate(lines: list[str], max_chars: int) -> str:
+    """Keep whole lines from the top (title first) and cut the last one at a word boundary."""
+    kept = []
+    used = 0
+    for line in lines:
+        cost = len(line) + (1 if kept else 0)
+        if used + cost <= max_chars:
+            kept.append(line)
+            used += cost
+            continue
+        room = max_chars - used - (1 if kept else 0) - len(ELLIPSIS)
+        cut = line[:room].rsplit(" ", 1)[0] if room > 0 else ""
+        if cut:
+            kept.append(cut + ELLIPSIS)
+        elif kept:
+            kept[-1] += ELLIPSIS
+        break
+    return "\n".join(kept)
+
+
+def _allocate(lengths: list[int], budget: int) -> list[int]:
+    """Split ``budget`` characters across slides: short slides keep everything
+    and the leftover is shared equally among the longer ones."""
+    shares = [0] * len(lengths)
+    remaining = budget
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    for n, i in enumerate(order):
+        fair = remaining // (len(order) - n)
+        shares[i] = min(lengths[i], fair)
+        remaining -= shares[i]
+    return shares
+
+
+def compact_slides(
+    slides: list[SlideText], *, max_tokens: int | None = None
+) -> tuple[list[SlideText], CompactionStats]:
+    """Strip boilerplate and whitespace from slide text and fit it into a token budget.
+
+    Lines repeated across many pages, slide numbers and copyright lines are
+    removed and whitespace is collapsed. With ``max_tokens``, each slide gets a
+    share of the budget; slides over their share keep their leading lines and
+    are cut at a word boundary. Page numbers are unchanged.
+    """
+    boilerplate = find_boilerplate(slides)
+    cleaned = [_clean_lines(s.text, boilerplate) for s in slides]
+    texts = ["\n".join(lines) for lines in cleaned]
+
+    truncated = 0
+    if max_tokens is not None:
+        budget = max(0, max_tokens * CHARS_PER_TOKEN - SLIDE_OVERHEAD_CHARS * len(slides))
+        shares = _allocate([len(t) for t in texts], budget)
+        for i, share in enumerate(shares):
+            if len(texts[i]) > share:
+                texts[i] = _truncate(cleaned[i], share)
+                truncated += 1
+
+    compacted = [SlideText(s.page_number, text) for s, text in zip(slides, texts)]
+    stats = CompactionStats(
+        tokens_before=_prompt_tokens(slides),
+        tokens_after=_prompt_tokens(compacted),
+        boilerplate_lines=len(boilerplate),
+        truncated_slides=truncated,
+    )
+    return compacted, stats
@@ -1,3 +1,7 @@
+from pathlib import Path
+
+from lecture_split.compaction import CHARS_PER_TOKEN, ELLIPSIS
+from lecture_split.instrumentation import timed
 from lecture_split.models import LecturePlan
 
 TEACHING_PROMPT = """\
@@ -13,54 +17,232 @@ corresponding slides as a PDF. Your job is to teach me this section.
 - If the slides contain errors or imprecise statements, call them out."""
 
 
+def _prefix_lengths(lines: list[str]) -> list[int]:
+    """p[k] is the length of lines[:k] joined with newlines, plus one trailing newline."""
+    p = [0]
+    for line in lines:
+        p.append(p[-1] + len(line) + 1)
+    return p
+
+
+class PreambleRenderer:
+    """Render the section preambles of one plan, sharing work between sections.
+
+    The outline entries and summary lines of every section are formatted once
+    up front; each preamble is then assembled from slices of them. With
+    ``token_budget``, every preamble is kept under that many (estimated)
+    tokens: the oldest previous-section summaries are elided first, then
+    outline entries far from the current section, and as a last resort the
+    current section's summary is shortened. Sizes are computed from prefix
+    sums, so fitting a preamble costs no more than writing it out.
+    """
+
+    def __init__(self, plan: LecturePlan, *, token_budget: int | None = None):
+        self.plan = plan
+        self.max_chars = None if token_budget is None else token_budget * CHARS_PER_TOKEN
+        self._covered, self._current, self._upcoming, self._summaries = [], [], [], []
+        for i, s in enumerate(plan.sections):
+            prefix = f"{i + 1}."
+            page_range = f"(slides {s.start_page}\u2013{s.end_page})"
+            self._covered.append(f"{prefix} {s.title} {page_range} \u2713 covered")
+            self._current.append(f"{prefix} **{s.title} {page_range} \u2190 YOU ARE HERE**")
+            self._upcoming.append(f"{prefix} {s.title} {page_range}")
+            self._summaries.append(f"- **{s.title}**: {s.summary}")
+        self._covered_len = _prefix_lengths(self._covered)
+        self._upcoming_len = _prefix_lengths(self._upcoming)
+        self._summaries_len = _prefix_lengths(self._summaries)
+
+    def __len__(self) -> int:
+        return len(self.plan.sections)
+
+    def _head(self, i: int) -> list[str]:
+        current = self.plan.sections[i]
+        return [
+            TEACHING_PROMPT,
+            "",
+            "---",
+            "",
+            f"# Lecture: {self.plan.lecture_title}",
+            f"## Section {i + 1} of {len(self)}: {current.title}",
+            f"### Slides {current.start_page}\u2013{current.end_page}",
+            "",
+            "### Full Lecture Outline",
+        ]
+
+    def _tail(self, i: int, summary: str) -> list[str]:
+        return [
+            "### This section covers",
+            summary,
+            "",
+            f"### Attach the corresponding section-{i + 1:02d}.pdf when prompting.",
+        ]
+
+    @staticmethod
+    def _outline_markers(lo: int, hi: int, n: int) -> tuple[str | None, str | None]:
+        before = f"\u2026 sections 1\u2013{lo} not shown" if lo > 0 else None
+        after = f"\u2026 sections {hi + 1}\u2013{n} not shown" if hi < n else None
+        return before, after
+
+    @staticmethod
+    def _summaries_marker(i: int, keep: int) -> str | None:
+        return f"- ({i - keep} earlier section summaries omitted)" if keep < i else None
+
+    def _assemble(self, i: int, keep: int, lo: int, hi: int, summary: str) -> str:
+        """Build preamble ``i`` with the last ``keep`` previous summaries and outline entries [lo, hi)."""
+        n = len(self)
+        before, after = self._outline_markers(lo, hi, n)
+        lines = self._head(i)
+        if before:
+            lines.append(before)
+        lines.extend(self._covered[lo:i])
+        lines.append(self._current[i])
+        lines.extend(self._upcoming[i + 1:hi])
+        if after:
+            lines.append(after)
+        lines.append("")
+        if i > 0:
+            lines.append("### Previous sections covered")
+            marker = self._summaries_marker(i, keep)
+            if marker:
+                lines.append(marker)
+            lines.extend(self._summaries[i - keep:i])
+            lines.append("")
+        else:
+            lines.append("This is the first section of the lecture.")
+            lines.append("")
+        lines.extend(self._tail(i, summary))
+        return "\n".join(lines)
+
+    def _size(self, i: int, keep: int, lo: int, hi: int, fixed: int) -> int:
+        """len(self._assemble(i, keep, lo, hi, ...)) without building it; ``fixed`` covers the rest."""
+        before, after = self._outline_markers(lo, hi, len(self))
+        marker = self._summaries_marker(i, keep) if i > 0 else None
+        size = fixed
+        size += self._covered_len[i] - self._covered_len[lo]
+        size += self._upcoming_len[hi] - self._upcoming_len[i + 1]
+        size += self._summaries_len[i] - self._summaries_len[i - keep]
+        for extra in (before, after, marker):
+            if extra is not None:
+                size += len(extra) + 1
+        return size
+
+    def render(self, i: int) -> str:
+        """Return the preamble of section ``i`` (0-based)."""
+        n = len(self)
+        summary = self.plan.sections[i].summary
+        if self.max_chars is None:
+            return self._assemble(i, i, 0, n, summary)
+
+        # Everything whose size does not depend on what is elided.
+        fixed_lines = self._head(i) + [self._current[i], ""] + self._tail(i, summary)
+        if i > 0:
+            fixed_lines += ["### Previous sections covered", ""]
+        else:
+            fixed_lines += ["This is the first section of the lecture.", ""]
+        fixed = sum(len(line) + 1 for line in fixed_lines) - 1
+
+        def fits(keep: int, lo: int, hi: int) -> bool:
+            return self._size(i, keep, lo, hi, fixed) <= self.max_chars
+
+        if fits(i, 0, n):
+            return self._assemble(i, i, 0, n, summary)
+        keep = _largest(lambda k: fits(k, 0, n), i - 1)
+        if keep is not None:
+            return self._assemble(i, keep, 0, n, summary)
+        width = _largest(lambda w: fits(0, max(0, i - w), min(n, i + w + 1)), n)
+        if width is not None:
+            return self._assemble(i, 0, max(0, i - width), min(n, i + width + 1), summary)
+
+        overflow = self._size(i, 0, i, i + 1, fixed) - self.max_chars
+        room = len(summary) - overflow - len(ELLIPSIS)
+        short = summary[:room].rsplit(" ", 1)[0] + ELLIPSIS if room > 0 else ELLIPSIS.strip()
+        return self._assemble(i, 0, i, i + 1, short)
+
+
+def _largest(fits, high: int) -> int | None:
+    """Largest x in [0, high] with fits(x), assuming fits is (mostly) monotone; None if fits(0) fails."""
+    if high < 0 or not fits(0):
+        return None
+    low = 0
+    while low < high:
+        mid = (low + high + 1) // 2
+        if fits(mid):
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
 def generate_preamble(plan: LecturePlan, section_index: int) -> str:
     """Generate a markdown context preamble for a given section."""
-    current = plan.sections[section_index]
-    total = len(plan.sections)
+    return PreambleRenderer(plan).render(section_index)
+
+
+@timed("preambles")
+def generate_all_preambles(plan: LecturePlan, *, token_budget: int | None = None) -> list[str]:
+    """Generate preambles for all sections in the plan, each within ``token_budget`` if given."""
+    renderer = PreambleRenderer(plan, token_budget=token_budget)
+    return [renderer.render(i) for i in range(len(renderer))]
+
 
+def generate_manifest(plan: LecturePlan) -> str:
+    """Generate the manifest.md table of contents for the whole lecture."""
     lines = [
-        TEACHING_PROMPT,
+        f"# {plan.lecture_title}",
+        "",
+        "## System Prompt",
         "",
-        "---",
+        TEACHING_PROMPT,
         "",
-        f"# Lecture: {plan.lecture_title}",
-        f"## Section {section_index + 1} of {total}: {current.title}",
-        f"### Slides {current.start_page}\u2013{current.end_page}",
+        "## Lecture Outline",
         "",
-        "### Full Lecture Outline",
     ]
-
     for i, s in enumerate(plan.sections):
-        prefix = f"{i + 1}."
-        page_range = f"(slides {s.start_page}\u2013{s.end_page})"
-        if i < section_index:
-            lines.append(f"{prefix} {s.title} {page_range} \u2713 covered")
-        elif i == section_index:
-            lines.append(f"{prefix} **{s.title} {page_range} \u2190 YOU ARE HERE**")
-        else:
-            lines.append(f"{prefix} {s.title} {page_range}")
-
+        lines.append(
+            f"{i + 1}. **{s.title}** (slides {s.start_page}\u2013{s.end_page}): {s.summary}"
+        )
     lines.append("")
+    lines.append("## Files")
+    lines.append("")
+    for i, s in enumerate(plan.sections):
+        num = f"{i + 1:02d}"
+        lines.append(f"- `section-{num}.pdf` + `section-{num}.md` \u2014 {s.title}")
+    return "\n".join(lines)
 
-    if section_index > 0:
-        lines.append("### Previous sections covered")
-        for i in range(section_index):
-            s = plan.sections[i]
-            lines.append(f"- **{s.title}**: {s.summary}")
-        lines.append("")
-
-    if section_index == 0:
-        lines.append("This is the first section of the lecture.")
-        lines.append("")
 
-    lines.append("### This section covers")
-    lines.append(current.summary)
-    lines.append("")
-    lines.append(f"### Attach the corresponding section-{section_index + 1:02d}.pdf when prompting.")
+def _write_if_changed(path: Path, text: str) -> bool:
+    if path.exists() and path.read_text() == text:
+        return False
+    path.write_text(text)
+    return True
 
-    return "\n".join(lines)
 
+def write_context_files(
+    plan: LecturePlan,
+    output_dir: Path,
+    *,
+    skip_unchanged: bool = False,
+    token_budget: int | None = None,
+) -> list[Path]:
+    """Write section-XX.md preambles and manifest.md; return the preamble paths written.
 
-def generate_all_preambles(plan: LecturePlan) -> list[str]:
-    """Generate preambles for all sections in the plan."""
-    return [generate_preamble(plan, i) for i in range(len(plan.sections))]
+    With ``skip_unchanged``, files whose content would not change are left
+    alone. ``token_budget`` caps the size of each preamble (see PreambleRenderer).
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    md_paths = []
+    for i, preamble in enumerate(generate_all_preambles(plan, token_budget=token_budget)):
+        md_path = output_dir / f"section-{i + 1:02d}.md"
+        if skip_unchanged:
+            if _write_if_changed(md_path, preamble):
+                md_paths.append(md_path)
+        else:
+            md_path.write_text(preamble)
+            md_paths.append(md_path)
+    manifest = generate_manifest(plan)
+    if skip_unchanged:
+        _write_if_changed(output_dir / "manifest.md", manifest)
+    else:
+        (output_dir / "manifest.md").write_text(manifest)
+    return md_paths
@@ -0,0 +1,80 @@
+import re
+from dataclasses import dataclass
+
+from lecture_split.models import LecturePlan, Section, SlideText
+
+# Share of a slide's shingles that must reappear on the next slide for the
+# two to count as steps of the same animation build.
+DEFAULT_MIN_CONTAINMENT = 0.9
+
+_WORD = re.compile(r"\w+")
+
+
+@dataclass
+class BuildRun:
+    """Consecutive pages that are builds of one slide, 1-indexed and inclusive."""
+    start_page: int
+    end_page: int
+
+
+def shingles(text: str, size: int = 2) -> set[tuple[str, ...]]:
+    """Return the word ``size``-grams of ``text``, ignoring case and bare numbers.
+
+    Numbers are dropped so that changing slide numbers and "3/40" footers do
+    not make otherwise identical builds look different.
+    """
+    words = [w for w in _WORD.findall(text.lower()) if not w.isdigit()]
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def find_build_runs(
+    slides: list[SlideText], *, min_containment: float = DEFAULT_MIN_CONTAINMENT
+) -> list[BuildRun]:
+    """Group consecutive slides where each one (nearly) contains the previous one.
+
+    Every slide ends up in exactly one run; most runs are a single page.
+    Slides without text are never merged, since image-only pages carry no
+    evidence that they belong together.
+    """
+    runs: list[BuildRun] = []
+    previous: set = set()
+    for slide in slides:
+        current = shingles(slide.text)
+        if runs and previous and current and len(previous & current) >= min_containment * len(previous):
+            runs[-1].end_page = slide.page_number
+        else:
+            runs.append(BuildRun(slide.page_number, slide.page_number))
+        previous = current
+    return runs
+
+
+def collapse_builds(
+    slides: list[SlideText], *, min_containment: float = DEFAULT_MIN_CONTAINMENT
+) -> tuple[list[SlideText], list[BuildRun]]:
+    """Replace each build run by its last (most complete) slide.
+
+    The collapsed slides are numbered 1..len(runs); pass the runs to
+    expand_plan() to map a plan for them back to the original pages.
+    """
+    by_page = {s.page_number: s for s in slides}
+    runs = find_build_runs(slides, min_containment=min_containment)
+    collapsed = [SlideText(i + 1, by_page[run.end_page].text) for i, run in enumerate(runs)]
+    return collapsed, runs
+
+
+def expand_plan(plan: LecturePlan, runs: list[BuildRun]) -> LecturePlan:
+    """Map a plan over collapsed slides back to the page numbers of the original deck."""
+    return LecturePlan(
+        lecture_title=plan.lecture_title,
+        sections=[
+            Section(
+                title=s.title,
+                start_page=runs[s.start_page - 1].start_page,
+                end_page=runs[s.end_page - 1].end_page,
+                summary=s.summary,
+            )
+            for s in plan.sections
+        ],
+    )
@@ -0,0 +1,164 @@
+import hashlib
+import mmap
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import fitz
+
+from lecture_split.models import Section, SlideText
+from lecture_split.outline import page_outline
+
+# Save options for --optimize: drop unused objects and duplicate streams,
+# and compress content, image and font streams.
+OPTIMIZED_SAVE_OPTIONS = {
+    "garbage": 3,
+    "clean": True,
+    "deflate": True,
+    "deflate_images": True,
+    "deflate_fonts": True,
+    "use_objstms": True,
+}
+
+
+class PDFDocument:
+    """A lecture PDF opened once and shared by extraction, splitting and rendering.
+
+    >>> with PDFDocument("lecture.pdf") as doc:
+    ...     slides = extract_slide_texts(doc)
+    ...     plan = detect_sections(slides)
+    ...     split_pdf(doc, plan.sections, "lecture_sections")
+
+    The file is memory-mapped and parsed once, so its cross-reference table
+    is loaded once per run rather than once per stage; pages are read from
+    the mapping on demand and stay in the OS page cache. The functions that
+    take a PDF path also accept an open PDFDocument. Close it (or use it as
+    a context manager) to release the mapping.
+    """
+
+    def __init__(self, pdf_path: Path):
+        self.path = Path(pdf_path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"PDF not found: {self.path}")
+        self._file = open(self.path, "rb")
+        self._map = None
+        self._view = None
+        self._sha256: str | None = None
+        try:
+            if self.path.stat().st_size:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._map)
+                self._doc = fitz.open(stream=self._view, filetype="pdf")
+            else:
+                self._doc = fitz.open(str(self.path))  # raises fitz's own error for an empty file
+        except BaseException:
+            self._release()
+            raise
+
+    def __enter__(self) -> "PDFDocument":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        state = "closed" if self.closed else f"{self.page_count} pages"
+        return f"<PDFDocument {self.path.name} ({state})>"
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    @property
+    def doc(self) -> fitz.Document:
+        """The underlying PyMuPDF document."""
+        if self.closed:
+            raise ValueError(f"{self.path} is closed")
+        return self._doc
+
+    @property
+    def page_count(self) -> int:
+        return self.doc.page_count
+
+    @property
+    def sha256(self) -> str:
+        """SHA-256 of the file's contents (same as store.file_hash), computed once."""
+        if self._sha256 is None:
+            self.doc  # raises if closed
+            self._sha256 = hashlib.sha256(self._view if self._view is not None else b"").hexdigest()
+        return self._sha256
+
+    def page_text(self, index: int, outline: bool = False) -> str:
+        """Text of page ``index`` (0-based); with ``outline``, only its title and bullets."""
+        page = self.doc[index]
+        return page_outline(page) if outline else page.get_text().strip()
+
+    def iter_slide_texts(
+        self, outline: bool = False, start: int = 0, stop: int | None = None
+    ) -> Iterator[SlideText]:
+        """Yield pages [start, stop) (0-based) as 1-indexed SlideTexts."""
+        stop = self.page_count if stop is None else stop
+        for i in range(start, stop):
+            yield SlideText(page_number=i + 1, text=self.page_text(i, outline))
+
+    def section_document(self, section: Section, optimize: bool = False) -> fitz.Document:
+        """Return a new in-memory document with the pages of ``section``; the caller closes it."""
+        dst = fitz.open()
+        # pages are 0-indexed in pymupdf, sections use 1-indexed pages
+        dst.insert_pdf(self.doc, from_page=section.start_page - 1, to_page=section.end_page - 1)
+        if optimize:
+            # Embed only the glyphs this section uses instead of whole fonts.
+            dst.subset_fonts()
+        return dst
+
+    def section_bytes(self, section: Section, optimize: bool = False) -> bytes:
+        dst = self.section_document(section, optimize)
+        try:
+            return dst.tobytes(**(OPTIMIZED_SAVE_OPTIONS if optimize else {}))
+        finally:
+            dst.close()
+
+    def write_section(self, section: Section, out_path: Path, optimize: bool = False) -> None:
+        dst = self.section_document(section, optimize)
+        try:
+            dst.save(str(out_path), **(OPTIMIZED_SAVE_OPTIONS if optimize else {}))
+        finally:
+            dst.close()
+
+    def render_page(self, page_number: int, *, dpi: int = 96) -> bytes:
+        """Render page ``page_number`` (1-indexed) as a PNG."""
+        return self.doc[page_number - 1].get_pixmap(dpi=dpi).tobytes("png")
+
+    def _release(self) -> None:
+        # The document must go before the view, and the view before the mapping.
+        if getattr(self, "_doc", None) is not None:
+            self._doc.close()
+            self._doc = None
+        if self._view is not None:
+            self._view.release()
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def close(self) -> None:
+        """Release the document, the mapping and the file; safe to call twice."""
+        if not self.closed:
+            self._release()
+
+
+# A PDF given either by path or as an already open document.
+PDFSource = str | Path | PDFDocument
+
+
+@contextmanager
+def opened(source: PDFSource) -> Iterator[PDFDocument]:
+    """Yield ``source`` if it is already open, else open it for the duration of the block."""
+    if isinstance(source, PDFDocument):
+        yield source
+        return
+    with PDFDocument(source) as doc:
+        yield doc
+
+
+def source_path(source: PDFSource) -> Path:
+    return source.path if isinstance(source, PDFDocument) else Path(source)
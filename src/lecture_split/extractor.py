@@ -1,20 +1,92 @@
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterator
 
-import fitz
-
+from lecture_split.document import PDFDocument, PDFSource, opened, source_path
+from lecture_split.instrumentation import timed
 from lecture_split.models import SlideText
+from lecture_split.store import ExtractionStore, file_hash
+
+# Below this many pages, process pool startup and re-opening the document in
+# every worker costs more than extracting serially.
+PARALLEL_MIN_PAGES = 200
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int, outline: bool = False) -> list[SlideText]:
+    """Extract pages [start, stop) (0-indexed); runs in a worker process."""
+    with PDFDocument(pdf_path) as doc:
+        return list(doc.iter_slide_texts(outline, start, stop))
+
+
+def _iter_pages(source: PDFSource, outline: bool = False) -> Iterator[SlideText]:
+    with opened(source) as doc:
+        yield from doc.iter_slide_texts(outline)
+
+
+def _check_exists(source: PDFSource) -> None:
+    if not isinstance(source, PDFDocument) and not Path(source).exists():
+        raise FileNotFoundError(f"PDF not found: {source}")
+
 
+def iter_slide_texts(pdf: PDFSource, *, outline: bool = False) -> Iterator[SlideText]:
+    """Lazily yield the text of each page, holding only one page's text at a time.
 
-def extract_slide_texts(pdf_path: Path) -> list[SlideText]:
-    """Extract text content from each page of a PDF."""
-    pdf_path = Path(pdf_path)
-    if not pdf_path.exists():
-        raise FileNotFoundError(f"PDF not found: {pdf_path}")
+    ``pdf`` is a path or an open PDFDocument, as for extract_slide_texts().
+    """
+    _check_exists(pdf)
+    return _iter_pages(pdf, outline)
 
-    doc = fitz.open(str(pdf_path))
-    slides = []
-    for i, page in enumerate(doc):
-        text = page.get_text().strip()
-        slides.append(SlideText(page_number=i + 1, text=text))
-    doc.close()
+
+@timed("extract")
+def extract_slide_texts(
+    pdf: PDFSource,
+    *,
+    workers: int = 1,
+    outline: bool = False,
+    store: ExtractionStore | None = None,
+) -> list[SlideText]:
+    """Extract text content from each page of a PDF.
+
+    ``pdf`` is a path, or a PDFDocument to reuse a document that is already
+    open (and its content hash) instead of parsing the file again.
+
+    With a ``store``, pages extracted earlier from a PDF with the same
+    content are read back from it instead, and new extractions are added.
+
+    With ``outline``, each slide's text is only its title and first-level
+    bullets (see outline.page_outline), which is usually enough to find
+    section boundaries at a fraction of the prompt size.
+
+    With ``workers`` > 1, documents of at least PARALLEL_MIN_PAGES pages are
+    sharded into page ranges that are extracted in separate processes, each
+    opening the document on its own. Results are always in page order.
+    """
+    _check_exists(pdf)
+    if store is None:
+        return _extract(pdf, workers, outline)
+
+    digest = pdf.sha256 if isinstance(pdf, PDFDocument) else file_hash(pdf)
+    mode = "outline" if outline else "text"
+    slides = store.get(digest, mode)
+    if slides is None:
+        slides = _extract(pdf, workers, outline)
+        store.put(digest, slides, mode)
     return slides
+
+
+def _extract(pdf: PDFSource, workers: int, outline: bool) -> list[SlideText]:
+    with opened(pdf) as doc:
+        page_count = doc.page_count
+        if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+            return list(doc.iter_slide_texts(outline))
+    pdf_path = source_path(pdf)
+
+    # A few shards per worker evens out pages that are much slower than others.
+    shard_size = -(-page_count // (workers * 4))
+    starts = range(0, page_count, shard_size)
+    stops = [min(start + shard_size, page_count) for start in starts]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        shards = pool.map(
+            _extract_page_range, [str(pdf_path)] * len(stops), starts, stops, [outline] * len(stops)
+        )
+        return [slide for shard in shards for slide in shard]
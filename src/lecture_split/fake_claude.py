@@ -0,0 +1,111 @@
+"""Deterministic stand-in for the ``claude`` CLI, for benchmarks and tests.
+
+It reads the section-detection prompt from stdin, counts the ``--- SLIDE n ---``
+markers, waits for a configurable latency and prints a plan that groups the
+slides into fixed-size sections. install() puts an executable ``claude`` shim
+into a directory so it can be placed in front of the real CLI on PATH. With
+``--output-format stream-json`` it answers with stream-json events instead,
+one text delta per section, spreading the latency over the sections. If
+FAKE_CLAUDE_LOG names a file, each call appends the first line of its first
+slide's text to it, so tests can count calls across processes.
+"""
+import json
+import os
+import re
+import stat
+import sys
+import time
+from pathlib import Path
+
+DEFAULT_SECTION_SIZE = 8
+
+_SLIDE_MARKER = re.compile(r"^--- SLIDE (\d+) ---$", re.MULTILINE)
+
+
+def fake_plan(prompt: str, section_size: int = DEFAULT_SECTION_SIZE) -> dict:
+    """Return the plan the fake CLI answers with for ``prompt``."""
+    count = len(_SLIDE_MARKER.findall(prompt))
+    sections = [
+        {
+            "title": f"Section {i + 1}",
+            "start_page": start,
+            "end_page": min(start + section_size - 1, count),
+            "summary": f"Slides {start} to {min(start + section_size - 1, count)}.",
+        }
+        for i, start in enumerate(range(1, count + 1, section_size))
+    ]
+    return {"lecture_title": "Synthetic Lecture", "sections": sections}
+
+
+def _stream_json(plan: dict, latency: float) -> None:
+    """Print ``plan`` as the CLI's stream-json events, one text delta per section."""
+    pieces = [json.dumps({"lecture_title": plan["lecture_title"]})[:-1] + ', "sections": [']
+    for i, section in enumerate(plan["sections"]):
+        pieces[-1] += ("" if i == 0 else ", ") + json.dumps(section)[:-1]
+        pieces.append("}")  # the closing brace arrives with the next delta
+    pieces[-1] += "]}"
+
+    def event(data: dict) -> None:
+        sys.stdout.write(json.dumps(data) + "\n")
+        sys.stdout.flush()
+
+    event({"type": "system", "subtype": "init"})
+    for piece in pieces:
+        time.sleep(latency / len(pieces))
+        event({
+            "type": "stream_event",
+            "event": {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}},
+        })
+    text = "".join(pieces)
+    event({"type": "assistant", "message": {"content": [{"type": "text", "text": text}]}})
+    event({"type": "result", "subtype": "success", "is_error": False, "result": text})
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    latency = float(os.environ.get("FAKE_CLAUDE_LATENCY", "0"))
+    section_size = int(os.environ.get("FAKE_CLAUDE_SECTION_SIZE", DEFAULT_SECTION_SIZE))
+    prompt = sys.stdin.read()
+    log = os.environ.get("FAKE_CLAUDE_LOG")
+    if log:
+        marker = _SLIDE_MARKER.search(prompt)
+        first = prompt[marker.end():].strip().partition("\n")[0] if marker else ""
+        with open(log, "a") as f:  # one short append per call, so lines do not interleave
+            f.write(first + "\n")
+    if "stream-json" in argv:
+        _stream_json(fake_plan(prompt, section_size), latency)
+        return 0
+    time.sleep(latency)
+    sys.stdout.write(json.dumps(fake_plan(prompt, section_size)) + "\n")
+    return 0
+
+
+def install(
+    bin_dir: Path,
+    *,
+    latency: float = 0.0,
+    section_size: int = DEFAULT_SECTION_SIZE,
+) -> Path:
+    """Write an executable ``claude`` into ``bin_dir`` and return its path.
+
+    The latency and section size are baked in as defaults; FAKE_CLAUDE_LATENCY
+    and FAKE_CLAUDE_SECTION_SIZE in the environment still override them.
+    """
+    bin_dir = Path(bin_dir)
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    path = bin_dir / "claude"
+    path.write_text(
+        f"#!{sys.executable}\n"
+        "import os, sys\n"
+        f"sys.path.insert(0, {str(Path(__file__).resolve().parent.parent)!r})\n"
+        f"os.environ.setdefault('FAKE_CLAUDE_LATENCY', {str(latency)!r})\n"
+        f"os.environ.setdefault('FAKE_CLAUDE_SECTION_SIZE', {str(section_size)!r})\n"
+        "from lecture_split.fake_claude import main\n"
+        "sys.exit(main())\n"
+    )
+    path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+if __name__ == "__main__":
+    sys.exit(main())
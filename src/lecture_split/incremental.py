@@ -0,0 +1,160 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Callable
+
+from lecture_split.cache import normalize_text
+from lecture_split.models import LecturePlan, Section, SlideText
+
+STATE_FILE = "fingerprints.json"
+STATE_VERSION = 1
+
+
+def page_fingerprint(text: str) -> str:
+    """Fingerprint a page by its whitespace-normalized text."""
+    return hashlib.sha1(normalize_text(text).encode()).hexdigest()
+
+
+def _section_signature(fingerprints: list[str], section: Section) -> str:
+    """Identify a section PDF by the pages it contains."""
+    pages = fingerprints[section.start_page - 1:section.end_page]
+    return hashlib.sha1("".join(pages).encode()).hexdigest()
+
+
+@dataclass
+class OutputState:
+    """What an output directory was built from, stored next to manifest.md."""
+    fingerprints: list[str]
+    plan: LecturePlan
+    section_signatures: list[str] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, slides: list[SlideText], plan: LecturePlan) -> "OutputState":
+        fingerprints = [page_fingerprint(s.text) for s in slides]
+        return cls(
+            fingerprints=fingerprints,
+            plan=plan,
+            section_signatures=[_section_signature(fingerprints, s) for s in plan.sections],
+        )
+
+    def save(self, output_dir: Path) -> Path:
+        path = Path(output_dir) / STATE_FILE
+        path.write_text(json.dumps({
+            "version": STATE_VERSION,
+            "fingerprints": self.fingerprints,
+            "section_signatures": self.section_signatures,
+            "plan": self.plan.to_dict(),
+        }))
+        return path
+
+    @classmethod
+    def load(cls, output_dir: Path) -> "OutputState | None":
+        """Return the saved state, or None if there is none or it is unreadable."""
+        try:
+            data = json.loads((Path(output_dir) / STATE_FILE).read_text())
+            if data.get("version") != STATE_VERSION:
+                return None
+            return cls(
+                fingerprints=data["fingerprints"],
+                plan=LecturePlan.from_dict(data["plan"]),
+                section_signatures=data["section_signatures"],
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def discard(output_dir: Path) -> None:
+        """Remove the saved state, e.g. after a run that rewrote the output without fingerprints."""
+        (Path(output_dir) / STATE_FILE).unlink(missing_ok=True)
+
+
+@dataclass
+class IncrementalUpdate:
+    plan: LecturePlan
+    # (start_page, end_page) ranges in the new deck that were sent to detection.
+    redetected: list[tuple[int, int]]
+
+
+def update_plan(
+    state: OutputState,
+    slides: list[SlideText],
+    detect: Callable[[list[SlideText]], LecturePlan],
+) -> IncrementalUpdate:
+    """Carry an existing plan over to a revised deck, re-detecting only what changed.
+
+    Old and new pages are aligned by fingerprint. Sections with no changed or
+    deleted pages and no insertions at their edges keep their title, summary
+    and (shifted) page range. Each run of remaining pages is renumbered from 1,
+    passed to ``detect``, and the result is spliced in.
+    """
+    old_section = []
+    for i, s in enumerate(state.plan.sections):
+        old_section.extend([i] * (s.end_page - s.start_page + 1))
+    if len(old_section) != len(state.fingerprints):
+        # The saved plan does not match its own deck; start from scratch.
+        return IncrementalUpdate(plan=detect(slides), redetected=[(1, len(slides))])
+
+    new_fps = [page_fingerprint(s.text) for s in slides]
+    label: list[int | None] = [None] * len(slides)
+    dirty: set[int] = set()
+    matcher = SequenceMatcher(None, state.fingerprints, new_fps, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            label[j1:j2] = old_section[i1:i2]
+        elif i1 < i2:
+            dirty.update(old_section[i1:i2])
+        else:
+            # Inserted pages could belong to the section on either side.
+            dirty.update(old_section[max(i1 - 1, 0):i1 + 1])
+
+    # Group new pages into kept sections (same clean old label) and dirty runs.
+    runs: list[tuple[int | None, int, int]] = []  # (old section or None, start, end)
+    for j, old in enumerate(label):
+        key = None if old is None or old in dirty else old
+        if runs and runs[-1][0] == key:
+            runs[-1] = (key, runs[-1][1], j + 1)
+        else:
+            runs.append((key, j + 1, j + 1))
+
+    sections = []
+    redetected = []
+    for old, start, end in runs:
+        if old is not None:
+            s = state.plan.sections[old]
+            sections.append(Section(s.title, start, end, s.summary))
+            continue
+        window = [SlideText(i + 1, s.text) for i, s in enumerate(slides[start - 1:end])]
+        sections.extend(detect(window).shifted(start - 1).sections)
+        redetected.append((start, end))
+
+    return IncrementalUpdate(
+        plan=LecturePlan(lecture_title=state.plan.lecture_title, sections=sections),
+        redetected=redetected,
+    )
+
+
+def changed_sections(state: OutputState | None, new_state: OutputState, output_dir: Path) -> list[int]:
+    """Return indices of sections whose section-XX.pdf must be (re)written."""
+    output_dir = Path(output_dir)
+    old = state.section_signatures if state is not None else []
+    return [
+        i for i, sig in enumerate(new_state.section_signatures)
+        if i >= len(old) or old[i] != sig
+        or not (output_dir / f"section-{i + 1:02d}.pdf").exists()
+    ]
+
+
+def remove_stale_sections(output_dir: Path, section_count: int) -> list[Path]:
+    """Delete section-XX files left over from a previous run with more sections."""
+    removed = []
+    for path in sorted(Path(output_dir).glob("section-*.*")):
+        try:
+            number = int(path.stem.split("-", 1)[1])
+        except ValueError:
+            continue
+        if number > section_count and path.suffix in (".pdf", ".md"):
+            path.unlink()
+            removed.append(path)
+    return removed
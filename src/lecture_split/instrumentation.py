@@ -0,0 +1,162 @@
+import functools
+import json
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable
+
+# A hook receives (event, data) for every metric the pipeline emits:
+#   "stage"          name, wall_s, cpu_s, max_rss_kb
+#   "prompt"         chars, tokens
+#   "claude_call"    model, duration_s, outcome, hedge
+#   "plan_cache"     hit
+#   "plan_repair"    issues, redetected
+#   "section_output" index, bytes
+Hook = Callable[[str, dict], None]
+
+_hooks: list[Hook] = []
+_hooks_lock = threading.Lock()
+
+
+def add_hook(hook: Hook) -> None:
+    """Register ``hook`` to receive every metric event, from any thread."""
+    with _hooks_lock:
+        _hooks.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    with _hooks_lock:
+        _hooks.remove(hook)
+
+
+def enabled() -> bool:
+    """Whether anyone is listening; lets callers skip measuring entirely."""
+    return bool(_hooks)
+
+
+def emit(event: str, **data) -> None:
+    for hook in list(_hooks):
+        hook(event, data)
+
+
+def max_rss_kb() -> int:
+    """Peak resident set size of this process so far, in KiB."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+@contextmanager
+def stage(name: str):
+    """Emit a "stage" event with the wall time, CPU time and RSS high-water mark of the block.
+
+    CPU time is for the whole process, so it includes other threads that run
+    concurrently with the stage.
+    """
+    if not _hooks:
+        yield
+        return
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        emit(
+            "stage",
+            name=name,
+            wall_s=time.perf_counter() - wall,
+            cpu_s=time.process_time() - cpu,
+            max_rss_kb=max_rss_kb(),
+        )
+
+
+def timed(name: str):
+    """Decorator form of stage()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TimingsRecorder:
+    """Collect emitted events while active; use as a context manager.
+
+    >>> with TimingsRecorder() as timings:
+    ...     run_pipeline()
+    >>> print(timings.format())
+    """
+
+    def __init__(self):
+        self.events: list[tuple[str, dict]] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, event: str, data: dict) -> None:
+        with self._lock:
+            self.events.append((event, data))
+
+    def __enter__(self) -> "TimingsRecorder":
+        add_hook(self)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        remove_hook(self)
+
+    def _of(self, event: str) -> list[dict]:
+        return [data for name, data in self.events if name == event]
+
+    def report(self) -> dict:
+        """Return everything recorded as a JSON-serializable dict."""
+        stages: dict[str, dict] = {}
+        for s in self._of("stage"):
+            total = stages.setdefault(s["name"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "max_rss_kb": 0})
+            total["calls"] += 1
+            total["wall_s"] += s["wall_s"]
+            total["cpu_s"] += s["cpu_s"]
+            total["max_rss_kb"] = max(total["max_rss_kb"], s["max_rss_kb"])
+        prompts = self._of("prompt")
+        sections = self._of("section_output")
+        return {
+            "stages": stages,
+            "prompt": {
+                "chars": sum(p["chars"] for p in prompts),
+                "tokens": sum(p["tokens"] for p in prompts),
+            },
+            "claude_calls": self._of("claude_call"),
+            "plan_cache": self._of("plan_cache"),
+            "plan_repairs": self._of("plan_repair"),
+            "sections": sections,
+            "output_bytes": sum(s["bytes"] for s in sections),
+            "max_rss_kb": max_rss_kb(),
+        }
+
+    def write_json(self, path: Path) -> None:
+        Path(path).write_text(json.dumps(self.report(), indent=2) + "\n")
+
+    def format(self) -> str:
+        """Human-readable summary for the --timings flag."""
+        report = self.report()
+        lines = [f"  {'stage':<12} {'calls':>5} {'wall s':>8} {'cpu s':>8} {'max RSS MB':>11}"]
+        for name, s in report["stages"].items():
+            lines.append(
+                f"  {name:<12} {s['calls']:>5} {s['wall_s']:>8.3f} {s['cpu_s']:>8.3f} "
+                f"{s['max_rss_kb'] / 1024:>11.1f}"
+            )
+        if report["prompt"]["chars"]:
+            lines.append(
+                f"  prompt: {report['prompt']['chars']} chars, ~{report['prompt']['tokens']} tokens"
+            )
+        for call in report["claude_calls"]:
+            lines.append(f"  claude ({call['model']}): {call['duration_s']:.2f}s, {call['outcome']}")
+        for repair in report["plan_repairs"]:
+            lines.append(
+                f"  plan repaired: {len(repair['issues'])} issue(s), "
+                f"{len(repair['redetected'])} range(s) re-detected"
+            )
+        if report["sections"]:
+            sizes = ", ".join(f"{s['bytes'] / 1024:.0f}" for s in report["sections"])
+            lines.append(f"  section PDFs (KB): {sizes}")
+        return "\n".join(lines)
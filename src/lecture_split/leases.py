@@ -0,0 +1,198 @@
+"""Claim PDFs through lease files, so workers on several hosts can share one corpus.
+
+Each output (``<pdf_name>_sections`` or ``.zip``) has a lease file in a
+``.lecture-split-leases`` directory next to it. A worker creates the lease
+with O_CREAT | O_EXCL, which succeeds for exactly one worker even on NFS
+(v3 and later), and renews it while it works. A lease that is not renewed
+before it expires, e.g. because its host crashed, is broken by renaming it
+away (again atomic, so only one worker wins) and can then be claimed anew.
+Expiry times are wall-clock times, so hosts need roughly synchronized clocks.
+"""
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+LEASE_DIR = ".lecture-split-leases"
+DEFAULT_LEASE_TTL = 600.0
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """Parse ``I/N`` (1 <= I <= N) into (I, N)."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"expected I/N, e.g. 2/4, got {value!r}") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"shard {index}/{count} out of range; I must be between 1 and N")
+    return index, count
+
+
+def in_shard(pdf_path: Path, shard: tuple[int, int]) -> bool:
+    """Whether ``pdf_path`` belongs to shard I of N.
+
+    Files are assigned by a hash of their name, so every host computes the
+    same partition without coordination, even if it lists the files in a
+    different order or sees files added later.
+    """
+    index, count = shard
+    digest = hashlib.sha1(Path(pdf_path).name.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count == index - 1
+
+
+def lease_path_for(output: Path) -> Path:
+    output = Path(output)
+    return output.parent / LEASE_DIR / f"{output.name}.lease"
+
+
+@dataclass
+class Lease:
+    path: Path
+    token: str
+    expires: float
+
+
+class LeaseManager:
+    """Claims, renews and releases lease files on behalf of one worker.
+
+    While at least one lease is held, a background thread renews every held
+    lease each ``ttl / 3`` seconds. Call close() (or use a with block) to
+    stop it and release everything still held.
+    """
+
+    def __init__(self, *, ttl: float = DEFAULT_LEASE_TTL, owner: str | None = None):
+        self.ttl = ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self._held: dict[Path, Lease] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat: threading.Thread | None = None
+
+    def __enter__(self) -> "LeaseManager":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _content(self, lease: Lease) -> str:
+        return json.dumps({"owner": self.owner, "token": lease.token, "expires": lease.expires})
+
+    @staticmethod
+    def _read(path: Path) -> dict | None:
+        try:
+            return json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            return {}  # being written right now, or garbage; see _break_if_expired
+
+    def claim(self, path: Path) -> Lease | None:
+        """Take the lease at ``path``; return None if another worker holds it."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        for _ in range(2):
+            lease = Lease(path, uuid.uuid4().hex, time.time() + self.ttl)
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                if not self._break_if_expired(path):
+                    return None
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(self._content(lease))
+            with self._lock:
+                self._held[path] = lease
+                self._start_heartbeat()
+            return lease
+        return None
+
+    def _break_if_expired(self, path: Path) -> bool:
+        """Remove an expired lease; return whether the path is now free to claim."""
+        current = self._read(path)
+        if current is None:
+            return True
+        if current:
+            expires = current.get("expires", 0)
+        else:
+            # Empty or unparsable: a claimer that died mid-write leaves this
+            # behind, so let it expire a TTL after it was last written.
+            try:
+                expires = path.stat().st_mtime + self.ttl
+            except FileNotFoundError:
+                return True
+        if expires > time.time():
+            return False
+        stale = path.with_name(f"{path.name}.stale-{uuid.uuid4().hex}")
+        try:
+            os.rename(path, stale)
+        except FileNotFoundError:
+            return True  # another worker broke it first
+        if self._read(stale) != current:
+            # The lease was broken and re-taken between our read and our
+            # rename; put the new owner's lease back unless yet another
+            # worker has claimed the path in the meantime.
+            try:
+                os.link(stale, path)
+            except FileExistsError:
+                pass
+            stale.unlink(missing_ok=True)
+            return False
+        stale.unlink(missing_ok=True)
+        return True
+
+    def renew(self, lease: Lease) -> bool:
+        """Extend a held lease; return False if it was lost to another worker."""
+        current = self._read(lease.path)
+        if not current or current.get("token") != lease.token:
+            with self._lock:
+                self._held.pop(lease.path, None)
+            return False
+        lease.expires = time.time() + self.ttl
+        tmp = lease.path.with_name(f".{lease.path.name}.{lease.token}.tmp")
+        tmp.write_text(self._content(lease))
+        with self._lock:
+            if lease.path not in self._held:
+                # Released while we were writing; do not bring the lease back.
+                tmp.unlink(missing_ok=True)
+                return False
+            os.replace(tmp, lease.path)
+        return True
+
+    def owns(self, lease: Lease) -> bool:
+        current = self._read(lease.path)
+        return bool(current) and current.get("token") == lease.token
+
+    def release(self, lease: Lease) -> None:
+        with self._lock:
+            self._held.pop(lease.path, None)
+        if self.owns(lease):
+            lease.path.unlink(missing_ok=True)
+
+    def _start_heartbeat(self) -> None:
+        if self._heartbeat is None:
+            self._heartbeat = threading.Thread(target=self._renew_all, name="lease-heartbeat", daemon=True)
+            self._heartbeat.start()
+
+    def _renew_all(self) -> None:
+        while not self._stop.wait(self.ttl / 3):
+            with self._lock:
+                held = list(self._held.values())
+            for lease in held:
+                try:
+                    self.renew(lease)
+                except OSError:
+                    pass  # e.g. a transient NFS error; the next beat retries
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+        with self._lock:
+            held = list(self._held.values())
+        for lease in held:
+            self.release(lease)
@@ -1,4 +1,4 @@
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 
 
 @dataclass
@@ -19,3 +19,29 @@ class Section:
 class LecturePlan:
     lecture_title: str
     sections: list[Section] = field(default_factory=list)
+
+    def shifted(self, offset: int) -> "LecturePlan":
+        """Return a copy with every page number moved by ``offset``."""
+        return LecturePlan(
+            lecture_title=self.lecture_title,
+            sections=[
+                Section(s.title, s.start_page + offset, s.end_page + offset, s.summary)
+                for s in self.sections
+            ],
+        )
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LecturePlan":
+        sections = [
+            Section(
+                title=s["title"],
+                start_page=s["start_page"],
+                end_page=s["end_page"],
+                summary=s["summary"],
+            )
+            for s in data["sections"]
+        ]
+        return cls(lecture_title=data["lecture_title"], sections=sections)
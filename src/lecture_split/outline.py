@@ -0,0 +1,91 @@
+import statistics
+
+import fitz
+
+from lecture_split.compaction import ELLIPSIS
+
+# A line counts as (part of) the slide title when its font is at least this
+# much larger than the page's typical body text.
+TITLE_SIZE_RATIO = 1.15
+
+# Lines in a font this much smaller than the body text are footers, captions
+# or slide numbers and are left out of the outline.
+MIN_BODY_SIZE_RATIO = 0.85
+
+# Lines starting within this many points of the leftmost body line are
+# first-level bullets; anything further right is a sub-bullet.
+INDENT_TOLERANCE = 6.0
+
+MAX_BULLETS = 8
+MAX_LINE_CHARS = 120
+
+BULLET_GLYPHS = "•·▪■◦●○-–—*►▸➢✓"
+
+
+def _lines(page: fitz.Page) -> list[dict]:
+    """Return the page's text lines in reading order with their font size and indent."""
+    lines = []
+    for block in page.get_text("dict", sort=True)["blocks"]:
+        for i, line in enumerate(block.get("lines", [])):
+            text = " ".join("".join(span["text"] for span in line["spans"]).split())
+            if not text:
+                continue
+            lines.append({
+                "text": text,
+                "size": max(span["size"] for span in line["spans"]),
+                "x0": line["bbox"][0],
+                "first_in_block": i == 0,
+            })
+    return lines
+
+
+def _shorten(text: str) -> str:
+    if len(text) <= MAX_LINE_CHARS:
+        return text
+    return text[:MAX_LINE_CHARS - len(ELLIPSIS)].rstrip() + ELLIPSIS
+
+
+def page_outline(page: fitz.Page) -> str:
+    """Return a slide's title and first-level bullets, one per line.
+
+    The title is the run of text set noticeably larger than the body (or the
+    first line, on slides with a single font size). Bullets are body lines at
+    the leftmost indent; sub-bullets, wrapped continuation lines and small
+    print such as footers are dropped.
+    """
+    lines = _lines(page)
+    if not lines:
+        return ""
+
+    # Weight by characters so that a large one-line title does not pull the
+    # body size up.
+    body_size = statistics.median_high(
+        [line["size"] for line in lines for _ in range(len(line["text"]))]
+    )
+    largest = max(line["size"] for line in lines)
+    if largest >= body_size * TITLE_SIZE_RATIO:
+        title_lines = [line for line in lines if line["size"] >= largest / TITLE_SIZE_RATIO]
+    else:
+        title_lines = lines[:1]
+
+    in_title = {id(line) for line in title_lines}
+    body = [
+        line for line in lines
+        if id(line) not in in_title and line["size"] >= body_size * MIN_BODY_SIZE_RATIO
+    ]
+    bullets = []
+    if body:
+        indent = min(line["x0"] for line in body)
+        for line in body:
+            if line["x0"] > indent + INDENT_TOLERANCE:
+                continue
+            # A line inside a block that starts in lowercase is most likely the
+            # wrapped tail of the previous bullet.
+            if line["first_in_block"] or not line["text"][0].islower():
+                bullets.append(line["text"].lstrip(BULLET_GLYPHS).strip())
+            if len(bullets) == MAX_BULLETS:
+                break
+
+    outline = [_shorten(" ".join(line["text"] for line in title_lines))]
+    outline.extend(f"- {_shorten(b)}" for b in bullets if b)
+    return "\n".join(outline)
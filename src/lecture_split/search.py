@@ -0,0 +1,349 @@
+"""Course-wide search over split lectures.
+
+    lecture-split index course_sections/        # add new or changed outputs
+    lecture-split search "backpropagation"      # ranked sections with slide ranges
+
+SearchIndex keeps an inverted index in a single SQLite file: one posting per
+(term, section) with the term's field-weighted frequency, so a query reads
+only the postings of its own terms and ranks them with BM25. Sections are
+indexed from the plan.json (titles and summaries) and the section PDFs
+(slide text) of each output directory or bundle. Re-indexing skips outputs
+whose files have not changed since they were last indexed.
+"""
+import hashlib
+import heapq
+import math
+import re
+import sqlite3
+import threading
+import zipfile
+from collections import Counter
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+
+import fitz
+
+from lecture_split.artifacts import PLAN_FILE, load_plan
+from lecture_split.bundle import Bundle
+from lecture_split.cache import cache_root
+from lecture_split.models import LecturePlan
+from lecture_split.texttiling import STOPWORDS
+
+# Bump when the schema or the tokenization changes.
+INDEX_VERSION = 1
+
+INDEX_FILE = "search.sqlite3"
+
+# BM25 parameters, and how much a term counts in each field of a section.
+K1 = 1.2
+B = 0.75
+FIELD_WEIGHTS = {"title": 3.0, "summary": 2.0, "text": 1.0}
+
+_WORD = re.compile(r"\w+")
+
+# texttiling's stopwords, plus the short ones it never sees.
+_STOPWORDS = STOPWORDS | {
+    "an", "as", "at", "be", "by", "do", "if", "in", "is", "it", "of", "on", "or", "so", "to", "up", "we",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outputs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    signature TEXT NOT NULL,
+    lecture_title TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    output_id INTEGER NOT NULL,
+    number INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    start_page INTEGER NOT NULL,
+    end_page INTEGER NOT NULL,
+    length REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sections_output ON sections (output_id);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    section_id INTEGER NOT NULL,
+    weight REAL NOT NULL,
+    PRIMARY KEY (term, section_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_section ON postings (section_id);
+"""
+
+
+def default_index_path() -> Path:
+    """Return search.sqlite3 in cache_root()."""
+    return cache_root() / INDEX_FILE
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase words of two or more characters, without stopwords and plural s."""
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        if len(word) < 2 or word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def _is_bundle(path: Path) -> bool:
+    """Whether ``path`` is a zip file with a plan.json, as written by write_bundle()."""
+    if not path.is_file() or not zipfile.is_zipfile(path):
+        return False
+    try:
+        with zipfile.ZipFile(path) as zf:
+            return PLAN_FILE in zf.namelist()
+    except (OSError, zipfile.BadZipFile):
+        return False
+
+
+def _is_output(path: Path) -> bool:
+    return (path / PLAN_FILE).is_file() or _is_bundle(path)
+
+
+def find_outputs(paths: Iterable[Path]) -> list[Path]:
+    """Expand ``paths`` into output directories (with a plan.json) and bundle files.
+
+    A directory that is not an output itself, such as a batch's output
+    root, contributes the outputs directly inside it. Other files, such
+    as the source PDFs or unrelated zips, are left out.
+    """
+    found = []
+    for path in paths:
+        path = Path(path)
+        if _is_output(path):
+            found.append(path)
+        elif path.is_dir():
+            found.extend(sorted(p for p in path.iterdir() if _is_output(p)))
+    return found
+
+
+def _signature(output: Path) -> str:
+    """A digest that changes whenever the files of an output are rewritten."""
+    h = hashlib.sha256()
+    files = [output] if output.is_file() else sorted(output.glob("section-*.pdf")) + [output / PLAN_FILE]
+    for path in files:
+        stat = path.stat()
+        h.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def _pdf_text(doc: fitz.Document) -> str:
+    try:
+        return "\n".join(page.get_text() for page in doc)
+    finally:
+        doc.close()
+
+
+def _read_output(output: Path) -> tuple[LecturePlan, list[str]]:
+    """Return an output's plan and the slide text of each of its sections."""
+    if output.is_file():
+        with Bundle(output) as bundle:
+            texts = [
+                _pdf_text(fitz.open(stream=bundle.section_pdf(n), filetype="pdf"))
+                for n in range(1, len(bundle) + 1)
+            ]
+            return bundle.plan, texts
+    plan, _ = load_plan(output)
+    texts = []
+    for n in range(1, len(plan.sections) + 1):
+        pdf_path = output / f"section-{n:02d}.pdf"
+        texts.append(_pdf_text(fitz.open(str(pdf_path))) if pdf_path.is_file() else "")
+    return plan, texts
+
+
+@dataclass
+class IndexUpdate:
+    """What SearchIndex.update() did."""
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    sections: int = 0  # sections (re)indexed
+    failed: dict[Path, str] = field(default_factory=dict)  # unreadable outputs, left as they were
+
+
+@dataclass
+class SearchHit:
+    score: float
+    output: Path
+    lecture_title: str
+    number: int  # 1-based section number, as in section-XX.pdf
+    title: str
+    summary: str
+    start_page: int
+    end_page: int
+
+    @property
+    def section_pdf(self) -> str:
+        name = f"section-{self.number:02d}.pdf"
+        return f"{self.output}:{name}" if self.output.suffix == ".zip" else str(self.output / name)
+
+
+class SearchIndex:
+    """Single-file SQLite inverted index of sections, ranked with BM25.
+
+    Like ExtractionStore, safe to share between threads and processes;
+    every call uses its own connection.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = Path(path) if path is not None else default_index_path()
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        with self._lock:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                if conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+                    conn.executescript(
+                        "DROP TABLE IF EXISTS postings; DROP TABLE IF EXISTS sections;"
+                        "DROP TABLE IF EXISTS outputs;"
+                        f"{_SCHEMA} PRAGMA user_version = {INDEX_VERSION};"
+                    )
+                self._initialized = True
+        return conn
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, output_id: int) -> None:
+        conn.execute(
+            "DELETE FROM postings WHERE section_id IN (SELECT id FROM sections WHERE output_id = ?)",
+            (output_id,),
+        )
+        conn.execute("DELETE FROM sections WHERE output_id = ?", (output_id,))
+        conn.execute("DELETE FROM outputs WHERE id = ?", (output_id,))
+
+    def update(self, outputs: Iterable[Path]) -> IndexUpdate:
+        """Index new and changed ``outputs``; drop outputs that no longer exist on disk.
+
+        An output that cannot be read, such as a truncated bundle or a
+        damaged section PDF, is recorded in ``failed`` and skipped.
+        """
+        result = IndexUpdate()
+        with closing(self._connect()) as conn:
+            known = {path: (id_, sig) for id_, path, sig in conn.execute("SELECT id, path, signature FROM outputs")}
+            for path, (output_id, _) in known.items():
+                if not Path(path).exists():
+                    conn.execute("BEGIN IMMEDIATE")
+                    self._delete(conn, output_id)
+                    conn.execute("COMMIT")
+                    result.removed += 1
+
+            for output in outputs:
+                output = Path(output).resolve()
+                try:
+                    signature = _signature(output)
+                    previous = known.get(str(output))
+                    if previous is not None and previous[1] == signature:
+                        result.unchanged += 1
+                        continue
+                    plan, texts = _read_output(output)
+                except (OSError, ValueError, KeyError, RuntimeError, zipfile.BadZipFile) as exc:
+                    # ArtifactError is a ValueError; PyMuPDF raises RuntimeErrors.
+                    result.failed[output] = str(exc) or type(exc).__name__
+                    continue
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if previous is not None:
+                        self._delete(conn, previous[0])
+                    result.sections += self._insert(conn, output, signature, plan, texts)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                if previous is None:
+                    result.added += 1
+                else:
+                    result.updated += 1
+        return result
+
+    @staticmethod
+    def _insert(
+        conn: sqlite3.Connection, output: Path, signature: str, plan: LecturePlan, texts: list[str]
+    ) -> int:
+        output_id = conn.execute(
+            "INSERT INTO outputs (path, signature, lecture_title) VALUES (?, ?, ?)",
+            (str(output), signature, plan.lecture_title),
+        ).lastrowid
+        for number, (section, text) in enumerate(zip(plan.sections, texts), start=1):
+            weights: Counter[str] = Counter()
+            for field, value in (("title", section.title), ("summary", section.summary), ("text", text)):
+                for term in tokenize(value):
+                    weights[term] += FIELD_WEIGHTS[field]
+            section_id = conn.execute(
+                "INSERT INTO sections (output_id, number, title, summary, start_page, end_page, length)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (output_id, number, section.title, section.summary,
+                 section.start_page, section.end_page, sum(weights.values())),
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO postings (term, section_id, weight) VALUES (?, ?, ?)",
+                [(term, section_id, weight) for term, weight in weights.items()],
+            )
+        return len(plan.sections)
+
+    def search(self, query: str, *, limit: int = 10) -> list[SearchHit]:
+        """Return the ``limit`` best sections for ``query``, best first.
+
+        A query word ending in ``*`` matches every indexed term it is a
+        prefix of, e.g. ``backprop*``.
+        """
+        with closing(self._connect()) as conn:
+            count, total_length = conn.execute("SELECT COUNT(*), SUM(length) FROM sections").fetchone()
+            if not count:
+                return []
+            average = (total_length or 0) / count or 1.0
+            scores: Counter[int] = Counter()
+            for term in self._expand(conn, query):
+                postings = conn.execute(
+                    "SELECT p.section_id, p.weight, s.length FROM postings p"
+                    " JOIN sections s ON s.id = p.section_id WHERE p.term = ?",
+                    (term,),
+                ).fetchall()
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for section_id, weight, length in postings:
+                    norm = K1 * (1 - B + B * length / average)
+                    scores[section_id] += idf * weight * (K1 + 1) / (weight + norm)
+
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+            if not best:
+                return []
+            rows = {
+                row[0]: row[1:]
+                for row in conn.execute(
+                    "SELECT s.id, o.path, o.lecture_title, s.number, s.title, s.summary, s.start_page, s.end_page"
+                    " FROM sections s JOIN outputs o ON o.id = s.output_id"
+                    f" WHERE s.id IN ({','.join('?' * len(best))})",
+                    [section_id for section_id, _ in best],
+                )
+            }
+        return [
+            SearchHit(score, Path(rows[i][0]), *rows[i][1:])
+            for i, score in best
+        ]
+
+    @staticmethod
+    def _expand(conn: sqlite3.Connection, query: str) -> set[str]:
+        terms = set()
+        for word in query.split():
+            if word.endswith("*") and len(word) > 1:
+                prefix = word[:-1].lower()
+                terms.update(
+                    term for (term,) in conn.execute(
+                        "SELECT DISTINCT term FROM postings WHERE term >= ? AND term < ?",
+                        (prefix, prefix + "\U0010ffff"),
+                    )
+                )
+            else:
+                terms.update(tokenize(word))
+        return terms
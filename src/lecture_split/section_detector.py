@@ -1,8 +1,20 @@
 import json
 import re
 import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Iterable
 
-from lecture_split.models import SlideText, LecturePlan, Section
+from lecture_split import instrumentation
+from lecture_split.backends import Backend, BackendError, ClaudeCLIBackend
+from lecture_split.cache import PlanCache, PlanKeyHasher, plan_cache_key
+from lecture_split.compaction import CHARS_PER_TOKEN, estimate_tokens
+from lecture_split.models import SlideText, LecturePlan
+from lecture_split.streaming import OnSection, scan_sections
+from lecture_split.validation import repair_plan
 
 SYSTEM_PROMPT = """You are an expert at analyzing lecture slides. Given the text content of each slide, identify logical section boundaries and return a structured JSON response.
 
@@ -28,54 +40,312 @@ Rules:
 - The last section's end_page must equal the total number of slides"""
 
 
+# Base delay in seconds before the first retry; doubled for each further retry.
+DEFAULT_BACKOFF = 2.0
+
+# Failures worth another attempt: the backend erroring or hanging, or a reply
+# that is not a usable plan.
+_RETRYABLE = (
+    subprocess.CalledProcessError,
+    subprocess.TimeoutExpired,
+    TimeoutError,
+    BackendError,
+    ValueError,
+    KeyError,
+    TypeError,
+)
+
+
+@dataclass
+class Attempt:
+    """One claude invocation made by detect_sections()."""
+    model: str
+    started: float  # seconds since detect_sections() was called
+    duration: float = 0.0
+    outcome: str = "ok"  # ok, timeout, error, invalid or cancelled
+    hedge: bool = False
+    won: bool = False
+
+
+def _prompt_header(slide_count: int) -> str:
+    return f"Analyze these {slide_count} lecture slides and identify logical sections:\n\n"
+
+
+def _slide_block(slide: SlideText) -> str:
+    return f"--- SLIDE {slide.page_number} ---\n{slide.text.replace(chr(0), '')}"
+
+
+@instrumentation.timed("detect")
 def detect_sections(
-    slides: list[SlideText],
+    slides: Iterable[SlideText],
     *,
     model: str = "sonnet",
+    cache: PlanCache | None = None,
+    refresh: bool = False,
+    memory_budget: int | None = None,
+    timeout: float | None = None,
+    retries: int = 0,
+    backoff: float = DEFAULT_BACKOFF,
+    hedge_after: float | None = None,
+    hedge_model: str | None = None,
+    attempts: list[Attempt] | None = None,
+    backend: Backend | None = None,
+    repair: bool = True,
+    on_section: OnSection | None = None,
 ) -> LecturePlan:
-    """Use Claude CLI to identify logical section boundaries in lecture slides."""
+    """Use Claude to identify logical section boundaries in lecture slides.
+
+    Calls go through ``backend`` (see lecture_split.backends), by default a
+    ClaudeCLIBackend that runs the ``claude`` CLI.
+
+    If ``cache`` is given, a plan previously detected for identical slide text,
+    model and system prompt is returned without calling Claude. ``refresh``
+    skips the lookup but still stores the new plan.
+
+    With ``memory_budget`` (bytes), ``slides`` may be any iterable, e.g. from
+    iter_slide_texts(). It is consumed once into a spool file that stays in
+    memory up to the budget and spills to disk beyond it, and the prompt is
+    then sent to the backend in chunks, so memory use stays flat
+    regardless of deck size.
+
+    Each call is abandoned after ``timeout`` seconds. Failed, timed-out or
+    unparseable calls are retried up to ``retries`` times, sleeping
+    ``backoff`` seconds before the first retry and doubling after that. With
+    ``hedge_after``, a call that has not answered within that many seconds
+    gets a second, concurrent request (on ``hedge_model`` if given) and the
+    first valid plan wins; a plan won by ``hedge_model`` is not cached. Every
+    call is appended to ``attempts`` if given.
+
+    The returned plan always covers every slide exactly once (see
+    validation.repair_plan): small gaps and overlaps in Claude's answer are
+    fixed locally, and with ``repair`` larger ones are re-detected for just
+    the affected slide range and spliced in. In streaming mode every defect
+    is fixed locally.
+
+    With ``on_section``, Claude's reply is streamed (Backend.stream) and
+    ``on_section(index, section)`` is called for each section as soon as
+    Claude has finished writing it, e.g. to start splitting early. These
+    sections are provisional: a retry reports sections from index 0 again,
+    a plan from the cache reports none, and repairs are only visible in the
+    returned plan, which is the same as without ``on_section``.
+    """
+    if memory_budget is not None and hedge_after is not None:
+        raise ValueError("hedge_after cannot be combined with memory_budget")
+    if on_section is not None and (memory_budget is not None or hedge_after is not None):
+        raise ValueError("on_section cannot be combined with memory_budget or hedge_after")
+
+    backend = backend if backend is not None else ClaudeCLIBackend()
+    started = time.monotonic()
+
+    def attempt(run: Callable[[str], str], call_model: str, hedge: bool = False, cancelled=None):
+        record = Attempt(call_model, started=time.monotonic() - started, hedge=hedge)
+        if attempts is not None:
+            attempts.append(record)
+        try:
+            return _parse_plan(run(call_model)), record
+        except (subprocess.TimeoutExpired, TimeoutError):
+            record.outcome = "timeout"
+            raise
+        except (subprocess.CalledProcessError, BackendError):
+            record.outcome = "cancelled" if cancelled is not None and cancelled.is_set() else "error"
+            raise
+        except (ValueError, KeyError, TypeError):
+            record.outcome = "invalid"
+            raise
+        finally:
+            record.duration = time.monotonic() - started - record.started
+            instrumentation.emit(
+                "claude_call",
+                model=record.model,
+                duration_s=record.duration,
+                outcome=record.outcome,
+                hedge=record.hedge,
+            )
+
+    hedge_won = False
+
+    def call(run: Callable[[str], str], cancellable: Callable[[str, Callable], str] | None = None) -> LecturePlan:
+        nonlocal hedge_won
+        last_error = None
+        for n in range(retries + 1):
+            if n:
+                time.sleep(backoff * 2 ** (n - 1))
+            try:
+                if hedge_after is None:
+                    plan, record = attempt(run, model)
+                else:
+                    plan, record = _hedged(attempt, cancellable, model, hedge_model or model, hedge_after)
+            except _RETRYABLE as exc:
+                last_error = exc
+                continue
+            record.won = True
+            hedge_won = record.model != model
+            return plan
+        raise last_error
+
+    if memory_budget is not None:
+        return _detect_sections_streaming(
+            slides, model=model, cache=cache, refresh=refresh, memory_budget=memory_budget,
+            call=call, timeout=timeout, backend=backend,
+        )
+
+    slides = list(slides)
     if not slides:
         raise ValueError("Cannot detect sections from empty slide list")
 
-    slides_text = "\n\n".join(
-        f"--- SLIDE {s.page_number} ---\n{s.text.replace(chr(0), '')}"
-        for s in slides
-    )
+    key = None
+    if cache is not None:
+        key = plan_cache_key(slides, model=model, system_prompt=SYSTEM_PROMPT)
+        if not refresh:
+            cached = cache.get(key)
+            instrumentation.emit("plan_cache", hit=cached is not None)
+            if cached is not None:
+                return cached
 
-    user_prompt = (
-        f"Analyze these {len(slides)} lecture slides and identify logical sections:\n\n"
-        f"{slides_text}"
-    )
+    user_prompt = _prompt_header(len(slides)) + "\n\n".join(_slide_block(s) for s in slides)
+    instrumentation.emit("prompt", chars=len(user_prompt), tokens=estimate_tokens(user_prompt))
+
+    if on_section is not None:
+        def run(m: str) -> str:
+            return scan_sections(backend.stream(m, SYSTEM_PROMPT, user_prompt, timeout=timeout), on_section)
+    else:
+        def run(m: str) -> str:
+            return backend.complete(m, SYSTEM_PROMPT, user_prompt, timeout=timeout)
 
-    result = subprocess.run(
-        [
-            "claude",
-            "--print",
-            "--model", model,
-            "--system-prompt", SYSTEM_PROMPT,
-            "--output-format", "text",
-        ],
-        input=user_prompt,
-        capture_output=True,
-        text=True,
-        check=True,
+    plan = call(
+        run,
+        lambda m, register: backend.complete(m, SYSTEM_PROMPT, user_prompt, timeout=timeout, register=register),
     )
 
-    raw = result.stdout.strip()
+    def detect_range(start_page: int, end_page: int) -> LecturePlan:
+        return detect_slide_range(
+            slides, start_page, end_page, model=model, cache=cache, refresh=refresh,
+            timeout=timeout, retries=retries, backoff=backoff, hedge_after=hedge_after,
+            hedge_model=hedge_model, attempts=attempts, backend=backend, repair=False,
+        )
+
+    plan = _repaired(plan, len(slides), detect_range if repair else None)
+    # The key names the primary model; a plan from hedge_model does not belong under it.
+    if cache is not None and not hedge_won:
+        cache.put(key, plan)
+    return plan
+
+
+def _hedged(attempt, run_cancellable, model: str, hedge_model: str, hedge_after: float):
+    """Start a call; if it is still running after ``hedge_after`` seconds, race a
+    second one against it. Returns the first valid (plan, record) and cancels the other."""
+    cancels: list[Callable[[], None]] = []
+    cancelled = threading.Event()
+
+    def register(cancel: Callable[[], None]) -> None:
+        cancels.append(cancel)
+        if cancelled.is_set():
+            cancel()  # registered after the race was decided
+
+    def run(m):
+        return run_cancellable(m, register)
+
+    pool = ThreadPoolExecutor(max_workers=2)
+    try:
+        pending = {pool.submit(attempt, run, model, False, cancelled)}
+        done, _ = wait(pending, timeout=hedge_after)
+        if not done:
+            pending.add(pool.submit(attempt, run, hedge_model, True, cancelled))
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+    finally:
+        cancelled.set()
+        for cancel in cancels:
+            cancel()
+        pool.shutdown(wait=True)
+
+
+def _detect_sections_streaming(
+    slides: Iterable[SlideText],
+    *,
+    model: str,
+    cache: PlanCache | None,
+    refresh: bool,
+    memory_budget: int,
+    call: Callable,
+    timeout: float | None,
+    backend: Backend,
+) -> LecturePlan:
+    hasher = PlanKeyHasher(model=model, system_prompt=SYSTEM_PROMPT)
+    with tempfile.SpooledTemporaryFile(max_size=memory_budget) as spool:
+        count = 0
+        for slide in slides:
+            if count:
+                spool.write(b"\n\n")
+            spool.write(_slide_block(slide).encode())
+            hasher.update(slide)
+            count += 1
+        if not count:
+            raise ValueError("Cannot detect sections from empty slide list")
+
+        key = hasher.hexdigest()
+        if cache is not None and not refresh:
+            cached = cache.get(key)
+            instrumentation.emit("plan_cache", hit=cached is not None)
+            if cached is not None:
+                return cached
+
+        header = _prompt_header(count).encode()
+        chars = len(header) + spool.tell()
+        instrumentation.emit("prompt", chars=chars, tokens=-(-chars // CHARS_PER_TOKEN))
+
+        def run(m: str) -> str:
+            spool.seek(0)
+            return backend.complete_streaming(m, SYSTEM_PROMPT, header, spool, timeout=timeout)
+
+        plan = _repaired(call(run), count, None)
+
+    if cache is not None:
+        cache.put(key, plan)
+    return plan
+
+
+def _repaired(plan: LecturePlan, total: int, detect_range: Callable | None) -> LecturePlan:
+    result = repair_plan(plan, total, detect_range=detect_range)
+    if result.issues:
+        instrumentation.emit(
+            "plan_repair",
+            issues=[str(issue) for issue in result.issues],
+            redetected=result.redetected,
+        )
+    return result.plan
+
+
+def _parse_plan(output: str) -> LecturePlan:
+    raw = output.strip()
     # Claude may wrap JSON in markdown code fences — extract it
     fence_match = re.search(r"```(?:json)?\s*\n(.*?)\n```", raw, re.DOTALL)
     if fence_match:
         raw = fence_match.group(1).strip()
-    data = json.loads(raw)
-
-    sections = [
-        Section(
-            title=s["title"],
-            start_page=s["start_page"],
-            end_page=s["end_page"],
-            summary=s["summary"],
-        )
-        for s in data["sections"]
-    ]
+    return LecturePlan.from_dict(json.loads(raw))
+
+
+def detect_slide_range(
+    slides: list[SlideText],
+    start_page: int,
+    end_page: int,
+    **kwargs,
+) -> LecturePlan:
+    """Detect sections within pages start_page..end_page (1-indexed, inclusive).
 
-    return LecturePlan(lecture_title=data["lecture_title"], sections=sections)
+    The range is renumbered from 1 before prompting, so the SYSTEM_PROMPT rules
+    about the first and last page still hold, and the returned plan is shifted
+    back to the deck's page numbers. ``kwargs`` are passed to detect_sections().
+    """
+    offset = start_page - 1
+    window = [
+        SlideText(page_number=i + 1, text=s.text)
+        for i, s in enumerate(slides[offset:end_page])
+    ]
+    return detect_sections(window, **kwargs).shifted(offset)
@@ -0,0 +1,285 @@
+"""Long-running job server for ``lecture-split serve``.
+
+Jobs are submitted over localhost HTTP, queued, and run by a fixed number of
+worker threads that share one process pool for extraction and splitting, one
+plan cache and extraction store, and one limit on concurrent Claude calls.
+
+    POST /jobs                  {"pdf_path": "...", "output": "..."}  -> 202 job (output under output_root)
+    POST /jobs?name=deck.pdf    raw PDF body (Content-Type: application/pdf) -> 202 job
+    GET  /jobs                  all jobs
+    GET  /jobs/<id>             one job's status
+    GET  /jobs/<id>/result      the section plan and output path once done
+    GET  /health                queue and worker counts
+"""
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+from urllib.parse import parse_qs, urlparse
+
+from lecture_split.batch import default_output_dir, process_pdf
+from lecture_split.bundle import bundle_path_for
+from lecture_split.models import LecturePlan, SlideText
+
+DEFAULT_PORT = 8765
+
+# Largest PDF accepted as an upload.
+MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+
+# Finished jobs kept for GET /jobs; older ones are forgotten.
+DEFAULT_MAX_FINISHED_JOBS = 1000
+
+
+@dataclass
+class Job:
+    id: str
+    pdf_path: Path
+    output: Path
+    status: str = "queued"  # queued, running, done or failed
+    submitted_at: float = 0.0
+    started_at: float | None = None
+    finished_at: float | None = None
+    sections: int = 0
+    error: str | None = None
+    plan: LecturePlan | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "pdf_path": str(self.pdf_path),
+            "output": str(self.output),
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "sections": self.sections,
+            "error": self.error,
+        }
+
+
+class JobServer(ThreadingHTTPServer):
+    """HTTP server that queues PDF jobs and runs them on a shared worker pool.
+
+    ``workers`` jobs run at once. Their extraction and splitting go to one
+    process pool of ``jobs`` processes, and at most ``max_detect_calls``
+    calls to ``detect`` are in flight across all jobs. Outputs go next to
+    each PDF, or under ``output_root``; an ``output`` named in a request
+    must lie under ``output_root`` (see resolve_output). Uploaded PDFs are
+    saved in ``upload_dir``. Only the ``max_finished_jobs`` most recently
+    finished jobs are kept. ``pipeline_options`` are passed to
+    process_pdf() for every job.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int] = ("127.0.0.1", DEFAULT_PORT),
+        *,
+        detect: Callable[[list[SlideText]], LecturePlan],
+        workers: int = 2,
+        jobs: int | None = None,
+        max_detect_calls: int = 4,
+        output_root: Path | None = None,
+        upload_dir: Path | None = None,
+        max_finished_jobs: int = DEFAULT_MAX_FINISHED_JOBS,
+        **pipeline_options,
+    ):
+        super().__init__(address, _Handler)
+        self.detect = detect
+        self.output_root = Path(output_root) if output_root is not None else None
+        self.upload_dir = Path(upload_dir) if upload_dir is not None else None
+        self.max_finished_jobs = max_finished_jobs
+        self.pipeline_options = pipeline_options
+        self.jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._queue: queue.Queue[Job | None] = queue.Queue()
+        self._procs = ProcessPoolExecutor(max_workers=jobs or os.cpu_count())
+        self._detect_slots = threading.BoundedSemaphore(max(1, max_detect_calls))
+        self._workers = [
+            threading.Thread(target=self._work, name=f"lecture-split-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def submit(self, pdf_path: Path, output: Path | None = None) -> Job:
+        """Queue a PDF; return its job."""
+        pdf_path = Path(pdf_path)
+        if output is None:
+            output = default_output_dir(pdf_path, self.output_root)
+            if self.pipeline_options.get("bundle"):
+                output = bundle_path_for(output)
+        job = Job(
+            id=uuid.uuid4().hex[:12], pdf_path=pdf_path, output=Path(output), submitted_at=time.time()
+        )
+        with self._lock:
+            self.jobs[job.id] = job
+        self._queue.put(job)
+        return job
+
+    def resolve_output(self, requested: str) -> Path:
+        """Return the output path a request asked for, which must lie under output_root.
+
+        A relative path is taken relative to output_root.
+        """
+        if self.output_root is None:
+            raise ValueError("choosing the output is disabled; start the server with an output root")
+        root = self.output_root.resolve()
+        output = (root / requested).resolve()
+        if output == root or not output.is_relative_to(root):
+            raise ValueError(f"output must be inside {root}")
+        return output
+
+    def save_upload(self, name: str, data: bytes) -> Path:
+        """Store an uploaded PDF under upload_dir and return its path."""
+        if self.upload_dir is None:
+            raise ValueError("uploads are disabled; start the server with an upload directory")
+        name = Path(name).name or "upload.pdf"
+        if not name.lower().endswith(".pdf"):
+            name += ".pdf"
+        path = self.upload_dir / uuid.uuid4().hex[:12] / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return path
+
+    def list_jobs(self) -> list[Job]:
+        with self._lock:
+            return list(self.jobs.values())
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            statuses = [job.status for job in self.jobs.values()]
+        return {status: statuses.count(status) for status in ("queued", "running", "done", "failed")}
+
+    def _work(self) -> None:
+        while (job := self._queue.get()) is not None:
+            with self._lock:
+                job.status = "running"
+                job.started_at = time.time()
+            result = process_pdf(
+                job.pdf_path,
+                job.output,
+                detect=self.detect,
+                procs=self._procs,
+                detect_slots=self._detect_slots,
+                **self.pipeline_options,
+            )
+            with self._lock:
+                job.sections = result.sections
+                job.error = result.error
+                job.plan = result.plan
+                job.finished_at = time.time()
+                job.status = "done" if result.ok else "failed"
+                self._forget_old_jobs()
+
+    def _forget_old_jobs(self) -> None:
+        """Drop the oldest finished jobs beyond max_finished_jobs; call with the lock held."""
+        finished = [job for job in self.jobs.values() if job.finished_at is not None]
+        if len(finished) > self.max_finished_jobs:
+            finished.sort(key=lambda job: job.finished_at)
+            for job in finished[:len(finished) - self.max_finished_jobs]:
+                del self.jobs[job.id]
+
+    def close(self) -> None:
+        """Finish the jobs already queued, then stop the workers and the process pool."""
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._procs.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: JobServer
+
+    def log_message(self, format, *args) -> None:
+        pass  # keep the daemon's output to the lines `lecture-split serve` prints
+
+    def _send(self, status: HTTPStatus, body: dict | list) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: HTTPStatus, message: str) -> None:
+        self._send(status, {"error": message})
+
+    def do_GET(self) -> None:
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        if parts == ["health"]:
+            self._send(HTTPStatus.OK, {"status": "ok", "jobs": self.server.counts()})
+        elif parts == ["jobs"]:
+            self._send(HTTPStatus.OK, [job.to_dict() for job in self.server.list_jobs()])
+        elif len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.server.get(parts[1])
+            if job is None:
+                self._error(HTTPStatus.NOT_FOUND, f"no job {parts[1]}")
+            elif len(parts) == 2:
+                self._send(HTTPStatus.OK, job.to_dict())
+            elif parts[2] != "result":
+                self._error(HTTPStatus.NOT_FOUND, f"unknown path {self.path}")
+            elif job.status != "done":
+                self._send(HTTPStatus.CONFLICT, job.to_dict())
+            else:
+                self._send(HTTPStatus.OK, {**job.to_dict(), "plan": job.plan.to_dict()})
+        else:
+            self._error(HTTPStatus.NOT_FOUND, f"unknown path {self.path}")
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/jobs":
+            self._error(HTTPStatus.NOT_FOUND, f"unknown path {self.path}")
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_UPLOAD_BYTES:
+            self._error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "upload too large")
+            return
+        body = self.rfile.read(length)
+
+        if self.headers.get_content_type() == "application/pdf":
+            name = parse_qs(url.query).get("name", ["upload.pdf"])[0]
+            try:
+                pdf_path = self.server.save_upload(name, body)
+            except ValueError as exc:
+                self._error(HTTPStatus.BAD_REQUEST, str(exc))
+                return
+            output = None
+        else:
+            try:
+                request = json.loads(body or b"{}")
+                pdf_path = Path(request["pdf_path"])
+                requested = request.get("output")
+            except (ValueError, KeyError, TypeError):
+                self._error(HTTPStatus.BAD_REQUEST, 'expected JSON {"pdf_path": ..., "output": ...}')
+                return
+            try:
+                output = self.server.resolve_output(str(requested)) if requested else None
+            except ValueError as exc:
+                self._error(HTTPStatus.FORBIDDEN, str(exc))
+                return
+            if not pdf_path.is_file():
+                self._error(HTTPStatus.BAD_REQUEST, f"PDF not found: {pdf_path}")
+                return
+
+        job = self.server.submit(pdf_path, output)
+        self._send(HTTPStatus.ACCEPTED, job.to_dict())
@@ -1,30 +1,172 @@
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterable, Iterator
 
-import fitz
-
+from lecture_split import instrumentation
+from lecture_split.document import PDFDocument, PDFSource, opened, source_path
 from lecture_split.models import Section
 
 
+def _section_bytes(pdf_path: str, sections: list[Section], optimize: bool) -> list[bytes]:
+    """Render a group of sections to PDF bytes; runs in a worker process."""
+    with PDFDocument(pdf_path) as doc:
+        return [doc.section_bytes(section, optimize) for section in sections]
+
+
+def _write_sections(pdf: PDFSource, jobs: list[tuple[Section, Path]], optimize: bool) -> None:
+    """Write a group of sections; in a worker process, opens its own copy of the source."""
+    with opened(pdf) as doc:
+        for section, out_path in jobs:
+            doc.write_section(section, out_path, optimize)
+
+
+@instrumentation.timed("split")
 def split_pdf(
-    pdf_path: Path, sections: list[Section], output_dir: Path
+    pdf: PDFSource,
+    sections: list[Section],
+    output_dir: Path,
+    *,
+    workers: int = 1,
+    optimize: bool = False,
+    only: Iterable[int] | None = None,
 ) -> list[Path]:
-    """Split a PDF into separate files based on section boundaries."""
-    pdf_path = Path(pdf_path)
+    """Split a PDF into separate files based on section boundaries.
+
+    ``pdf`` is a path or an open PDFDocument, which is reused instead of
+    parsing the file again. With ``workers`` > 1, sections are written by
+    that many processes, each opening the source PDF itself. ``optimize``
+    subsets fonts and saves with garbage collection and deflate compression
+    for smaller output files.
+    ``only`` restricts writing to those (0-based) section indices; the paths of
+    all sections are returned either way.
+    """
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    src = fitz.open(str(pdf_path))
-    output_paths = []
+    output_paths = [output_dir / f"section-{i + 1:02d}.pdf" for i in range(len(sections))]
+    jobs = list(zip(sections, output_paths))
+    if only is not None:
+        only = set(only)
+        jobs = [job for i, job in enumerate(jobs) if i in only]
+        if not jobs:
+            return output_paths
 
-    for i, section in enumerate(sections):
-        dst = fitz.open()
-        # pages are 0-indexed in pymupdf, sections use 1-indexed pages
-        dst.insert_pdf(src, from_page=section.start_page - 1, to_page=section.end_page - 1)
-        filename = f"section-{i + 1:02d}.pdf"
-        out_path = output_dir / filename
-        dst.save(str(out_path))
-        dst.close()
-        output_paths.append(out_path)
+    workers = min(workers, len(jobs))
+    if workers <= 1:
+        _write_sections(pdf, jobs, optimize)
+    else:
+        # Round-robin so that every worker gets a mix of early and late sections.
+        groups = [jobs[w::workers] for w in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(_write_sections, str(source_path(pdf)), g, optimize) for g in groups]:
+                future.result()
 
-    src.close()
+    if instrumentation.enabled():
+        for i, out_path in enumerate(output_paths):
+            if only is None or i in only:
+                instrumentation.emit("section_output", index=i + 1, bytes=out_path.stat().st_size)
     return output_paths
+
+
+def iter_section_pdfs(
+    pdf: PDFSource,
+    sections: list[Section],
+    *,
+    workers: int = 1,
+    optimize: bool = False,
+) -> Iterator[bytes]:
+    """Yield each section as an in-memory PDF, in section order.
+
+    ``pdf`` is a path or an open PDFDocument, as for split_pdf(). With
+    ``workers`` > 1, sections are rendered by that many processes in
+    consecutive batches, and are still yielded strictly in order.
+    """
+    workers = min(workers, len(sections))
+    if workers <= 1:
+        with opened(pdf) as doc:
+            for section in sections:
+                yield doc.section_bytes(section, optimize)
+        return
+
+    # Several small batches of consecutive sections per worker, so the first
+    # sections can be consumed while later ones are still being rendered.
+    size = -(-len(sections) // (workers * 4))
+    batches = [sections[i:i + size] for i in range(0, len(sections), size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rendered in pool.map(
+            _section_bytes, [str(source_path(pdf))] * len(batches), batches, [optimize] * len(batches)
+        ):
+            yield from rendered
+
+
+class SectionWriter:
+    """Write section PDFs while Claude is still writing the rest of the plan.
+
+    >>> with SectionWriter(doc, "lecture_sections") as writer:
+    ...     plan = detect_sections(slides, on_section=writer)
+    ...     paths = writer.finish(plan.sections)
+
+    Each provisional section passed in by detect_sections() is written to its
+    section-XX.pdf by a background thread, so the first sections are on disk
+    before the reply is complete. finish() then writes every section of the
+    final plan whose pages differ from what was written (after a repair or a
+    retry), so the result is the same as split_pdf() with the final plan.
+    """
+
+    def __init__(self, pdf: PDFDocument, output_dir: Path, *, optimize: bool = False):
+        self.pdf = pdf
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.optimize = optimize
+        self.early = 0  # sections of the final plan on disk before Claude sent the last one
+        self._written: dict[int, tuple[int, int]] = {}
+        self._written_before_last: dict[int, tuple[int, int]] = {}
+        self._pending: list[Future] = []
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="section-writer")
+
+    def __enter__(self) -> "SectionWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def path(self, index: int) -> Path:
+        return self.output_dir / f"section-{index + 1:02d}.pdf"
+
+    def __call__(self, index: int, section: Section) -> None:
+        # The last section only closes with the end of the reply, so whatever
+        # is on disk by now was written while Claude was still answering.
+        self._written_before_last = dict(self._written)
+        self._pending.append(self._pool.submit(self._write, index, section))
+
+    def _write(self, index: int, section: Section) -> None:
+        pages = (section.start_page, section.end_page)
+        if self._written.get(index) == pages:
+            return
+        if not 1 <= section.start_page <= section.end_page <= self.pdf.page_count:
+            return  # a provisional section that repair will fix; finish() writes the real one
+        self._written.pop(index, None)
+        self.pdf.write_section(section, self.path(index), self.optimize)
+        self._written[index] = pages
+
+    @instrumentation.timed("split")
+    def finish(self, sections: list[Section]) -> list[Path]:
+        """Wait for the early writes, write what the final ``sections`` changed; return all paths."""
+        self._pool.shutdown(wait=True)
+        for future in self._pending:
+            future.result()
+        self.early = sum(
+            self._written_before_last.get(i) == (s.start_page, s.end_page) for i, s in enumerate(sections)
+        )
+        for i, section in enumerate(sections):
+            self._write(i, section)
+        output_paths = [self.path(i) for i in range(len(sections))]
+        if instrumentation.enabled():
+            for i, out_path in enumerate(output_paths):
+                instrumentation.emit("section_output", index=i + 1, bytes=out_path.stat().st_size)
+        return output_paths
+
+
+def total_size(paths: list[Path]) -> int:
+    """Return the combined size in bytes of the given files."""
+    return sum(Path(p).stat().st_size for p in paths)
@@ -0,0 +1,174 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+
+from lecture_split.cache import cache_root
+from lecture_split.incremental import page_fingerprint
+from lecture_split.models import SlideText
+
+# Bump when the schema or the extracted text for a given PDF changes.
+STORE_VERSION = 1
+
+STORE_FILE = "extracted.sqlite3"
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    hash TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    page_count INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (hash, mode)
+);
+CREATE INDEX IF NOT EXISTS documents_last_used ON documents (last_used);
+CREATE TABLE IF NOT EXISTS pages (
+    hash TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    PRIMARY KEY (hash, mode, page)
+) WITHOUT ROWID;
+"""
+
+
+def default_store_path() -> Path:
+    """Return extracted.sqlite3 in cache_root()."""
+    return cache_root() / STORE_FILE
+
+
+def file_hash(path: Path) -> str:
+    """Return the sha256 of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ExtractionStore:
+    """Single-file SQLite store of extracted page text, keyed by PDF content hash.
+
+    Every page of a document is stored with its fingerprint under (hash, mode,
+    page), where ``mode`` tells full text and outline extraction apart, so a
+    whole document is read back with one indexed range query. When the stored
+    text exceeds ``max_bytes``, the least recently used documents are evicted.
+    Safe to share between threads and processes; every call uses its own
+    connection.
+    """
+
+    def __init__(self, path: Path | None = None, *, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path) if path is not None else default_store_path()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def __getstate__(self) -> dict:
+        # Picklable for process pools; counters and locks stay per process.
+        return {"path": self.path, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["path"], max_bytes=state["max_bytes"])
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+                conn.executescript(
+                    "DROP TABLE IF EXISTS pages; DROP TABLE IF EXISTS documents;"
+                    f"{_SCHEMA} PRAGMA user_version = {STORE_VERSION};"
+                )
+            self._initialized = True
+        return conn
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, digest: str, mode: str = "text") -> list[SlideText] | None:
+        """Return the stored pages of a document in page order, or None if it is not stored."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT page, text FROM pages WHERE hash = ? AND mode = ? ORDER BY page",
+                (digest, mode),
+            ).fetchall()
+            if rows:
+                conn.execute(
+                    "UPDATE documents SET last_used = ? WHERE hash = ? AND mode = ?",
+                    (time.time(), digest, mode),
+                )
+        self._count(bool(rows))
+        return [SlideText(page, text) for page, text in rows] if rows else None
+
+    def fingerprints(self, digest: str, mode: str = "text") -> list[str] | None:
+        """Return the stored page fingerprints of a document, or None if it is not stored."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT fingerprint FROM pages WHERE hash = ? AND mode = ? ORDER BY page",
+                (digest, mode),
+            ).fetchall()
+        return [fp for (fp,) in rows] if rows else None
+
+    def put(self, digest: str, slides: list[SlideText], mode: str = "text") -> None:
+        """Store (or replace) all pages of a document in one transaction."""
+        size = sum(len(s.text.encode()) for s in slides)
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM pages WHERE hash = ? AND mode = ?", (digest, mode))
+                conn.executemany(
+                    "INSERT INTO pages (hash, mode, page, text, fingerprint) VALUES (?, ?, ?, ?, ?)",
+                    ((digest, mode, s.page_number, s.text, page_fingerprint(s.text)) for s in slides),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO documents (hash, mode, page_count, bytes, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (digest, mode, len(slides), size, time.time()),
+                )
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        total = 0
+        removed = 0
+        rows = conn.execute(
+            "SELECT hash, mode, bytes FROM documents ORDER BY last_used DESC"
+        ).fetchall()
+        for i, (digest, mode, size) in enumerate(rows):
+            total += size
+            # Always keep the most recently used document, however large.
+            if i and total > self.max_bytes:
+                conn.execute("DELETE FROM pages WHERE hash = ? AND mode = ?", (digest, mode))
+                conn.execute("DELETE FROM documents WHERE hash = ? AND mode = ?", (digest, mode))
+                total -= size
+                removed += 1
+        return removed
+
+    def evict(self) -> int:
+        """Apply the size limit; return the number of documents removed."""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            removed = self._evict(conn)
+            conn.execute("COMMIT")
+        return removed
+
+    def clear(self) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM pages")
+            conn.execute("DELETE FROM documents")
@@ -0,0 +1,96 @@
+"""Pick finished sections out of a plan while Claude is still writing it.
+
+Claude writes the plan as one JSON object whose ``sections`` array is
+produced one section at a time. SectionScanner is fed the reply text as it
+arrives and returns each section object as soon as its closing brace has
+been seen, so the rest of the pipeline can start on it before the reply is
+complete. The sections it returns are provisional: detect_sections() still
+parses, validates and repairs the complete reply.
+"""
+import json
+from typing import Callable, Iterable
+
+from lecture_split.models import Section
+
+# Called with the 0-based index of each finished section, in order.
+OnSection = Callable[[int, Section], None]
+
+
+class SectionScanner:
+    """Incremental scanner for the ``sections`` array of a plan in JSON.
+
+    Tracks nesting and string state character by character, so it needs no
+    lookahead and copes with chunks that end anywhere, including inside a
+    string or an escape sequence. Text before the first ``{`` (such as a
+    markdown code fence) is skipped.
+    """
+
+    def __init__(self):
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string: list[str] = []
+        self._last_key = None
+        self._sections_depth = None  # depth inside the sections array
+        self._object: list[str] | None = None
+
+    def feed(self, text: str) -> list[Section]:
+        """Scan the next chunk of the reply; return the sections it completed."""
+        found = []
+        for char in text:
+            if self._object is not None:
+                self._object.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = "".join(self._string)
+                elif self._depth == 1:
+                    self._string.append(char)
+                continue
+            if self._depth == 0 and char != "{":
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string = []
+            elif char in "{[":
+                if char == "[" and self._depth == 1 and self._last_key == "sections":
+                    self._sections_depth = 2
+                elif char == "{" and self._depth == self._sections_depth:
+                    self._object = ["{"]
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._object is not None and self._depth == self._sections_depth:
+                    section = self._section("".join(self._object))
+                    self._object = None
+                    if section is not None:
+                        found.append(section)
+                elif char == "]" and self._depth == 1:
+                    self._sections_depth = None
+        return found
+
+    @staticmethod
+    def _section(raw: str) -> Section | None:
+        try:
+            data = json.loads(raw)
+            return Section(data["title"], data["start_page"], data["end_page"], data["summary"])
+        except (ValueError, KeyError, TypeError):
+            return None  # malformed; the final parse decides what to do with it
+
+
+def scan_sections(chunks: Iterable[str], on_section: OnSection) -> str:
+    """Pass each section in ``chunks`` to ``on_section`` as it completes; return the whole text."""
+    scanner = SectionScanner()
+    text = []
+    index = 0
+    for chunk in chunks:
+        text.append(chunk)
+        for section in scanner.feed(chunk):
+            on_section(index, section)
+            index += 1
+    return "".join(text)
@@ -0,0 +1,172 @@
+import re
+
+from lecture_split.instrumentation import timed
+from lecture_split.models import LecturePlan, Section, SlideText
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the extra
+    np = None
+
+_WORD = re.compile(r"[a-z][a-z0-9'-]{2,}")
+
+STOPWORDS = frozenset("""
+    about above after again against all also and any are because been before being
+    below between both but can could did does doing down during each few for from
+    further had has have having her here hers him his how into its itself just more
+    most not now off once only other our ours out over own same she should some such
+    than that the their theirs them then there these they this those through too under
+    until very was were what when where which while who whom why will with would you
+    your yours use using used one two may via per
+""".split())
+
+SUMMARY_TERMS = 4
+
+# Largest vocabulary _term_matrix() keeps.
+MAX_TERMS = 2048
+
+
+def _terms(text: str) -> list[str]:
+    return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+
+def _title(text: str) -> str:
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if line:
+            return line
+    return ""
+
+
+def _term_matrix(slides: list[SlideText]) -> tuple["np.ndarray", list[str]]:
+    """Return a (slides x vocabulary) matrix of log-scaled, idf-weighted term counts.
+
+    The vocabulary is capped at the MAX_TERMS terms that occur on the most
+    slides, so long decks do not grow the matrix without bound; a term on a
+    single slide adds no cohesion between slides and is the first to go.
+    """
+    vocab: dict[str, int] = {}
+    rows, cols = [], []
+    for i, s in enumerate(slides):
+        for term in _terms(s.text):
+            rows.append(i)
+            cols.append(vocab.setdefault(term, len(vocab)))
+    if not vocab:
+        return np.zeros((len(slides), 0)), []
+    # Count each (slide, term) pair once, without a dense slides x vocabulary array.
+    pairs, counts = np.unique(np.array(rows) * len(vocab) + np.array(cols), return_counts=True)
+    rows, cols = np.divmod(pairs, len(vocab))
+    df = np.bincount(cols, minlength=len(vocab))
+    keep = np.sort(np.argsort(-df, kind="stable")[:MAX_TERMS])  # in order of first use
+    column = np.full(len(vocab), -1)
+    column[keep] = np.arange(len(keep))
+    kept = column[cols] >= 0
+    weights = np.zeros((len(slides), len(keep)))
+    weights[rows[kept], column[cols[kept]]] = np.log1p(counts[kept])
+    weights *= np.log((1 + len(slides)) / (1 + df[keep])) + 1.0
+    terms = list(vocab)
+    return weights, [terms[j] for j in keep]
+
+
+def gap_similarities(weights: "np.ndarray", block_size: int) -> "np.ndarray":
+    """Cosine similarity between the ``block_size`` slides before and after each gap."""
+    n = weights.shape[0]
+    cum = np.vstack([np.zeros((1, weights.shape[1])), np.cumsum(weights, axis=0)])
+    gaps = np.arange(1, n)  # gap g sits between slide g-1 and slide g (0-indexed)
+    left = cum[gaps] - cum[np.maximum(gaps - block_size, 0)]
+    right = cum[np.minimum(gaps + block_size, n)] - cum[gaps]
+    norms = np.linalg.norm(left, axis=1) * np.linalg.norm(right, axis=1)
+    dots = np.einsum("ij,ij->i", left, right)
+    return np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+
+
+def depth_scores(similarities: "np.ndarray") -> "np.ndarray":
+    """How far each gap's similarity dips below the nearest peaks on either side.
+
+    The peak to the left of a gap is where the similarity stops rising while
+    walking left from it: the last position at or before the gap that is
+    higher than its left neighbour. Likewise to the right.
+    """
+    s = similarities
+    if not len(s):
+        return np.zeros_like(s)
+    positions = np.arange(len(s))
+    left_stop = np.r_[True, s[:-1] < s[1:]]
+    left = np.maximum.accumulate(np.where(left_stop, positions, 0))
+    right_stop = np.r_[s[1:] < s[:-1], True]
+    right = np.minimum.accumulate(np.where(right_stop, positions, len(s) - 1)[::-1])[::-1]
+    return (s[left] - s) + (s[right] - s)
+
+
+def _pick_boundaries(depth: "np.ndarray", n: int, min_section: int, max_sections: int | None) -> list[int]:
+    """Return the 1-indexed start pages of every section after the first."""
+    if not len(depth) or not depth.any():
+        return []
+    # Hearst's cutoff is mean - std/2; slides are short and noisy, so only
+    # gaps clearly deeper than average count as boundaries.
+    cutoff = depth.mean() + depth.std() / 2
+    chosen: list[int] = []
+    for g in np.argsort(-depth, kind="stable"):
+        if depth[g] <= 0 or depth[g] < cutoff:
+            break
+        start = int(g) + 2  # gap g precedes 0-indexed slide g+1, i.e. page g+2
+        edges = [1, *chosen, n + 1]
+        if all(abs(start - e) >= min_section for e in edges):
+            chosen.append(start)
+            if max_sections is not None and len(chosen) + 1 >= max_sections:
+                break
+    return sorted(chosen)
+
+
+@timed("detect")
+def detect_sections_local(
+    slides: list[SlideText],
+    *,
+    block_size: int = 2,
+    min_section: int = 2,
+    max_sections: int | None = None,
+) -> LecturePlan:
+    """Segment slides offline with TextTiling-style lexical cohesion; no Claude call.
+
+    Each slide becomes an idf-weighted term vector. Boundaries go where the
+    cosine similarity between the ``block_size`` slides on either side of a
+    gap dips deepest, at least ``min_section`` slides apart. Each section is
+    titled with the slide title that best matches the section's vocabulary.
+    Requires NumPy (``pip install lecture-split[offline]``).
+    """
+    if np is None:
+        raise ImportError("Offline section detection requires NumPy: pip install 'lecture-split[offline]'")
+    if not slides:
+        raise ValueError("Cannot detect sections from empty slide list")
+
+    n = len(slides)
+    weights, vocab = _term_matrix(slides)
+    if weights.shape[1]:
+        depth = depth_scores(gap_similarities(weights, block_size))
+        starts = [1, *_pick_boundaries(depth, n, min_section, max_sections)]
+    else:
+        starts = [1]
+
+    sections = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] - 1 if i + 1 < len(starts) else n
+        sections.append(_describe(slides, weights, vocab, start, end))
+    return LecturePlan(lecture_title=_title(slides[0].text) or "Lecture", sections=sections)
+
+
+def _describe(slides, weights, vocab, start: int, end: int) -> Section:
+    """Title a section after its most representative slide title and list its key terms."""
+    block = weights[start - 1:end]
+    profile = block.sum(axis=0) if block.size else block
+    index = {term: j for j, term in enumerate(vocab)}
+
+    best_title, best_score = "", -1.0
+    for s in slides[start - 1:end]:
+        title = _title(s.text)
+        score = sum(profile[index[t]] for t in set(_terms(title)) if t in index) if profile.size else 0.0
+        if title and score > best_score:
+            best_title, best_score = title, score
+
+    top = [vocab[j] for j in np.argsort(-profile, kind="stable")[:SUMMARY_TERMS] if profile[j] > 0] if profile.size else []
+    summary = f"Slides {start}–{end}" + (f": {', '.join(top)}." if top else ".")
+    return Section(best_title or f"Slides {start}–{end}", start, end, summary)
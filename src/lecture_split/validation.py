@@ -0,0 +1,165 @@
+from dataclasses import dataclass, field
+from typing import Callable
+
+from lecture_split.models import LecturePlan, Section
+
+# Gaps and overlaps up to this many pages are fixed by moving a boundary;
+# larger ones are sent back to Claude when a detector is available.
+DEFAULT_MAX_LOCAL_FIX = 2
+
+
+@dataclass
+class PlanIssue:
+    """One coverage or contiguity defect, on pages start_page..end_page (inclusive)."""
+    kind: str  # gap, overlap, out_of_range, empty or order
+    start_page: int
+    end_page: int
+
+    def __str__(self) -> str:
+        pages = f"page {self.start_page}" if self.start_page == self.end_page else (
+            f"pages {self.start_page}–{self.end_page}"
+        )
+        return f"{self.kind} at {pages}"
+
+
+@dataclass
+class PlanRepair:
+    plan: LecturePlan
+    issues: list[PlanIssue] = field(default_factory=list)
+    # (start_page, end_page) ranges that were re-detected instead of fixed locally.
+    redetected: list[tuple[int, int]] = field(default_factory=list)
+
+
+def validate_plan(plan: LecturePlan, total: int) -> list[PlanIssue]:
+    """Return every way ``plan`` fails to cover pages 1..total exactly once, in order."""
+    issues = []
+    previous_end = 0
+    for s in plan.sections:
+        if s.start_page > s.end_page:
+            issues.append(PlanIssue("empty", s.end_page, s.start_page))
+            continue
+        if s.start_page < 1 or s.end_page > total:
+            issues.append(PlanIssue("out_of_range", s.start_page, s.end_page))
+        if s.start_page <= previous_end:
+            kind = "overlap" if s.end_page >= previous_end else "order"
+            issues.append(PlanIssue(kind, s.start_page, min(s.end_page, previous_end)))
+        elif s.start_page > previous_end + 1:
+            issues.append(PlanIssue("gap", previous_end + 1, s.start_page - 1))
+        previous_end = max(previous_end, s.end_page)
+    if previous_end < total:
+        issues.append(PlanIssue("gap", previous_end + 1, total))
+    return issues
+
+
+def _walk(
+    sections: list[Section], first: int, last: int, max_local_fix: int | None
+) -> tuple[list[Section | tuple[int, int]], list[PlanIssue]]:
+    """Lay ``sections`` over pages first..last without gaps or overlaps.
+
+    Returns sections and (start_page, end_page) ranges to re-detect, in page
+    order, plus the issues found. With ``max_local_fix`` None every defect is
+    fixed locally; only a range with no usable section at all is left to
+    re-detect.
+    """
+    issues = []
+    if any(a.start_page > b.start_page for a, b in zip(sections, sections[1:])):
+        issues.append(PlanIssue("order", first, last))
+    clamped = []
+    for s in sorted(sections, key=lambda s: (s.start_page, s.end_page)):
+        start, end = max(s.start_page, first), min(s.end_page, last)
+        if start > end:
+            issues.append(PlanIssue("empty" if s.start_page > s.end_page else "out_of_range",
+                                    s.start_page, s.end_page))
+            continue
+        if (start, end) != (s.start_page, s.end_page):
+            issues.append(PlanIssue("out_of_range", s.start_page, s.end_page))
+        clamped.append(Section(s.title, start, end, s.summary))
+
+    def large(pages: int) -> bool:
+        return max_local_fix is not None and pages > max_local_fix
+
+    items: list[Section | tuple[int, int]] = []
+
+    def redetect(start: int, end: int) -> None:
+        if items and isinstance(items[-1], tuple):
+            items[-1] = (items[-1][0], end)  # adjacent ranges become one call
+        else:
+            items.append((start, end))
+
+    cursor = first  # first page not covered yet
+    for s in clamped:
+        if s.end_page < cursor:
+            issues.append(PlanIssue("overlap", s.start_page, s.end_page))
+            continue  # already covered by earlier sections
+        if s.start_page < cursor:
+            issues.append(PlanIssue("overlap", s.start_page, cursor - 1))
+            if large(cursor - s.start_page) and items and isinstance(items[-1], Section):
+                # Two sections disagree about several pages: ask again for both.
+                redetect(items.pop().start_page, s.end_page)
+                cursor = s.end_page + 1
+                continue
+            s = Section(s.title, cursor, s.end_page, s.summary)
+        elif s.start_page > cursor:
+            issues.append(PlanIssue("gap", cursor, s.start_page - 1))
+            if large(s.start_page - cursor) or (items and isinstance(items[-1], tuple)):
+                redetect(cursor, s.start_page - 1)
+            elif items:
+                items[-1].end_page = s.start_page - 1
+            else:
+                s = Section(s.title, cursor, s.end_page, s.summary)
+        items.append(s)
+        cursor = s.end_page + 1
+
+    if cursor <= last:
+        issues.append(PlanIssue("gap", cursor, last))
+        if not items or large(last - cursor + 1) or isinstance(items[-1], tuple):
+            redetect(cursor, last)
+        else:
+            items[-1].end_page = last
+    return items, issues
+
+
+def repair_plan(
+    plan: LecturePlan,
+    total: int,
+    *,
+    detect_range: Callable[[int, int], LecturePlan] | None = None,
+    max_local_fix: int = DEFAULT_MAX_LOCAL_FIX,
+) -> PlanRepair:
+    """Return a plan that covers pages 1..total exactly once, fixing ``plan`` as needed.
+
+    Sections are sorted and clamped to the deck. Gaps and overlaps of at most
+    ``max_local_fix`` pages are closed by moving the boundary: a gap joins the
+    section before it, an overlap is given to the earlier section. Larger
+    defects are re-detected with ``detect_range(start_page, end_page)``, which
+    must return a plan in the deck's page numbers; its sections are repaired
+    locally and spliced in. Without ``detect_range`` everything is fixed
+    locally. A valid plan is returned unchanged.
+    """
+    if total < 1:
+        raise ValueError("Cannot repair a plan for an empty deck")
+    if not validate_plan(plan, total):
+        return PlanRepair(plan=plan)
+
+    items, issues = _walk(plan.sections, 1, total, max_local_fix if detect_range else None)
+    sections = []
+    redetected = []
+    for item in items:
+        if isinstance(item, Section):
+            sections.append(item)
+            continue
+        if detect_range is None:
+            raise ValueError("Plan has no usable sections")
+        start, end = item
+        redetected.append(item)
+        sub_items, sub_issues = _walk(detect_range(start, end).sections, start, end, None)
+        issues.extend(sub_issues)
+        if not all(isinstance(sub, Section) for sub in sub_items):
+            raise ValueError(f"Re-detection returned no usable sections for pages {start}–{end}")
+        sections.extend(sub_items)
+
+    return PlanRepair(
+        plan=LecturePlan(lecture_title=plan.lecture_title, sections=sections),
+        issues=issues,
+        redetected=redetected,
+    )
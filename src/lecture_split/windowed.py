@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from lecture_split.models import LecturePlan, Section, SlideText
+from lecture_split.section_detector import detect_sections, detect_slide_range
+
+DEFAULT_WINDOW_SIZE = 40
+DEFAULT_WINDOW_OVERLAP = 8
+
+
+def window_ranges(total: int, window_size: int, overlap: int) -> list[tuple[int, int]]:
+    """Return overlapping (start_page, end_page) windows covering pages 1..total."""
+    if window_size < 1 or not 0 <= overlap < window_size:
+        raise ValueError("window_size must be >= 1 and 0 <= overlap < window_size")
+    ranges = []
+    start = 1
+    while True:
+        end = min(start + window_size - 1, total)
+        ranges.append((start, end))
+        if end == total:
+            return ranges
+        start = end - overlap + 1
+
+
+def stitch_windows(
+    windows: list[tuple[int, int, LecturePlan]], total: int
+) -> LecturePlan:
+    """Merge per-window plans into one contiguous plan covering pages 1..total.
+
+    Each overlap region is cut at its midpoint: boundaries left of the cut come
+    from the earlier window, boundaries right of it from the later one. A
+    section that spans a cut simply continues until the next kept boundary,
+    so the result has no gaps or overlaps by construction. When both windows
+    put a boundary within one page of each other around a cut, only the
+    earlier one is kept.
+    """
+    starts: list[tuple[int, Section, int]] = []  # (start_page, section, window index)
+    for k, (w_start, w_end, plan) in enumerate(windows):
+        own_start = 1 if k == 0 else (w_start + windows[k - 1][1] + 1) // 2
+        own_end = total if k == len(windows) - 1 else (windows[k + 1][0] + w_end + 1) // 2 - 1
+        for s in plan.sections:
+            if own_start <= s.start_page <= own_end:
+                if starts and starts[-1][2] != k and s.start_page - starts[-1][0] <= 1:
+                    continue
+                starts.append((s.start_page, s, k))
+
+    if not starts or starts[0][0] != 1:
+        # The first window's first section always starts on page 1; fall back
+        # to it if the model returned something odd.
+        first = windows[0][2].sections[0]
+        starts.insert(0, (1, first, 0))
+
+    sections = []
+    for i, (start, s, _) in enumerate(starts):
+        end = starts[i + 1][0] - 1 if i + 1 < len(starts) else total
+        sections.append(Section(s.title, start, end, s.summary))
+    return LecturePlan(lecture_title=windows[0][2].lecture_title, sections=sections)
+
+
+def detect_sections_windowed(
+    slides: list[SlideText],
+    *,
+    window_size: int = DEFAULT_WINDOW_SIZE,
+    overlap: int = DEFAULT_WINDOW_OVERLAP,
+    max_workers: int = 4,
+    **kwargs,
+) -> LecturePlan:
+    """Detect sections in overlapping windows concurrently and stitch the results.
+
+    Latency depends on ``window_size`` rather than on deck length. Decks that
+    fit in one window are sent to detect_sections() unchanged. ``kwargs`` are
+    passed to detect_sections() for every window.
+    """
+    if not slides:
+        raise ValueError("Cannot detect sections from empty slide list")
+    total = len(slides)
+    if total <= window_size:
+        return detect_sections(slides, **kwargs)
+
+    ranges = window_ranges(total, window_size, overlap)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        plans = list(pool.map(
+            lambda r: detect_slide_range(slides, r[0], r[1], **kwargs), ranges
+        ))
+    return stitch_windows(
+        [(start, end, plan) for (start, end), plan in zip(ranges, plans)], total
+    )
@@ -0,0 +1,95 @@
+"""Fixtures and helpers shared by the test modules."""
+import json
+import subprocess
+from pathlib import Path
+
+import fitz
+import pytest
+
+from lecture_split.models import LecturePlan, Section, SlideText
+
+
+@pytest.fixture(autouse=True)
+def isolated_plan_cache(tmp_path, monkeypatch):
+    """Keep the on-disk plan cache out of the user's home directory."""
+    cache_dir = tmp_path / "plan-cache"
+    monkeypatch.setenv("LECTURE_SPLIT_CACHE_DIR", str(cache_dir))
+    return cache_dir
+
+
+def make_test_pdf(path: Path, num_pages: int = 6) -> Path:
+    """A deck with one topic per slide; TEST_PDF_RESPONSE splits its 6 pages into 3 sections."""
+    doc = fitz.open()
+    topics = [
+        "Intro to Deep Learning\nCS231n",
+        "What are Neural Networks?\nBiological inspiration",
+        "Perceptrons\nSingle layer networks",
+        "Backpropagation\nChain rule applied",
+        "Training Tips\nBatch norm, dropout",
+        "Summary\nKey takeaways",
+    ]
+    for i in range(num_pages):
+        page = doc.new_page(width=720, height=540)
+        page.insert_text((72, 72), topics[i % len(topics)], fontsize=20)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+TEST_PDF_RESPONSE = {
+    "lecture_title": "Intro to Deep Learning",
+    "sections": [
+        {"title": "Introduction", "start_page": 1, "end_page": 2, "summary": "Introduces deep learning and neural networks."},
+        {"title": "Core Concepts", "start_page": 3, "end_page": 5, "summary": "Covers perceptrons, backprop, and training."},
+        {"title": "Summary", "start_page": 6, "end_page": 6, "summary": "Recap."},
+    ],
+}
+
+
+def mock_claude_result():
+    """What a patched subprocess.run returns for a `claude` call that answers TEST_PDF_RESPONSE."""
+    return subprocess.CompletedProcess(
+        args=["claude"],
+        returncode=0,
+        stdout=json.dumps(TEST_PDF_RESPONSE),
+        stderr="",
+    )
+
+
+SAMPLE_SLIDES = [
+    SlideText(1, "Introduction to Machine Learning\nCS229 - Lecture 1"),
+    SlideText(2, "What is Machine Learning?\n- Arthur Samuel (1959)\n- Tom Mitchell (1998)"),
+    SlideText(3, "Types of Learning\n- Supervised\n- Unsupervised\n- Reinforcement"),
+    SlideText(4, "Linear Regression\nFitting a line to data"),
+    SlideText(5, "Cost Function\nJ(theta) = 1/2m sum (h(x) - y)^2"),
+    SlideText(6, "Gradient Descent\nIteratively minimize J(theta)"),
+    SlideText(7, "Learning Rate\nChoosing alpha"),
+    SlideText(8, "Summary\nKey takeaways from today"),
+]
+
+
+SAMPLE_RESPONSE = {
+    "lecture_title": "Introduction to Machine Learning",
+    "sections": [
+        {"title": "Introduction & ML Overview", "start_page": 1, "end_page": 3, "summary": "Defines ML and categorizes learning types."},
+        {"title": "Linear Regression", "start_page": 4, "end_page": 5, "summary": "Introduces linear regression and the cost function."},
+        {"title": "Gradient Descent", "start_page": 6, "end_page": 7, "summary": "Covers gradient descent optimization and learning rate."},
+        {"title": "Summary", "start_page": 8, "end_page": 8, "summary": "Recap of key concepts."},
+    ],
+}
+
+
+def make_pdf(path: Path, num_pages: int = 4) -> Path:
+    """A small deck whose slide text names the file, so each PDF extracts differently."""
+    doc = fitz.open()
+    for i in range(num_pages):
+        page = doc.new_page(width=720, height=540)
+        page.insert_text((72, 72), f"{path.stem} slide {i + 1}", fontsize=20)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def fake_detect(slides):
+    """A detector that makes one section of everything, without Claude."""
+    return LecturePlan("Lecture", [Section("All", 1, len(slides), "Everything.")])
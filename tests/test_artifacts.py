@@ -0,0 +1,140 @@
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+import fitz
+import pytest
+from click.testing import CliRunner
+
+from lecture_split.artifacts import (
+    ArtifactError, SourceInfo, load_plan, load_slides, plan_path_for, save_plan, save_slides,
+)
+from lecture_split.bundle import Bundle
+from lecture_split.cli import main
+from lecture_split.models import LecturePlan, Section, SlideText
+from tests.conftest import TEST_PDF_RESPONSE, make_test_pdf, mock_claude_result
+
+
+def test_slides_round_trip(tmp_path):
+    slides = [SlideText(1, "Intro – ünïcode"), SlideText(2, "")]
+    source = SourceInfo("deck.pdf", 2, "ab" * 32)
+    save_slides(tmp_path / "deck.slides.json", slides, source)
+    assert load_slides(tmp_path / "deck.slides.json") == (slides, source)
+
+
+def test_plan_round_trip_and_bare_plans(tmp_path):
+    plan = LecturePlan.from_dict(TEST_PDF_RESPONSE)
+    save_plan(tmp_path / "plan.json", plan)
+    assert load_plan(tmp_path) == (plan, None)
+
+    (tmp_path / "bare.json").write_text(json.dumps(TEST_PDF_RESPONSE))
+    assert load_plan(tmp_path / "bare.json") == (plan, None)
+
+
+def test_artifacts_are_checked(tmp_path):
+    save_slides(tmp_path / "x.slides.json", [SlideText(1, "a")])
+    with pytest.raises(ArtifactError, match="not a plan file"):
+        load_plan(tmp_path / "x.slides.json")
+
+    data = json.loads((tmp_path / "x.slides.json").read_text())
+    data["version"] = 99
+    (tmp_path / "x.slides.json").write_text(json.dumps(data))
+    with pytest.raises(ArtifactError, match="version 99"):
+        load_slides(tmp_path / "x.slides.json")
+
+
+def test_plan_path_for():
+    assert plan_path_for(Path("a/deck.slides.json")) == Path("a/deck.plan.json")
+    assert plan_path_for(Path("a/deck.pdf")) == Path("a/deck.plan.json")
+
+
+def test_staged_pipeline_matches_single_run(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    runner = CliRunner()
+
+    result = runner.invoke(main, ["extract", str(pdf_path), "--no-cache"])
+    assert result.exit_code == 0, result.output
+    slides_path = tmp_path / "lecture.slides.json"
+    slides, source = load_slides(slides_path)
+    assert len(slides) == 6 and source.page_count == 6
+
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()) as run:
+        result = runner.invoke(main, ["detect", str(slides_path), "--no-cache"])
+    assert result.exit_code == 0, result.output
+    assert run.call_count == 1
+    plan_path = tmp_path / "lecture.plan.json"
+
+    # Splitting and rendering with the plan never calls Claude.
+    with patch("lecture_split.section_detector.subprocess.run") as run:
+        staged = runner.invoke(main, ["split", str(pdf_path), "--plan", str(plan_path), "-o", str(tmp_path / "a")])
+        rendered = runner.invoke(main, ["render", str(plan_path), "-o", str(tmp_path / "r"), "--preamble-token-budget", "50"])
+    assert staged.exit_code == 0, staged.output
+    assert rendered.exit_code == 0, rendered.output
+    run.assert_not_called()
+
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()):
+        result = runner.invoke(main, [str(pdf_path), "--no-cache", "-o", str(tmp_path / "b")])
+    assert result.exit_code == 0, result.output
+
+    names = sorted(p.name for p in (tmp_path / "a").iterdir())
+    assert names == sorted(p.name for p in (tmp_path / "b").iterdir())
+    assert "plan.json" in names
+    for name in names:
+        if name.endswith(".md"):
+            assert (tmp_path / "a" / name).read_text() == (tmp_path / "b" / name).read_text()
+    assert load_plan(tmp_path / "b") == load_plan(plan_path)
+    assert sorted(p.name for p in (tmp_path / "r").iterdir()) == sorted(n for n in names if n.endswith(".md"))
+
+
+def test_split_rejects_a_plan_for_another_deck(tmp_path):
+    plan_path = save_plan(
+        tmp_path / "plan.json", LecturePlan.from_dict(TEST_PDF_RESPONSE), SourceInfo("other.pdf", 40, "00")
+    )
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    result = CliRunner().invoke(main, ["split", str(pdf_path), "--plan", str(plan_path)])
+    assert result.exit_code != 0
+    assert "40 pages" in result.output
+
+
+def test_bundle_plan_records_its_source(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    save_plan(tmp_path / "plan.json", LecturePlan.from_dict(TEST_PDF_RESPONSE))
+    result = CliRunner().invoke(
+        main, ["split", str(pdf_path), "--plan", str(tmp_path / "plan.json"), "--format", "bundle"]
+    )
+    assert result.exit_code == 0, result.output
+    with Bundle(tmp_path / "lecture_sections.zip") as bundle:
+        assert bundle.source == SourceInfo.of_pdf(pdf_path)
+        assert bundle.plan == LecturePlan.from_dict(TEST_PDF_RESPONSE)
+
+
+def test_incremental_run_after_split_plan_starts_from_that_plan(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    out = tmp_path / "out"
+    runner = CliRunner()
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()):
+        assert runner.invoke(main, [str(pdf_path), "--no-cache", "-o", str(out)]).exit_code == 0
+    save_plan(tmp_path / "one.json", LecturePlan("Lecture", [Section("All", 1, 6, "Everything.")]))
+    result = runner.invoke(main, [str(pdf_path), "--plan", str(tmp_path / "one.json"), "-o", str(out)])
+    assert result.exit_code == 0, result.output
+
+    with patch("lecture_split.section_detector.subprocess.run") as run:
+        result = runner.invoke(main, [str(pdf_path), "--no-cache", "--incremental", "-o", str(out)])
+    assert result.exit_code == 0, result.output
+    run.assert_not_called()
+    assert sorted(p.name for p in out.glob("section-*.pdf")) == ["section-01.pdf"]
+    assert fitz.open(out / "section-01.pdf").page_count == 6
+
+
+def test_split_plan_needs_no_backend_and_extracts_only_for_files(tmp_path, monkeypatch):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    save_plan(tmp_path / "one.json", LecturePlan("Lecture", [Section("All", 1, 6, "Everything.")]))
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    runner = CliRunner()
+    with patch("lecture_split.cli.extract_slide_texts") as extract:
+        result = runner.invoke(main, [
+            str(pdf_path), "--plan", str(tmp_path / "one.json"), "--backend", "http",
+            "--format", "bundle", "-o", str(tmp_path / "out.zip"),
+        ])
+    assert result.exit_code == 0, result.output
+    extract.assert_not_called()
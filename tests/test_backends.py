@@ -0,0 +1,174 @@
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from click.testing import CliRunner
+
+from lecture_split.backends import AnthropicHTTPBackend, BackendError, get_backend
+from lecture_split.cli import main
+from lecture_split.section_detector import SYSTEM_PROMPT, detect_sections
+from tests.conftest import SAMPLE_RESPONSE, SAMPLE_SLIDES, make_test_pdf
+
+
+class _MessagesHandler(BaseHTTPRequestHandler):
+    """Stand-in for the messages API that records each request and its client port."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            data = b""
+            while size := int(self.rfile.readline().strip(), 16):
+                data += self.rfile.read(size)
+                self.rfile.readline()
+            self.rfile.readline()
+            return data
+        return self.rfile.read(int(self.headers["Content-Length"]))
+
+    def do_POST(self):
+        request = json.loads(self._body())
+        self.server.requests.append((self.client_address[1], self.path, dict(self.headers), request))
+        time.sleep(self.server.delays.get(request["model"], 0))
+        status, reply = self.server.replies.pop(0) if self.server.replies else (200, None)
+        if reply is None:
+            reply = {"content": [{"type": "text", "text": json.dumps(SAMPLE_RESPONSE)}]}
+        content_type = "application/json"
+        data = json.dumps(reply).encode()
+        if request.get("stream") and status == 200:
+            content_type = "text/event-stream"
+            data = _server_sent_events(reply["content"][0]["text"])
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _server_sent_events(text: str) -> bytes:
+    """The messages API's event stream for a reply of ``text``, in 10-character deltas."""
+    events = [("message_start", {"type": "message_start"}), ("ping", {"type": "ping"})]
+    events += [
+        ("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                 "delta": {"type": "text_delta", "text": text[i:i + 10]}})
+        for i in range(0, len(text), 10)
+    ]
+    events.append(("message_stop", {"type": "message_stop"}))
+    return "".join(f"event: {name}\ndata: {json.dumps(data)}\n\n" for name, data in events).encode()
+
+
+@pytest.fixture
+def api():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MessagesHandler)
+    server.daemon_threads = True
+    server.requests = []
+    server.replies = []
+    server.delays = {}  # seconds to wait before answering, by model
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _backend(api, **kwargs):
+    return AnthropicHTTPBackend(api_key="test-key", base_url=f"http://127.0.0.1:{api.server_address[1]}", **kwargs)
+
+
+def test_http_backend_sends_a_messages_request(api):
+    backend = _backend(api)
+    assert backend.complete("sonnet", "be brief", "hello é") == json.dumps(SAMPLE_RESPONSE)
+
+    [(_, path, headers, request)] = api.requests
+    assert path == "/v1/messages"
+    assert headers["x-api-key"] == "test-key"
+    assert headers["anthropic-version"] == "2023-06-01"
+    assert request["model"] == "claude-sonnet-4-5"
+    assert request["system"] == "be brief"
+    assert request["messages"] == [{"role": "user", "content": "hello é"}]
+
+
+def test_http_backend_reuses_one_connection(api):
+    backend = _backend(api)
+    for _ in range(5):
+        detect_sections(SAMPLE_SLIDES, backend=backend)
+
+    ports = {port for port, *_ in api.requests}
+    assert len(api.requests) == 5
+    assert len(ports) == 1
+    assert backend.pool.created == 1
+    assert api.requests[0][3]["system"] == SYSTEM_PROMPT
+
+
+def test_http_backend_streams_a_chunked_body(api):
+    backend = _backend(api)
+    # A multi-byte character split across reads must survive.
+    body = io.BytesIO(("x" * (64 * 1024 - 1) + "é end").encode())
+    plan = detect_sections(SAMPLE_SLIDES, backend=backend, memory_budget=1024)
+    backend.complete_streaming("haiku", "s", b"head \"quoted\"\n", body)
+
+    assert len(plan.sections) == 4
+    content = api.requests[1][3]["messages"][0]["content"]
+    assert content == "head \"quoted\"\n" + "x" * (64 * 1024 - 1) + "é end"
+    assert api.requests[1][3]["model"] == "claude-haiku-4-5"
+    assert api.requests[0][3]["messages"][0]["content"].startswith("Analyze these 8 lecture slides")
+
+
+def test_http_backend_errors_are_retried(api):
+    api.replies = [(529, {"error": "overloaded"}), (200, {"content": []})]
+    with pytest.raises(BackendError, match="529"):
+        _backend(api).complete("sonnet", "s", "p")
+
+    api.replies = [(500, {"error": "boom"})]
+    plan = detect_sections(SAMPLE_SLIDES, backend=_backend(api), retries=1, backoff=0)
+    assert len(plan.sections) == 4
+
+
+def test_http_backend_needs_an_api_key(monkeypatch):
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    with pytest.raises(BackendError, match="ANTHROPIC_API_KEY"):
+        get_backend("http")
+
+
+def test_cli_backend_option_from_environment(api, tmp_path, monkeypatch):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    monkeypatch.setenv("LECTURE_SPLIT_BACKEND", "http")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", f"http://127.0.0.1:{api.server_address[1]}")
+
+    result = CliRunner().invoke(main, [str(pdf_path), "--no-cache"])
+
+    assert result.exit_code == 0, result.output
+    assert len(api.requests) == 1
+
+
+def test_http_backend_streams_the_reply(api):
+    backend = _backend(api)
+    pieces = list(backend.stream("sonnet", "be brief", "hello"))
+    assert len(pieces) > 1
+    assert "".join(pieces) == json.dumps(SAMPLE_RESPONSE)
+    assert api.requests[0][3]["stream"] is True
+    # The connection is reused once the stream has been read to the end.
+    backend.complete("sonnet", "be brief", "hello")
+    assert backend.pool.created == 1
+
+    api.replies.append((529, {"type": "error", "error": {"type": "overloaded_error"}}))
+    with pytest.raises(BackendError, match="HTTP 529"):
+        list(backend.stream("sonnet", "be brief", "hello"))
+
+
+def test_http_backend_hedging_cancels_the_slow_call(api):
+    api.delays["slow"] = 5
+    attempts = []
+    started = time.monotonic()
+    plan = detect_sections(
+        SAMPLE_SLIDES, model="slow", hedge_after=0.2, hedge_model="fast", attempts=attempts, backend=_backend(api)
+    )
+    assert time.monotonic() - started < 2
+    assert len(plan.sections) == 4
+    assert [(a.model, a.outcome, a.won) for a in attempts] == [("slow", "cancelled", False), ("fast", "ok", True)]
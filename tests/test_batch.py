@@ -0,0 +1,112 @@
+import json
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from lecture_split.batch import find_pdfs, process_batch
+from lecture_split.cli import main
+from tests.conftest import fake_detect, make_pdf
+
+
+MOCK_RESPONSE = {
+    "lecture_title": "Lecture",
+    "sections": [
+        {"title": "First", "start_page": 1, "end_page": 2, "summary": "First half."},
+        {"title": "Second", "start_page": 3, "end_page": 4, "summary": "Second half."},
+    ],
+}
+
+
+def _mock_subprocess_result():
+    return subprocess.CompletedProcess(
+        args=["claude"], returncode=0, stdout=json.dumps(MOCK_RESPONSE), stderr=""
+    )
+
+
+@pytest.fixture
+def lecture_dir(tmp_path) -> Path:
+    d = tmp_path / "course"
+    d.mkdir()
+    for name in ["week1", "week2", "week3"]:
+        make_pdf(d / f"{name}.pdf")
+    (d / "notes.txt").write_text("not a pdf")
+    return d
+
+
+def test_find_pdfs_expands_directories(lecture_dir):
+    names = [p.name for p in find_pdfs([lecture_dir])]
+    assert names == ["week1.pdf", "week2.pdf", "week3.pdf"]
+
+
+def test_process_batch_writes_outputs_per_pdf(lecture_dir, tmp_path):
+    out = tmp_path / "out"
+    results = process_batch(find_pdfs([lecture_dir]), output_root=out, detect=fake_detect, jobs=2)
+    assert [r.ok for r in results] == [True, True, True]
+    for name in ["week1", "week2", "week3"]:
+        assert (out / f"{name}_sections" / "section-01.pdf").exists()
+        assert (out / f"{name}_sections" / "manifest.md").exists()
+
+
+def test_process_batch_records_failures_without_aborting(lecture_dir, tmp_path):
+    def flaky_detect(slides):
+        if "week2" in slides[0].text:
+            raise RuntimeError("claude exploded")
+        return fake_detect(slides)
+
+    results = process_batch(find_pdfs([lecture_dir]), output_root=tmp_path / "out", detect=flaky_detect, jobs=2)
+    assert [r.ok for r in results] == [True, False, True]
+    assert "claude exploded" in results[1].error
+
+
+def test_process_batch_bounds_concurrent_detect_calls(lecture_dir, tmp_path):
+    import threading
+    import time
+
+    lock = threading.Lock()
+    in_flight = peak = 0
+
+    def slow_detect(slides):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight -= 1
+        return fake_detect(slides)
+
+    process_batch(find_pdfs([lecture_dir]), output_root=tmp_path / "out", detect=slow_detect, max_detect_calls=1)
+    assert peak == 1
+
+
+def test_cli_batch_directory(lecture_dir, tmp_path):
+    out = tmp_path / "out"
+    runner = CliRunner()
+    with patch("lecture_split.section_detector.subprocess.run", return_value=_mock_subprocess_result()):
+        result = runner.invoke(main, [str(lecture_dir), "-o", str(out), "-j", "2"])
+    assert result.exit_code == 0, result.output
+    assert "3 succeeded, 0 failed" in result.output
+    assert len(list(out.glob("*_sections/section-*.pdf"))) == 6
+
+
+def test_cli_batch_reports_failures(lecture_dir, tmp_path):
+    runner = CliRunner()
+    with patch("lecture_split.section_detector.subprocess.run", side_effect=subprocess.CalledProcessError(1, "claude")):
+        result = runner.invoke(main, [str(lecture_dir), "-o", str(tmp_path / "out")])
+    assert result.exit_code != 0
+    assert "0 succeeded, 3 failed" in result.output
+
+
+@pytest.mark.parametrize(
+    "option", [["--incremental"], ["--memory-budget", "1"], ["--extract-workers", "2"], ["--split-workers", "2"]]
+)
+def test_cli_batch_rejects_single_pdf_options(lecture_dir, tmp_path, option):
+    with patch("lecture_split.section_detector.subprocess.run") as run:
+        result = CliRunner().invoke(main, [str(lecture_dir), "-o", str(tmp_path / "out"), *option])
+    assert result.exit_code != 0
+    assert option[0] in result.output
+    assert "applies to a single PDF, not a batch" in result.output
+    run.assert_not_called()
@@ -0,0 +1,85 @@
+import zipfile
+from unittest.mock import patch
+
+import fitz
+import pytest
+from click.testing import CliRunner
+
+from lecture_split.bundle import Bundle, write_bundle
+from lecture_split.cli import main
+from lecture_split.context_generator import generate_all_preambles, generate_manifest
+from lecture_split.models import LecturePlan
+from tests.conftest import TEST_PDF_RESPONSE, make_test_pdf, mock_claude_result
+
+PLAN = LecturePlan.from_dict(TEST_PDF_RESPONSE)
+
+
+def test_bundle_round_trip(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    bundle_path = write_bundle(pdf_path, PLAN, tmp_path / "out" / "lecture.zip")
+    with Bundle(bundle_path) as bundle:
+        assert len(bundle) == 3
+        assert bundle.plan == PLAN
+        assert bundle.manifest() == generate_manifest(PLAN)
+        assert bundle.preamble(2) == generate_all_preambles(PLAN)[1]
+        doc = fitz.open(stream=bundle.section_pdf(2), filetype="pdf")
+        assert doc.page_count == 3
+        assert "Perceptrons" in doc[0].get_text()
+        with pytest.raises(IndexError):
+            bundle.section_pdf(4)
+    assert not list((tmp_path / "out").glob("*.tmp"))
+
+
+def test_bundle_layout_is_sequential_and_indexed(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    bundle_path = write_bundle(pdf_path, PLAN, tmp_path / "lecture.zip", workers=2)
+    with zipfile.ZipFile(bundle_path) as zf:
+        infos = zf.infolist()
+    assert [i.filename for i in infos] == [
+        "plan.json", "manifest.md",
+        "section-01.pdf", "section-01.md",
+        "section-02.pdf", "section-02.md",
+        "section-03.pdf", "section-03.md",
+    ]
+    offsets = [i.header_offset for i in infos]
+    assert offsets == sorted(offsets)
+    assert all(i.compress_type == zipfile.ZIP_STORED for i in infos if i.filename.endswith(".pdf"))
+
+
+def test_extract_section(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    with Bundle(write_bundle(pdf_path, PLAN, tmp_path / "lecture.zip")) as bundle:
+        pdf, md = bundle.extract_section(3, tmp_path / "one")
+    assert fitz.open(pdf).page_count == 1
+    assert md.read_text().startswith("You are a tutor")
+    assert sorted(p.name for p in (tmp_path / "one").iterdir()) == ["section-03.md", "section-03.pdf"]
+
+
+def test_cli_bundle_format_writes_one_file(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    runner = CliRunner()
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()):
+        result = runner.invoke(main, [str(pdf_path), "--format", "bundle"])
+    assert result.exit_code == 0, result.output
+    assert not (tmp_path / "lecture_sections").exists()
+    with Bundle(tmp_path / "lecture_sections.zip") as bundle:
+        assert len(bundle) == 3
+
+
+def test_cli_batch_bundle_format(tmp_path):
+    lectures = tmp_path / "lectures"
+    lectures.mkdir()
+    for name in ("a", "b"):
+        make_test_pdf(lectures / f"{name}.pdf")
+    runner = CliRunner()
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()):
+        result = runner.invoke(main, [str(lectures), "-o", str(tmp_path / "out"), "--format", "bundle"])
+    assert result.exit_code == 0, result.output
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["a_sections.zip", "b_sections.zip"]
+
+
+def test_cli_bundle_rejects_incremental(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    result = CliRunner().invoke(main, [str(pdf_path), "--format", "bundle", "--incremental"])
+    assert result.exit_code != 0
+    assert "--incremental" in result.output
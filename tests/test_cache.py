@@ -0,0 +1,100 @@
+import os
+import time
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from lecture_split.cache import PlanCache, plan_cache_key
+from lecture_split.cli import main
+from lecture_split.models import LecturePlan, Section, SlideText
+from lecture_split.section_detector import SYSTEM_PROMPT, detect_sections
+from tests.conftest import make_test_pdf, mock_claude_result
+
+
+SLIDES = [SlideText(1, "Intro\nHello"), SlideText(2, "Body"), SlideText(3, "Outro")]
+
+PLAN = LecturePlan("Lecture", [Section("All", 1, 3, "Everything.")])
+
+
+def _key(slides, model="sonnet"):
+    return plan_cache_key(slides, model=model, system_prompt=SYSTEM_PROMPT)
+
+
+def test_key_ignores_whitespace_differences():
+    other = [SlideText(1, "Intro   Hello  "), SlideText(2, "Body\n"), SlideText(3, "Outro")]
+    assert _key(SLIDES) == _key(other)
+
+
+def test_key_depends_on_text_model_and_prompt():
+    changed = [SlideText(1, "Intro"), SlideText(2, "Body"), SlideText(3, "Outro")]
+    assert _key(SLIDES) != _key(changed)
+    assert _key(SLIDES) != _key(SLIDES, model="opus")
+    assert _key(SLIDES) != plan_cache_key(SLIDES, model="sonnet", system_prompt="other")
+
+
+def test_cache_roundtrip_and_counters(tmp_path):
+    cache = PlanCache(tmp_path)
+    assert cache.get("abc") is None
+    cache.put("abc", PLAN)
+    assert cache.get("abc") == PLAN
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_expires_old_entries(tmp_path):
+    cache = PlanCache(tmp_path, max_age=60)
+    cache.put("abc", PLAN)
+    old = time.time() - 120
+    os.utime(tmp_path / "abc.json", (old, old))
+    assert cache.get("abc") is None
+    assert not (tmp_path / "abc.json").exists()
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = PlanCache(tmp_path, max_entries=2)
+    for i, key in enumerate(["a", "b"]):
+        cache.put(key, PLAN)
+        os.utime(tmp_path / f"{key}.json", (1000 + i, time.time() - 100 + i))
+    cache.get("a")  # touch: "b" is now the least recently used
+    cache.put("c", PLAN)
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["a", "c"]
+
+
+def test_detect_sections_cache_hit_skips_subprocess(tmp_path):
+    cache = PlanCache(tmp_path)
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()) as mock_run:
+        first = detect_sections(SLIDES, cache=cache)
+        second = detect_sections(SLIDES, cache=cache)
+    assert mock_run.call_count == 1
+    assert first == second
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_detect_sections_refresh_bypasses_lookup(tmp_path):
+    cache = PlanCache(tmp_path)
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()) as mock_run:
+        detect_sections(SLIDES, cache=cache)
+        detect_sections(SLIDES, cache=cache, refresh=True)
+    assert mock_run.call_count == 2
+
+
+def test_cli_reports_cache_hit_on_rerun(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    runner = CliRunner()
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()) as mock_run:
+        runner.invoke(main, [str(pdf_path), "-o", str(tmp_path / "a")])
+        result = runner.invoke(main, [str(pdf_path), "-o", str(tmp_path / "b")])
+    assert result.exit_code == 0, result.output
+    assert mock_run.call_count == 1
+    assert "1 hit(s), 0 miss(es)" in result.output
+    assert (tmp_path / "b" / "section-01.pdf").exists()
+
+
+def test_cli_no_cache_always_calls_claude(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    runner = CliRunner()
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()) as mock_run:
+        runner.invoke(main, [str(pdf_path), "-o", str(tmp_path / "a"), "--no-cache"])
+        result = runner.invoke(main, [str(pdf_path), "-o", str(tmp_path / "b"), "--no-cache"])
+    assert result.exit_code == 0, result.output
+    assert mock_run.call_count == 2
+    assert "Plan cache" not in result.output
@@ -1,6 +1,6 @@
 import json
+import os
 import subprocess
-from pathlib import Path
 from unittest.mock import patch
 
 import fitz
@@ -8,79 +8,43 @@ import pytest
 from click.testing import CliRunner
 
 from lecture_split.cli import main
-
-
-def _make_test_pdf(path: Path, num_pages: int = 6) -> Path:
-    doc = fitz.open()
-    topics = [
-        "Intro to Deep Learning\nCS231n",
-        "What are Neural Networks?\nBiological inspiration",
-        "Perceptrons\nSingle layer networks",
-        "Backpropagation\nChain rule applied",
-        "Training Tips\nBatch norm, dropout",
-        "Summary\nKey takeaways",
-    ]
-    for i in range(num_pages):
-        page = doc.new_page(width=720, height=540)
-        page.insert_text((72, 72), topics[i % len(topics)], fontsize=20)
-    doc.save(str(path))
-    doc.close()
-    return path
-
-
-MOCK_API_RESPONSE = {
-    "lecture_title": "Intro to Deep Learning",
-    "sections": [
-        {"title": "Introduction", "start_page": 1, "end_page": 2, "summary": "Introduces deep learning and neural networks."},
-        {"title": "Core Concepts", "start_page": 3, "end_page": 5, "summary": "Covers perceptrons, backprop, and training."},
-        {"title": "Summary", "start_page": 6, "end_page": 6, "summary": "Recap."},
-    ],
-}
-
-
-def _mock_subprocess_result():
-    return subprocess.CompletedProcess(
-        args=["claude"],
-        returncode=0,
-        stdout=json.dumps(MOCK_API_RESPONSE),
-        stderr="",
-    )
+from tests.conftest import TEST_PDF_RESPONSE, make_test_pdf, mock_claude_result
 
 
 def test_cli_runs_successfully(tmp_path):
-    pdf_path = _make_test_pdf(tmp_path / "lecture.pdf")
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
     out_dir = tmp_path / "output"
     runner = CliRunner()
-    with patch("lecture_split.section_detector.subprocess.run", return_value=_mock_subprocess_result()):
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()):
         result = runner.invoke(main, [str(pdf_path), "--output", str(out_dir)])
     assert result.exit_code == 0, result.output
 
 
 def test_cli_creates_section_pdfs(tmp_path):
-    pdf_path = _make_test_pdf(tmp_path / "lecture.pdf")
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
     out_dir = tmp_path / "output"
     runner = CliRunner()
-    with patch("lecture_split.section_detector.subprocess.run", return_value=_mock_subprocess_result()):
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()):
         runner.invoke(main, [str(pdf_path), "--output", str(out_dir)])
     pdfs = sorted(out_dir.glob("section-*.pdf"))
     assert len(pdfs) == 3
 
 
 def test_cli_creates_section_markdowns(tmp_path):
-    pdf_path = _make_test_pdf(tmp_path / "lecture.pdf")
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
     out_dir = tmp_path / "output"
     runner = CliRunner()
-    with patch("lecture_split.section_detector.subprocess.run", return_value=_mock_subprocess_result()):
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()):
         runner.invoke(main, [str(pdf_path), "--output", str(out_dir)])
     mds = sorted(out_dir.glob("section-*.md"))
     assert len(mds) == 3
 
 
 def test_cli_creates_manifest(tmp_path):
-    pdf_path = _make_test_pdf(tmp_path / "lecture.pdf")
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
     out_dir = tmp_path / "output"
     runner = CliRunner()
-    with patch("lecture_split.section_detector.subprocess.run", return_value=_mock_subprocess_result()):
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()):
         runner.invoke(main, [str(pdf_path), "--output", str(out_dir)])
     manifest = out_dir / "manifest.md"
     assert manifest.exists()
@@ -95,10 +59,10 @@ def test_cli_missing_pdf():
 
 
 def test_cli_manifest_contains_all_sections(tmp_path):
-    pdf_path = _make_test_pdf(tmp_path / "lecture.pdf")
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
     out_dir = tmp_path / "output"
     runner = CliRunner()
-    with patch("lecture_split.section_detector.subprocess.run", return_value=_mock_subprocess_result()):
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()):
         runner.invoke(main, [str(pdf_path), "--output", str(out_dir)])
     content = (out_dir / "manifest.md").read_text()
     assert "Introduction" in content
@@ -107,12 +71,105 @@ def test_cli_manifest_contains_all_sections(tmp_path):
 
 
 def test_cli_manifest_contains_teaching_prompt(tmp_path):
-    pdf_path = _make_test_pdf(tmp_path / "lecture.pdf")
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
     out_dir = tmp_path / "output"
     runner = CliRunner()
-    with patch("lecture_split.section_detector.subprocess.run", return_value=_mock_subprocess_result()):
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()):
         runner.invoke(main, [str(pdf_path), "--output", str(out_dir)])
     content = (out_dir / "manifest.md").read_text()
     assert "System Prompt" in content
     assert "You are a tutor" in content
     assert "Teaching style:" in content
+
+
+def test_cli_memory_budget_streams_into_claude(tmp_path, monkeypatch):
+    script = tmp_path / "bin" / "claude"
+    script.parent.mkdir()
+    script.write_text(f"#!/bin/sh\ncat > /dev/null\necho '{json.dumps(TEST_PDF_RESPONSE)}'\n")
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{script.parent}:{os.environ['PATH']}")
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    out_dir = tmp_path / "output"
+    runner = CliRunner()
+    result = runner.invoke(main, [str(pdf_path), "--output", str(out_dir), "--memory-budget", "1"])
+    assert result.exit_code == 0, result.output
+    assert len(list(out_dir.glob("section-*.pdf"))) == 3
+
+
+@pytest.mark.parametrize("option", [["--window-size", "10"], ["--compact"], ["--max-prompt-tokens", "500"]])
+def test_cli_memory_budget_rejects_options_it_would_ignore(tmp_path, option):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    result = CliRunner().invoke(main, [str(pdf_path), "--memory-budget", "1", *option])
+    assert result.exit_code != 0
+    assert option[0] in result.output
+    assert "cannot be combined with --memory-budget" in result.output
+
+
+def test_cli_offline_does_not_call_claude(tmp_path):
+    pytest.importorskip("numpy")
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    out_dir = tmp_path / "output"
+    runner = CliRunner()
+    with patch("lecture_split.section_detector.subprocess.run") as run:
+        result = runner.invoke(main, [str(pdf_path), "--output", str(out_dir), "--offline"])
+    assert result.exit_code == 0, result.output
+    run.assert_not_called()
+    assert "Detecting section boundaries locally" in result.output
+    assert (out_dir / "section-01.pdf").exists()
+    assert (out_dir / "manifest.md").exists()
+
+
+@pytest.mark.parametrize(
+    "command, options",
+    [
+        ([], ["--window-size", "6", "--window-overlap", "2"]),
+        ([], ["--hedge-after", "1", "--retries", "3", "--timeout", "1"]),
+        (["detect"], ["--backend", "http"]),
+    ],
+)
+def test_cli_offline_rejects_claude_options(tmp_path, command, options):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    result = CliRunner().invoke(main, [*command, str(pdf_path), "--offline", *options])
+    assert result.exit_code == 2
+    assert "cannot be combined with --offline" in result.output
+    for option in options[::2]:
+        assert option in result.output
+
+
+def test_cli_collapse_builds_sends_each_build_once(tmp_path):
+    doc = fitz.open()
+    for i in range(4):
+        page = doc.new_page(width=720, height=540)
+        page.insert_text((72, 72), "\n".join(["Perceptrons"] + [f"point {c}" for c in "abcd"[:i + 1]]), fontsize=20)
+    for title in ["Backpropagation", "Summary"]:
+        doc.new_page(width=720, height=540).insert_text((72, 72), title, fontsize=20)
+    pdf_path = tmp_path / "builds.pdf"
+    doc.save(str(pdf_path))
+    out_dir = tmp_path / "output"
+    response = {
+        "lecture_title": "Builds",
+        "sections": [
+            {"title": "Perceptrons", "start_page": 1, "end_page": 1, "summary": "."},
+            {"title": "Rest", "start_page": 2, "end_page": 3, "summary": "."},
+        ],
+    }
+    completed = subprocess.CompletedProcess(args=["claude"], returncode=0, stdout=json.dumps(response), stderr="")
+    runner = CliRunner()
+    with patch("lecture_split.section_detector.subprocess.run", return_value=completed) as run:
+        result = runner.invoke(main, [str(pdf_path), "--output", str(out_dir), "--collapse-builds"])
+    assert result.exit_code == 0, result.output
+    assert "Collapsed 6 slides with animation builds into 3" in result.output
+    assert run.call_args.kwargs["input"].count("--- SLIDE") == 3
+    assert fitz.open(out_dir / "section-01.pdf").page_count == 4
+    assert fitz.open(out_dir / "section-02.pdf").page_count == 2
+
+
+def test_cli_split_subcommand_is_the_default(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    runner = CliRunner()
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()):
+        explicit = runner.invoke(main, ["split", str(pdf_path), "-o", str(tmp_path / "a")])
+        implicit = runner.invoke(main, [str(pdf_path), "-o", str(tmp_path / "b")])
+    assert explicit.exit_code == implicit.exit_code == 0
+    assert sorted(p.name for p in (tmp_path / "a").iterdir()) == sorted(p.name for p in (tmp_path / "b").iterdir())
+    assert "serve" in runner.invoke(main, ["--help"]).output
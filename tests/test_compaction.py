@@ -0,0 +1,57 @@
+import pytest
+
+from lecture_split.compaction import compact_slides, estimate_tokens, find_boilerplate
+from lecture_split.models import SlideText
+
+
+@pytest.fixture
+def slides():
+    bodies = [
+        "Introduction\nWhy we study graphs",
+        "Graph   Definitions\nVertices and   edges\n\n\nDirected vs undirected",
+        "Breadth-first search\nQueue based traversal",
+        "Depth-first search\nStack based traversal",
+        "Summary\nBFS vs DFS",
+    ]
+    return [
+        SlideText(i + 1, f"CS 201 Data Structures\n{body}\n{i + 1}\n© 2024 University")
+        for i, body in enumerate(bodies)
+    ]
+
+
+def test_find_boilerplate_detects_repeated_lines(slides):
+    assert find_boilerplate(slides) == {"CS 201 Data Structures", "© 2024 University"}
+
+
+def test_find_boilerplate_needs_several_pages():
+    two = [SlideText(1, "Header\nA"), SlideText(2, "Header\nB")]
+    assert find_boilerplate(two) == set()
+
+
+def test_compact_strips_boilerplate_numbers_and_whitespace(slides):
+    compacted, stats = compact_slides(slides)
+    assert compacted[1].text == "Graph Definitions\nVertices and edges\nDirected vs undirected"
+    assert all("CS 201" not in s.text and "©" not in s.text for s in compacted)
+    assert [s.page_number for s in compacted] == [1, 2, 3, 4, 5]
+    assert stats.tokens_after < stats.tokens_before
+    assert stats.boilerplate_lines == 2
+    assert stats.truncated_slides == 0
+
+
+def test_compact_respects_token_budget():
+    slides = [SlideText(1, "Short title")] + [
+        SlideText(i, f"Title {i}\n" + " ".join([f"word{i}"] * 200)) for i in range(2, 6)
+    ]
+    compacted, stats = compact_slides(slides, max_tokens=200)
+    assert stats.tokens_after <= 200
+    assert compacted[0].text == "Short title"
+    for s in compacted[1:]:
+        assert s.text.startswith(f"Title {s.page_number}\n")
+        assert s.text.endswith("…")
+    assert stats.truncated_slides == 4
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
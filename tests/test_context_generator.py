@@ -1,7 +1,13 @@
 import pytest
 
 from lecture_split.models import LecturePlan, Section
-from lecture_split.context_generator import generate_preamble, generate_all_preambles
+from lecture_split.compaction import estimate_tokens
+from lecture_split.context_generator import (
+    PreambleRenderer,
+    generate_all_preambles,
+    generate_preamble,
+    write_context_files,
+)
 
 
 @pytest.fixture
@@ -86,3 +92,52 @@ def test_every_preamble_contains_teaching_prompt(plan):
     for i in range(len(plan.sections)):
         md = generate_preamble(plan, i)
         assert "You are a tutor" in md
+
+
+def _long_plan(n=60):
+    return LecturePlan(
+        lecture_title="Long Lecture",
+        sections=[
+            Section(f"Topic {i + 1}", i + 1, i + 1, f"Summary of topic {i + 1}, " + "with details " * 10)
+            for i in range(n)
+        ],
+    )
+
+
+def test_renderer_matches_generate_preamble(plan):
+    renderer = PreambleRenderer(plan)
+    assert [renderer.render(i) for i in range(4)] == [generate_preamble(plan, i) for i in range(4)]
+
+
+def test_generous_budget_changes_nothing(plan):
+    assert generate_all_preambles(plan, token_budget=100_000) == generate_all_preambles(plan)
+
+
+def test_budget_caps_every_preamble():
+    plan = _long_plan()
+    unbounded = generate_all_preambles(plan)
+    assert max(estimate_tokens(p) for p in unbounded) > 1500
+    for budget in (400, 700, 1500):
+        for md in generate_all_preambles(plan, token_budget=budget):
+            assert estimate_tokens(md) <= budget
+
+
+def test_budget_elides_oldest_summaries_first():
+    md = generate_all_preambles(_long_plan(), token_budget=1500)[-1]
+    assert "earlier section summaries omitted" in md
+    assert "- **Topic 59**:" in md
+    assert "- **Topic 1**:" not in md
+    assert "1. Topic 1 (slides 1–1) ✓ covered" in md
+    assert "**Topic 60 (slides 60–60) ← YOU ARE HERE**" in md
+
+
+def test_tight_budget_trims_the_outline_around_the_current_section():
+    md = generate_all_preambles(_long_plan(), token_budget=400)[30]
+    assert "← YOU ARE HERE" in md
+    assert "not shown" in md
+    assert "Summary of topic 31" in md
+
+
+def test_write_context_files_applies_budget(tmp_path):
+    paths = write_context_files(_long_plan(), tmp_path, token_budget=500)
+    assert all(estimate_tokens(p.read_text()) <= 500 for p in paths)
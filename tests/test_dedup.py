@@ -0,0 +1,67 @@
+from lecture_split.dedup import BuildRun, collapse_builds, expand_plan, find_build_runs, shingles
+from lecture_split.models import LecturePlan, Section, SlideText
+
+
+def _builds(title: str, bullets: list[str], first_page: int) -> list[SlideText]:
+    """One page per build step, each adding a bullet, with a changing slide number."""
+    return [
+        SlideText(first_page + i, "\n".join([title, *bullets[:i + 1], str(first_page + i)]))
+        for i in range(len(bullets))
+    ]
+
+
+def _deck() -> list[SlideText]:
+    slides = [SlideText(1, "Lecture 7\nDynamic Programming")]
+    slides += _builds("Memoization", ["cache subproblem results", "top down recursion", "trade memory for time"], 2)
+    slides += [SlideText(5, "Tabulation\nfill a table bottom up")]
+    slides += _builds("Knapsack", ["items with weight and value", "table of capacity by item"], 6)
+    return slides
+
+
+def test_shingles_ignore_numbers_and_case():
+    assert shingles("Slide Title\n3") == shingles("slide  title\n4") == {("slide", "title")}
+    assert shingles("Intro") == {("intro",)}
+    assert shingles("") == set()
+
+
+def test_find_build_runs():
+    assert find_build_runs(_deck()) == [
+        BuildRun(1, 1), BuildRun(2, 4), BuildRun(5, 5), BuildRun(6, 7),
+    ]
+
+
+def test_textless_slides_are_not_merged():
+    slides = [SlideText(i, "") for i in range(1, 4)]
+    assert len(find_build_runs(slides)) == 3
+
+
+def test_unrelated_slides_are_not_merged():
+    slides = [SlideText(1, "Sorting\nquicksort"), SlideText(2, "Searching\nbinary search")]
+    assert len(find_build_runs(slides)) == 2
+
+
+def test_collapse_keeps_the_most_complete_build():
+    collapsed, runs = collapse_builds(_deck())
+    assert [s.page_number for s in collapsed] == [1, 2, 3, 4]
+    assert collapsed[1].text == "Memoization\ncache subproblem results\ntop down recursion\ntrade memory for time\n4"
+    assert len(runs) == 4
+
+
+def test_expand_plan_restores_original_pages():
+    _, runs = collapse_builds(_deck())
+    plan = LecturePlan("DP", [
+        Section("Intro", 1, 1, "a"),
+        Section("Memoization", 2, 3, "b"),
+        Section("Knapsack", 4, 4, "c"),
+    ])
+    expanded = expand_plan(plan, runs)
+    assert [(s.start_page, s.end_page) for s in expanded.sections] == [(1, 1), (2, 5), (6, 7)]
+    assert [s.title for s in expanded.sections] == ["Intro", "Memoization", "Knapsack"]
+
+
+def test_collapse_respects_offset_page_numbers():
+    slides = [SlideText(s.page_number + 10, s.text) for s in _deck()]
+    collapsed, runs = collapse_builds(slides)
+    assert [s.page_number for s in collapsed] == [1, 2, 3, 4]
+    plan = expand_plan(LecturePlan("DP", [Section("All", 1, 4, "")]), runs)
+    assert (plan.sections[0].start_page, plan.sections[0].end_page) == (11, 17)
@@ -0,0 +1,73 @@
+from unittest.mock import patch
+
+import fitz
+import pytest
+from click.testing import CliRunner
+
+from lecture_split import document
+from lecture_split.cli import main
+from lecture_split.document import PDFDocument
+from lecture_split.extractor import extract_slide_texts, iter_slide_texts
+from lecture_split.models import Section
+from lecture_split.splitter import iter_section_pdfs, split_pdf
+from lecture_split.store import ExtractionStore, file_hash
+from tests.conftest import make_test_pdf, mock_claude_result
+
+SECTIONS = [Section("A", 1, 2, ""), Section("B", 3, 5, ""), Section("C", 6, 6, "")]
+
+
+def test_document_lifetime(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    with PDFDocument(pdf_path) as doc:
+        assert doc.page_count == 6
+        assert doc.sha256 == file_hash(pdf_path)
+        assert doc.render_page(1).startswith(b"\x89PNG")
+    assert doc.closed
+    doc.close()  # closing twice is fine
+    with pytest.raises(ValueError, match="closed"):
+        doc.page_count
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        PDFDocument(tmp_path / "missing.pdf")
+
+
+def test_wrappers_accept_an_open_document(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    with PDFDocument(pdf_path) as doc:
+        assert extract_slide_texts(doc) == extract_slide_texts(pdf_path)
+        assert list(iter_slide_texts(doc, outline=True)) == list(iter_slide_texts(pdf_path, outline=True))
+        paths = split_pdf(doc, SECTIONS, tmp_path / "out")
+        pdfs = list(iter_section_pdfs(doc, SECTIONS))
+        assert not doc.closed  # the wrappers leave a document they did not open alone
+    assert [fitz.open(p).page_count for p in paths] == [2, 3, 1]
+    assert [fitz.open(stream=b, filetype="pdf").page_count for b in pdfs] == [2, 3, 1]
+
+
+def test_store_uses_the_document_hash(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    store = ExtractionStore(tmp_path / "store.sqlite3")
+    with PDFDocument(pdf_path) as doc:
+        extract_slide_texts(doc, store=store)
+    extract_slide_texts(pdf_path, store=store)
+    assert (store.hits, store.misses) == (1, 1)
+
+
+def test_cli_parses_the_pdf_once(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    real_open = fitz.open
+    parses = []
+
+    def counting_open(*args, **kwargs):
+        if args or kwargs.get("stream") is not None:
+            parses.append(args or "stream")
+        return real_open(*args, **kwargs)
+
+    with patch.object(document.fitz, "open", side_effect=counting_open), \
+            patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()):
+        result = CliRunner().invoke(main, [str(pdf_path), "--no-cache", "-o", str(tmp_path / "out")])
+
+    assert result.exit_code == 0, result.output
+    assert len(parses) == 1
+    assert len(list((tmp_path / "out").glob("section-*.pdf"))) == 3
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 import fitz
 import pytest
 from pathlib import Path
@@ -45,3 +47,30 @@ def test_extract_text_content(sample_pdf):
 def test_extract_nonexistent_file_raises():
     with pytest.raises(FileNotFoundError):
         extract_slide_texts(Path("/nonexistent/file.pdf"))
+
+
+@pytest.fixture
+def large_pdf(tmp_path, monkeypatch) -> Path:
+    monkeypatch.setattr("lecture_split.extractor.PARALLEL_MIN_PAGES", 10)
+    doc = fitz.open()
+    for i in range(25):
+        page = doc.new_page(width=720, height=540)
+        page.insert_text((72, 72), f"Slide number {i + 1}", fontsize=24)
+    pdf_path = tmp_path / "large.pdf"
+    doc.save(str(pdf_path))
+    doc.close()
+    return pdf_path
+
+
+def test_parallel_extract_matches_serial(large_pdf):
+    serial = extract_slide_texts(large_pdf)
+    parallel = extract_slide_texts(large_pdf, workers=3)
+    assert parallel == serial
+    assert [s.page_number for s in parallel] == list(range(1, 26))
+
+
+def test_parallel_extract_small_document_stays_serial(sample_pdf):
+    with patch("lecture_split.extractor.ProcessPoolExecutor") as pool:
+        results = extract_slide_texts(sample_pdf, workers=4)
+    pool.assert_not_called()
+    assert len(results) == 3
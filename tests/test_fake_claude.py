@@ -0,0 +1,23 @@
+import os
+import subprocess
+
+from lecture_split import fake_claude
+from lecture_split.models import SlideText
+from lecture_split.section_detector import detect_sections
+
+
+def test_fake_plan_groups_slides_into_fixed_sections():
+    prompt = "\n\n".join(f"--- SLIDE {i} ---\ntext" for i in range(1, 11))
+    plan = fake_claude.fake_plan(prompt, section_size=4)
+    assert [(s["start_page"], s["end_page"]) for s in plan["sections"]] == [(1, 4), (5, 8), (9, 10)]
+
+
+def test_installed_fake_claude_answers_detect_sections(tmp_path, monkeypatch):
+    path = fake_claude.install(tmp_path / "bin", section_size=3)
+    assert os.access(path, os.X_OK)
+    monkeypatch.setenv("PATH", f"{path.parent}:{os.environ['PATH']}")
+    assert subprocess.run(["which", "claude"], capture_output=True, text=True).stdout.strip() == str(path)
+
+    plan = detect_sections([SlideText(i, f"Slide {i}") for i in range(1, 8)])
+    assert plan.lecture_title == "Synthetic Lecture"
+    assert [(s.start_page, s.end_page) for s in plan.sections] == [(1, 3), (4, 6), (7, 7)]
@@ -0,0 +1,166 @@
+import json
+import os
+import subprocess
+from unittest.mock import patch
+
+import fitz
+import pytest
+from click.testing import CliRunner
+
+from lecture_split import fake_claude
+from lecture_split.artifacts import PLAN_FILE, save_plan
+from lecture_split.cli import main
+from lecture_split.incremental import STATE_FILE, OutputState, changed_sections, update_plan
+from lecture_split.models import LecturePlan, Section, SlideText
+
+
+@pytest.fixture
+def old_state():
+    slides = [SlideText(i, f"Slide {i}") for i in range(1, 10)]
+    plan = LecturePlan("Lecture", [
+        Section("A", 1, 3, "a"),
+        Section("B", 4, 6, "b"),
+        Section("C", 7, 9, "c"),
+    ])
+    return OutputState.build(slides, plan)
+
+
+def _one_section_detect(calls):
+    def detect(slides):
+        calls.append([s.text for s in slides])
+        return LecturePlan("ignored", [Section("New", 1, len(slides), "new")])
+    return detect
+
+
+def test_update_plan_unchanged_deck_detects_nothing(old_state):
+    calls = []
+    slides = [SlideText(i, f"Slide {i}") for i in range(1, 10)]
+    update = update_plan(old_state, slides, _one_section_detect(calls))
+    assert calls == []
+    assert update.redetected == []
+    assert update.plan == old_state.plan
+
+
+def test_update_plan_redetects_only_changed_section(old_state):
+    calls = []
+    slides = [SlideText(i, f"Slide {i}") for i in range(1, 10)]
+    slides[4] = SlideText(5, "Slide 5 with a typo fixed")
+    update = update_plan(old_state, slides, _one_section_detect(calls))
+    assert calls == [["Slide 4", "Slide 5 with a typo fixed", "Slide 6"]]
+    assert update.redetected == [(4, 6)]
+    assert [(s.title, s.start_page, s.end_page) for s in update.plan.sections] == [
+        ("A", 1, 3), ("New", 4, 6), ("C", 7, 9),
+    ]
+
+
+def test_update_plan_handles_inserted_pages(old_state):
+    calls = []
+    texts = [f"Slide {i}" for i in range(1, 10)]
+    texts[8:8] = ["Extra 1", "Extra 2"]  # insert before the last slide
+    slides = [SlideText(i + 1, t) for i, t in enumerate(texts)]
+    update = update_plan(old_state, slides, _one_section_detect(calls))
+    assert update.redetected == [(7, 11)]
+    assert [(s.title, s.start_page, s.end_page) for s in update.plan.sections] == [
+        ("A", 1, 3), ("B", 4, 6), ("New", 7, 11),
+    ]
+
+
+def test_changed_sections_compares_page_signatures(old_state, tmp_path):
+    for i in range(1, 4):
+        (tmp_path / f"section-{i:02d}.pdf").write_bytes(b"")
+    slides = [SlideText(i, f"Slide {i}") for i in range(1, 10)]
+    slides[7] = SlideText(8, "changed")
+    new_state = OutputState.build(slides, old_state.plan)
+    assert changed_sections(old_state, new_state, tmp_path) == [2]
+
+
+def test_state_roundtrip(old_state, tmp_path):
+    old_state.save(tmp_path)
+    assert OutputState.load(tmp_path) == old_state
+    assert OutputState.load(tmp_path / "missing") is None
+
+
+def _make_pdf(path, texts):
+    doc = fitz.open()
+    for text in texts:
+        page = doc.new_page(width=720, height=540)
+        page.insert_text((72, 72), text, fontsize=20)
+    doc.save(str(path))
+    doc.close()
+
+
+def _fake_claude(args, input, **kwargs):
+    count = input.count("--- SLIDE ")
+    sections = [{"title": "Whole", "start_page": 1, "end_page": count, "summary": "..."}]
+    if count == 6:
+        sections = [
+            {"title": "First", "start_page": 1, "end_page": 3, "summary": "..."},
+            {"title": "Second", "start_page": 4, "end_page": 6, "summary": "..."},
+        ]
+    stdout = json.dumps({"lecture_title": "Lecture", "sections": sections})
+    return subprocess.CompletedProcess(args=args, returncode=0, stdout=stdout, stderr="")
+
+
+def test_cli_incremental_rewrites_only_affected_files(tmp_path):
+    pdf_path = tmp_path / "lecture.pdf"
+    out = tmp_path / "out"
+    texts = [f"Topic slide {i}" for i in range(1, 7)]
+    _make_pdf(pdf_path, texts)
+    runner = CliRunner()
+    with patch("lecture_split.section_detector.subprocess.run", side_effect=_fake_claude):
+        runner.invoke(main, [str(pdf_path), "-o", str(out), "--no-cache"])
+    first_pdf = (out / "section-01.pdf").stat().st_mtime_ns
+
+    texts[4] = "Topic slide 5, revised"
+    _make_pdf(pdf_path, texts)
+    with patch("lecture_split.section_detector.subprocess.run", side_effect=_fake_claude) as mock_run:
+        result = runner.invoke(main, [str(pdf_path), "-o", str(out), "--no-cache", "--incremental"])
+    assert result.exit_code == 0, result.output
+    assert mock_run.call_count == 1
+    assert mock_run.call_args.kwargs["input"].count("--- SLIDE ") == 3
+    assert "Rewrote 1 of 2 section PDFs" in result.output
+    assert (out / "section-01.pdf").stat().st_mtime_ns == first_pdf
+    with fitz.open(str(out / "section-02.pdf")) as doc:
+        assert "revised" in doc[1].get_text()
+
+
+def _section_pages(out):
+    return [fitz.open(str(p)).page_count for p in sorted(out.glob("section-*.pdf"))]
+
+
+def test_cli_memory_budget_run_drops_the_saved_state(tmp_path, monkeypatch):
+    bin_dir = fake_claude.install(tmp_path / "bin", section_size=3).parent
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    pdf_path = tmp_path / "lecture.pdf"
+    out = tmp_path / "out"
+    _make_pdf(pdf_path, [f"Topic slide {i}" for i in range(1, 7)])
+    runner = CliRunner()
+    assert runner.invoke(main, [str(pdf_path), "-o", str(out), "--no-cache"]).exit_code == 0
+    assert (out / STATE_FILE).exists()
+
+    monkeypatch.setenv("FAKE_CLAUDE_SECTION_SIZE", "1")
+    result = runner.invoke(main, [str(pdf_path), "-o", str(out), "--no-cache", "--memory-budget", "1"])
+    assert result.exit_code == 0, result.output
+    assert not (out / STATE_FILE).exists()
+
+    result = runner.invoke(main, [str(pdf_path), "-o", str(out), "--no-cache", "--incremental"])
+    assert result.exit_code == 0, result.output
+    assert _section_pages(out) == [1] * 6
+    assert (out / STATE_FILE).exists()
+
+
+def test_cli_incremental_ignores_state_that_does_not_match_the_plan(tmp_path):
+    pdf_path = tmp_path / "lecture.pdf"
+    out = tmp_path / "out"
+    _make_pdf(pdf_path, [f"Topic slide {i}" for i in range(1, 7)])
+    runner = CliRunner()
+    with patch("lecture_split.section_detector.subprocess.run", side_effect=_fake_claude):
+        runner.invoke(main, [str(pdf_path), "-o", str(out), "--no-cache"])
+    save_plan(out / PLAN_FILE, LecturePlan("Edited", [Section("All", 1, 6, "")]))
+
+    with patch("lecture_split.section_detector.subprocess.run", side_effect=_fake_claude) as mock_run:
+        result = runner.invoke(main, [str(pdf_path), "-o", str(out), "--no-cache", "--incremental"])
+    assert result.exit_code == 0, result.output
+    assert "do not match plan.json" in result.output
+    assert mock_run.call_args.kwargs["input"].count("--- SLIDE ") == 6
+    assert _section_pages(out) == [3, 3]
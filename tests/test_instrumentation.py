@@ -0,0 +1,84 @@
+import json
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from lecture_split import instrumentation
+from lecture_split.cli import main
+from lecture_split.instrumentation import TimingsRecorder
+from tests.conftest import make_test_pdf, mock_claude_result
+
+
+def test_stage_without_hooks_is_a_no_op():
+    assert not instrumentation.enabled()
+    with instrumentation.stage("idle"):
+        value = 42
+    assert value == 42
+
+
+def test_hook_receives_stage_events():
+    events = []
+
+    def hook(event, data):
+        events.append((event, data))
+
+    instrumentation.add_hook(hook)
+    try:
+        with instrumentation.stage("work"):
+            sum(range(1000))
+    finally:
+        instrumentation.remove_hook(hook)
+    assert [e for e, _ in events] == ["stage"]
+    data = events[0][1]
+    assert data["name"] == "work"
+    assert data["wall_s"] >= 0 and data["cpu_s"] >= 0 and data["max_rss_kb"] > 0
+
+
+def test_recorder_collects_pipeline_metrics(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    with TimingsRecorder() as recorder:
+        with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()):
+            runner = CliRunner()
+            runner.invoke(main, [str(pdf_path), "-o", str(tmp_path / "out"), "--no-cache"])
+    report = recorder.report()
+    assert set(report["stages"]) == {"extract", "detect", "split", "preambles"}
+    assert report["prompt"]["chars"] > 0 and report["prompt"]["tokens"] > 0
+    assert [c["outcome"] for c in report["claude_calls"]] == ["ok"]
+    assert [s["index"] for s in report["sections"]] == [1, 2, 3]
+    assert report["output_bytes"] == sum(p.stat().st_size for p in (tmp_path / "out").glob("*.pdf"))
+    assert not instrumentation.enabled()
+
+
+def test_cli_timings_flag_and_json_report(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    report_path = tmp_path / "timings.json"
+    runner = CliRunner()
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()):
+        result = runner.invoke(main, [
+            str(pdf_path), "-o", str(tmp_path / "out"), "--timings", "--timings-json", str(report_path),
+        ])
+    assert result.exit_code == 0, result.output
+    assert "Timings:" in result.output
+    assert "extract" in result.output and "claude (sonnet)" in result.output
+    report = json.loads(report_path.read_text())
+    assert report["stages"]["detect"]["calls"] == 1
+    assert report["plan_cache"] == [{"hit": False}]
+    assert not instrumentation.enabled()
+
+
+def test_cli_batch_timings_include_worker_stages(tmp_path):
+    course = tmp_path / "course"
+    course.mkdir()
+    for name in ("week1", "week2"):
+        make_test_pdf(course / f"{name}.pdf")
+    report_path = tmp_path / "timings.json"
+    with patch("lecture_split.section_detector.subprocess.run", return_value=mock_claude_result()):
+        result = CliRunner().invoke(main, [
+            str(course), "-o", str(tmp_path / "out"), "--no-cache", "-j", "2", "--timings-json", str(report_path),
+        ])
+    assert result.exit_code == 0, result.output
+    report = json.loads(report_path.read_text())
+    assert set(report["stages"]) == {"extract", "detect", "split", "preambles"}
+    assert report["stages"]["extract"]["calls"] == report["stages"]["split"]["calls"] == 2
+    assert sorted(s["index"] for s in report["sections"]) == [1, 1, 2, 2, 3, 3]
+    assert report["output_bytes"] == sum(p.stat().st_size for p in (tmp_path / "out").glob("*/*.pdf"))
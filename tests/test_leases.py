@@ -0,0 +1,160 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from lecture_split import fake_claude
+from lecture_split.batch import find_pdfs, is_complete, process_batch
+from lecture_split.leases import LEASE_DIR, LeaseManager, in_shard, lease_path_for, parse_shard
+from tests.conftest import fake_detect, make_pdf
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == (2, 4)
+    for bad in ["0/4", "5/4", "2", "a/b"]:
+        with pytest.raises(ValueError):
+            parse_shard(bad)
+
+
+def test_shards_partition_the_files():
+    paths = [Path(f"course/lecture{i:02d}.pdf") for i in range(40)]
+    shards = [[p for p in paths if in_shard(p, (i, 3))] for i in (1, 2, 3)]
+    assert sorted(sum(shards, [])) == paths
+    assert all(shards)
+    # The assignment depends on the file name only.
+    assert in_shard(Path("/other/host/lecture07.pdf"), (1, 3)) == in_shard(paths[7], (1, 3))
+
+
+def test_a_lease_is_held_by_one_worker(tmp_path):
+    path = lease_path_for(tmp_path / "week1_sections")
+    assert path.parent.name == LEASE_DIR
+    with LeaseManager(owner="a") as a, LeaseManager(owner="b") as b:
+        lease = a.claim(path)
+        assert lease is not None
+        assert b.claim(path) is None
+        assert a.renew(lease)
+        a.release(lease)
+        assert not path.exists()
+        assert b.claim(path) is not None
+    assert not path.exists()  # close() releases what is still held
+
+
+def test_an_expired_lease_is_taken_over(tmp_path):
+    path = lease_path_for(tmp_path / "week1_sections")
+    with LeaseManager(owner="crashed", ttl=60) as crashed:
+        lease = crashed.claim(path)
+        # The crashed worker stopped renewing an hour ago.
+        path.write_text(json.dumps({"owner": "crashed", "token": lease.token, "expires": time.time() - 3600}))
+        with LeaseManager(owner="b") as b:
+            taken = b.claim(path)
+            assert taken is not None
+            assert not crashed.renew(lease)
+            crashed.release(lease)  # does not remove b's lease
+            assert b.owns(taken)
+        assert not list(path.parent.glob("*.stale-*"))
+
+
+def test_an_unreadable_lease_expires_a_ttl_after_it_was_written(tmp_path):
+    path = lease_path_for(tmp_path / "week1_sections")
+    path.parent.mkdir()
+    path.write_text("")  # the claimer died before writing its lease
+    with LeaseManager(ttl=60) as b:
+        assert b.claim(path) is None
+        old = time.time() - 3600
+        os.utime(path, (old, old))
+        assert b.claim(path) is not None
+
+
+def test_renew_does_not_bring_back_a_released_lease(tmp_path, monkeypatch):
+    path = lease_path_for(tmp_path / "week1_sections")
+    with LeaseManager() as a:
+        lease = a.claim(path)
+        read = a._read
+
+        def release_while_renewing(p):
+            current = read(p)
+            monkeypatch.setattr(a, "_read", read)
+            a.release(lease)  # the worker finishes between renew's read and its write
+            return current
+
+        monkeypatch.setattr(a, "_read", release_while_renewing)
+        assert not a.renew(lease)
+        assert not path.exists()
+        assert not list(path.parent.glob("*.tmp"))
+
+
+def test_heartbeat_renews_held_leases(tmp_path):
+    path = lease_path_for(tmp_path / "week1_sections")
+    with LeaseManager(ttl=1.5) as a:
+        a.claim(path)
+        time.sleep(2)
+        with LeaseManager() as b:
+            assert b.claim(path) is None
+
+
+def test_batch_skips_finished_and_claimed_pdfs(tmp_path):
+    course = tmp_path / "course"
+    course.mkdir()
+    pdfs = [make_pdf(course / f"week{i}.pdf") for i in (1, 2, 3)]
+    out = tmp_path / "out"
+    process_batch(pdfs[:1], output_root=out, detect=fake_detect, jobs=1)
+    (out / "week2_sections").mkdir()  # left behind by an interrupted run
+    (out / "week2_sections" / "section-01.pdf").write_bytes(b"partial")
+
+    with LeaseManager(owner="other") as other, LeaseManager(owner="me") as me:
+        other.claim(lease_path_for(out / "week3_sections"))
+        results = process_batch(pdfs, output_root=out, detect=fake_detect, jobs=1, leases=me)
+
+    assert [r.skipped for r in results] == ["already done", None, "claimed by another worker"]
+    assert results[1].ok and is_complete(out / "week2_sections")
+    assert not (out / "week3_sections").exists()
+    assert sorted(p.name for p in out.iterdir()) == [LEASE_DIR, "week1_sections", "week2_sections"]
+
+
+def test_concurrent_workers_process_each_pdf_once(tmp_path):
+    course = tmp_path / "course"
+    course.mkdir()
+    for i in range(8):
+        make_pdf(course / f"lecture{i}.pdf")
+    bin_dir = fake_claude.install(tmp_path / "bin", latency=0.2, section_size=2).parent
+    log = tmp_path / "calls.log"
+    env = {
+        **os.environ,
+        "PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}",
+        "FAKE_CLAUDE_LOG": str(log),
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(Path(__file__).parent.parent / "src"), os.environ.get("PYTHONPATH")])),
+    }
+    out = tmp_path / "out"
+    command = [
+        sys.executable, "-c", "from lecture_split.cli import main; main()",
+        "split", str(course), "--claim", "-o", str(out), "--no-cache", "-j", "1", "--max-claude-calls", "2",
+    ]
+    workers = [subprocess.Popen(command, env=env, stdout=subprocess.PIPE, text=True) for _ in range(3)]
+    outputs = [w.communicate(timeout=120)[0] for w in workers]
+    assert [w.returncode for w in workers] == [0, 0, 0], outputs
+
+    calls = Counter(log.read_text().splitlines())
+    assert calls == {f"lecture{i} slide 1": 1 for i in range(8)}
+    assert all(is_complete(out / f"lecture{i}_sections") for i in range(8))
+    assert sorted(p.name for p in out.iterdir()) == [LEASE_DIR] + [f"lecture{i}_sections" for i in range(8)]
+    assert not list((out / LEASE_DIR).iterdir())
+
+    # A second round finds nothing left to do.
+    rerun = subprocess.run(command + ["--shard", "1/1"], env=env, capture_output=True, text=True)
+    assert rerun.returncode == 0, rerun.stderr
+    assert "0 succeeded, 0 failed, 8 skipped" in rerun.stdout
+    assert sum(Counter(log.read_text().splitlines()).values()) == 8
+
+
+def test_batch_shard_selects_a_subset(tmp_path):
+    course = tmp_path / "course"
+    course.mkdir()
+    pdfs = [make_pdf(course / f"lecture{i}.pdf") for i in range(6)]
+    mine = [p for p in find_pdfs([course]) if in_shard(p, (2, 3))]
+    results = process_batch(pdfs, output_root=tmp_path / "out", detect=fake_detect, jobs=1, shard=(2, 3))
+    assert [r.pdf_path for r in results] == mine
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import fitz
+
+from lecture_split.compaction import estimate_tokens
+from lecture_split.extractor import extract_slide_texts
+from lecture_split.outline import MAX_BULLETS, page_outline
+
+
+def _page(lines: list[tuple[float, float, str]]) -> fitz.Page:
+    """Make a one-page document from (x, fontsize, text) lines laid out top to bottom."""
+    doc = fitz.open()
+    page = doc.new_page(width=720, height=540)
+    y = 60
+    for x, size, text in lines:
+        page.insert_text((x, y), text, fontsize=size)
+        y += size * 1.4
+    return page
+
+
+def test_title_and_first_level_bullets():
+    page = _page([
+        (60, 28, "Gradient Descent"),
+        (60, 16, "• Minimize a differentiable loss"),
+        (90, 13, "◦ step against the gradient"),
+        (90, 13, "◦ learning rate controls the step size"),
+        (60, 16, "• Variants"),
+        (90, 13, "◦ SGD, momentum, Adam"),
+        (680, 9, "12"),
+    ])
+    assert page_outline(page) == "Gradient Descent\n- Minimize a differentiable loss\n- Variants"
+
+
+def test_single_font_size_uses_first_line_as_title():
+    page = _page([(60, 14, "Agenda"), (60, 14, "Recap"), (60, 14, "New material")])
+    assert page_outline(page) == "Agenda\n- Recap\n- New material"
+
+
+def test_empty_page():
+    assert page_outline(_page([])) == ""
+
+
+def test_bullets_are_capped():
+    page = _page([(60, 28, "Many points")] + [(60, 12, f"• point {i}") for i in range(20)])
+    assert page_outline(page).count("\n- ") == MAX_BULLETS
+
+
+def test_outline_extraction_is_much_smaller_on_dense_decks(tmp_path):
+    doc = fitz.open()
+    for n in range(10):
+        page = doc.new_page(width=720, height=540)
+        y = 50
+        page.insert_text((40, y), f"Topic {n}: Convolutional Layers", fontsize=26)
+        for b in range(3):
+            y += 30
+            page.insert_text((40, y), f"• Key idea {b} of topic {n}", fontsize=14)
+            for s in range(4):
+                y += 16
+                page.insert_text(
+                    (70, y),
+                    f"detail {s}: kernel stride padding dilation receptive field channels {n}-{b}-{s}",
+                    fontsize=9,
+                )
+        page.insert_textbox(
+            fitz.Rect(380, 60, 700, 520),
+            " ".join(f"note{n}_{k} about backpropagation through the layer" for k in range(60)),
+            fontsize=7,
+        )
+    pdf_path = Path(tmp_path / "dense.pdf")
+    doc.save(str(pdf_path))
+
+    full = extract_slide_texts(pdf_path)
+    outlines = extract_slide_texts(pdf_path, outline=True)
+    assert [s.page_number for s in outlines] == list(range(1, 11))
+    assert outlines[3].text.startswith("Topic 3: Convolutional Layers\n- Key idea 0 of topic 3")
+    full_tokens = sum(estimate_tokens(s.text) for s in full)
+    outline_tokens = sum(estimate_tokens(s.text) for s in outlines)
+    assert outline_tokens * 10 <= full_tokens
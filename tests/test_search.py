@@ -0,0 +1,172 @@
+import time
+import zipfile
+from contextlib import closing
+from pathlib import Path
+
+import fitz
+from click.testing import CliRunner
+
+from lecture_split.artifacts import PLAN_FILE, save_plan
+from lecture_split.bundle import write_bundle
+from lecture_split.cli import main
+from lecture_split.models import LecturePlan, Section
+from lecture_split.search import SearchIndex, find_outputs, tokenize
+from lecture_split.splitter import split_pdf
+
+NEURAL_NETS = [
+    "Perceptrons\nA single neuron with weights and a bias",
+    "Activation functions\nSigmoid, tanh and ReLU",
+    "Backpropagation\nThe chain rule applied layer by layer",
+    "Computing gradients\nBackpropagation stores activations from the forward pass",
+]
+VISION = [
+    "Convolutions\nKernels slide over the image",
+    "Pooling layers\nMax pooling shrinks feature maps",
+]
+
+
+def _lecture(tmp_path: Path, name: str, pages: list[str], plan: LecturePlan, bundle: bool = False) -> Path:
+    pdf_path = tmp_path / f"{name}.pdf"
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(str(pdf_path))
+    doc.close()
+    if bundle:
+        return write_bundle(pdf_path, plan, tmp_path / "out" / f"{name}_sections.zip")
+    output = tmp_path / "out" / f"{name}_sections"
+    split_pdf(pdf_path, plan.sections, output)
+    save_plan(output / PLAN_FILE, plan)
+    return output
+
+
+def _course(tmp_path: Path) -> list[Path]:
+    return [
+        _lecture(tmp_path, "week1", NEURAL_NETS, LecturePlan("Neural networks", [
+            Section("Neurons", 1, 2, "What a single unit computes."),
+            Section("Training", 3, 4, "How networks learn from their errors."),
+        ])),
+        _lecture(tmp_path, "week2", VISION, LecturePlan("Computer vision", [
+            Section("Convolutional networks", 1, 2, "Filters for images."),
+        ]), bundle=True),
+    ]
+
+
+def test_tokenize():
+    assert tokenize("The Gradients of a ReLU, x2") == ["gradient", "relu", "x2"]
+    assert tokenize("class loss analysis") == ["class", "loss", "analysis"]
+
+
+def test_search_ranks_sections_with_their_slide_ranges(tmp_path):
+    outputs = _course(tmp_path)
+    assert find_outputs([tmp_path / "out"]) == sorted(outputs)
+    index = SearchIndex(tmp_path / "index.sqlite3")
+    update = index.update(find_outputs([tmp_path / "out"]))
+    assert (update.added, update.sections) == (2, 3)
+
+    [best, *_] = index.search("backpropagation chain rule")
+    assert (best.lecture_title, best.number, best.title) == ("Neural networks", 2, "Training")
+    assert (best.start_page, best.end_page) == (3, 4)
+    assert best.section_pdf == str(outputs[0].resolve() / "section-02.pdf")
+
+    [hit] = index.search("pooling")  # slide text inside a bundle
+    assert hit.title == "Convolutional networks"
+    assert hit.section_pdf.endswith("week2_sections.zip:section-01.pdf")
+
+    # A title match outranks the same word in slide text.
+    assert [h.title for h in index.search("networks")][0] == "Convolutional networks"
+    assert {h.title for h in index.search("backprop*")} == {"Training"}
+    assert index.search("transformers") == []
+
+
+def test_find_outputs_skips_files_that_are_not_bundles(tmp_path):
+    outputs = _course(tmp_path)
+    out = tmp_path / "out"
+    (out / "week1.pdf").write_bytes((tmp_path / "week1.pdf").read_bytes())
+    (out / "notes.txt").write_text("not an output")
+    (out / "fake.zip").write_bytes(b"not a zip")
+    with zipfile.ZipFile(out / "slides.zip", "w") as zf:
+        zf.writestr("slide.png", b"")
+    assert find_outputs([out]) == sorted(outputs)
+    assert find_outputs([out / "notes.txt", out / "slides.zip", outputs[1]]) == [outputs[1]]
+
+
+def test_update_skips_outputs_it_cannot_read(tmp_path):
+    week1, week2 = _course(tmp_path)
+    (week1 / "section-02.pdf").write_bytes(b"truncated")
+    broken = tmp_path / "out" / "broken_sections.zip"
+    with zipfile.ZipFile(broken, "w") as zf:
+        zf.writestr(PLAN_FILE, "{not json")
+
+    index = SearchIndex(tmp_path / "index.sqlite3")
+    update = index.update(find_outputs([tmp_path / "out"]))
+    assert (update.added, update.sections) == (1, 1)
+    assert set(update.failed) == {week1.resolve(), broken.resolve()}
+    assert [h.title for h in index.search("pooling")] == ["Convolutional networks"]
+
+    result = CliRunner().invoke(main, ["index", str(tmp_path / "out"), "--index", str(tmp_path / "index.sqlite3")])
+    assert result.exit_code == 1
+    assert f"\u2717 {broken.resolve()}" in result.output
+    assert "1 unchanged, 0 removed, 2 failed" in result.output
+
+
+def test_update_is_incremental(tmp_path):
+    week1, week2 = _course(tmp_path)
+    index = SearchIndex(tmp_path / "index.sqlite3")
+    index.update([week1, week2])
+
+    update = index.update([week1, week2])
+    assert (update.added, update.updated, update.unchanged, update.sections) == (0, 0, 2, 0)
+
+    save_plan(week1 / PLAN_FILE, LecturePlan("Neural networks", [
+        Section("Neurons and transformers", 1, 2, "Renamed."), Section("Training", 3, 4, "Same."),
+    ]))
+    week2.unlink()
+    update = index.update([week1])
+    assert (update.updated, update.removed, update.sections) == (1, 1, 2)
+    assert [h.title for h in index.search("transformers")] == ["Neurons and transformers"]
+    assert index.search("pooling") == []
+    with closing(index._connect()) as conn:
+        orphans = conn.execute(
+            "SELECT COUNT(*) FROM postings WHERE section_id NOT IN (SELECT id FROM sections)"
+        ).fetchone()[0]
+    assert orphans == 0
+
+
+def test_search_is_fast_over_thousands_of_sections(tmp_path):
+    index = SearchIndex(tmp_path / "index.sqlite3")
+    words = [f"topic{i}" for i in range(500)]
+    with closing(index._connect()) as conn:
+        conn.execute("BEGIN")
+        for lecture in range(200):
+            sections = [
+                Section(f"Part {n}", n, n, " ".join(words[(lecture * 7 + n * 13 + k) % 500] for k in range(5)))
+                for n in range(1, 16)
+            ]
+            texts = [" ".join(words[(lecture + n * k) % 500] for k in range(60)) for n in range(1, 16)]
+            index._insert(conn, tmp_path / f"lecture{lecture}", str(lecture), LecturePlan(f"L{lecture}", sections), texts)
+        conn.execute("COMMIT")
+
+    started = time.perf_counter()
+    hits = index.search("topic42 topic7 topic99", limit=10)
+    elapsed = time.perf_counter() - started
+    assert len(hits) == 10
+    assert hits == sorted(hits, key=lambda h: -h.score)
+    assert elapsed < 0.5  # a few milliseconds in practice
+
+
+def test_cli_index_and_search(tmp_path):
+    _course(tmp_path)
+    index = str(tmp_path / "index.sqlite3")
+    runner = CliRunner()
+    result = runner.invoke(main, ["index", str(tmp_path / "out"), "--index", index])
+    assert result.exit_code == 0, result.output
+    assert "Indexed 3 sections from 2 new and 0 changed lectures" in result.output
+
+    result = runner.invoke(main, ["search", "backpropagation", "--index", index, "-n", "1"])
+    assert result.exit_code == 0, result.output
+    assert "Neural networks — 2. Training (slides 3–4)" in result.output
+    assert "section-02.pdf" in result.output
+
+    result = runner.invoke(main, ["search", "transformers", "--index", index])
+    assert "No matching sections." in result.output
@@ -1,40 +1,21 @@
 import json
+import os
 import subprocess
 from unittest.mock import patch
 
 import pytest
 
+from lecture_split.cache import PlanCache, plan_cache_key
 from lecture_split.models import SlideText, LecturePlan
-from lecture_split.section_detector import detect_sections
-
-
-SAMPLE_SLIDES = [
-    SlideText(1, "Introduction to Machine Learning\nCS229 - Lecture 1"),
-    SlideText(2, "What is Machine Learning?\n- Arthur Samuel (1959)\n- Tom Mitchell (1998)"),
-    SlideText(3, "Types of Learning\n- Supervised\n- Unsupervised\n- Reinforcement"),
-    SlideText(4, "Linear Regression\nFitting a line to data"),
-    SlideText(5, "Cost Function\nJ(theta) = 1/2m sum (h(x) - y)^2"),
-    SlideText(6, "Gradient Descent\nIteratively minimize J(theta)"),
-    SlideText(7, "Learning Rate\nChoosing alpha"),
-    SlideText(8, "Summary\nKey takeaways from today"),
-]
-
-MOCK_API_RESPONSE = {
-    "lecture_title": "Introduction to Machine Learning",
-    "sections": [
-        {"title": "Introduction & ML Overview", "start_page": 1, "end_page": 3, "summary": "Defines ML and categorizes learning types."},
-        {"title": "Linear Regression", "start_page": 4, "end_page": 5, "summary": "Introduces linear regression and the cost function."},
-        {"title": "Gradient Descent", "start_page": 6, "end_page": 7, "summary": "Covers gradient descent optimization and learning rate."},
-        {"title": "Summary", "start_page": 8, "end_page": 8, "summary": "Recap of key concepts."},
-    ],
-}
+from lecture_split.section_detector import SYSTEM_PROMPT, detect_sections
+from tests.conftest import SAMPLE_RESPONSE, SAMPLE_SLIDES
 
 
 def _mock_subprocess_result():
     return subprocess.CompletedProcess(
         args=["claude"],
         returncode=0,
-        stdout=json.dumps(MOCK_API_RESPONSE),
+        stdout=json.dumps(SAMPLE_RESPONSE),
         stderr="",
     )
 
@@ -106,7 +87,7 @@ def test_detect_sections_empty_slides_raises():
 
 
 def test_detect_sections_handles_json_code_fence():
-    fenced = f"```json\n{json.dumps(MOCK_API_RESPONSE)}\n```"
+    fenced = f"```json\n{json.dumps(SAMPLE_RESPONSE)}\n```"
     result = subprocess.CompletedProcess(args=["claude"], returncode=0, stdout=fenced, stderr="")
     with patch("lecture_split.section_detector.subprocess.run", return_value=result):
         plan = detect_sections(SAMPLE_SLIDES)
@@ -115,7 +96,7 @@ def test_detect_sections_handles_json_code_fence():
 
 
 def test_detect_sections_handles_bare_code_fence():
-    fenced = f"```\n{json.dumps(MOCK_API_RESPONSE)}\n```"
+    fenced = f"```\n{json.dumps(SAMPLE_RESPONSE)}\n```"
     result = subprocess.CompletedProcess(args=["claude"], returncode=0, stdout=fenced, stderr="")
     with patch("lecture_split.section_detector.subprocess.run", return_value=result):
         plan = detect_sections(SAMPLE_SLIDES)
@@ -126,3 +107,118 @@ def test_detect_sections_cli_failure_raises():
     with patch("lecture_split.section_detector.subprocess.run", side_effect=subprocess.CalledProcessError(1, "claude")):
         with pytest.raises(subprocess.CalledProcessError):
             detect_sections(SAMPLE_SLIDES)
+
+
+@pytest.fixture
+def recording_claude(tmp_path, monkeypatch):
+    """Put a stand-in `claude` on PATH that records its stdin and prints SAMPLE_RESPONSE."""
+    record = tmp_path / "stdin.txt"
+    script = tmp_path / "bin" / "claude"
+    script.parent.mkdir()
+    script.write_text(
+        "#!/usr/bin/env python3\n"
+        "import sys\n"
+        f"open({str(record)!r}, 'wb').write(sys.stdin.buffer.read())\n"
+        f"print({json.dumps(json.dumps(SAMPLE_RESPONSE))})\n"
+    )
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{script.parent}:{os.environ['PATH']}")
+    return record
+
+
+def test_detect_sections_streaming_sends_identical_prompt(recording_claude):
+    with patch("lecture_split.section_detector.subprocess.run", return_value=_mock_subprocess_result()) as mock_run:
+        detect_sections(SAMPLE_SLIDES)
+    expected = mock_run.call_args[1]["input"]
+
+    plan = detect_sections(iter(SAMPLE_SLIDES), memory_budget=64)
+    assert recording_claude.read_text() == expected
+    assert plan.lecture_title == "Introduction to Machine Learning"
+    assert len(plan.sections) == 4
+
+
+def test_detect_sections_streaming_empty_raises():
+    with pytest.raises(ValueError):
+        detect_sections(iter([]), memory_budget=1024)
+
+
+def test_detect_sections_streaming_failure_raises(tmp_path, monkeypatch):
+    script = tmp_path / "claude"
+    script.write_text("#!/bin/sh\ncat > /dev/null\nexit 3\n")
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}:{os.environ['PATH']}")
+    with pytest.raises(subprocess.CalledProcessError) as exc_info:
+        detect_sections(SAMPLE_SLIDES, memory_budget=1024)
+    assert exc_info.value.returncode == 3
+
+
+def test_detect_sections_passes_timeout():
+    with patch("lecture_split.section_detector.subprocess.run", return_value=_mock_subprocess_result()) as mock_run:
+        detect_sections(SAMPLE_SLIDES, timeout=30)
+    assert mock_run.call_args[1]["timeout"] == 30
+
+
+def test_detect_sections_retries_and_records_attempts():
+    side_effect = [
+        subprocess.TimeoutExpired("claude", 30),
+        subprocess.CompletedProcess(args=["claude"], returncode=0, stdout="not json", stderr=""),
+        _mock_subprocess_result(),
+    ]
+    attempts = []
+    with patch("lecture_split.section_detector.subprocess.run", side_effect=side_effect) as mock_run:
+        plan = detect_sections(SAMPLE_SLIDES, retries=2, backoff=0, attempts=attempts)
+    assert mock_run.call_count == 3
+    assert len(plan.sections) == 4
+    assert [a.outcome for a in attempts] == ["timeout", "invalid", "ok"]
+    assert [a.won for a in attempts] == [False, False, True]
+
+
+def test_detect_sections_raises_after_retries_exhausted():
+    error = subprocess.CalledProcessError(1, "claude")
+    with patch("lecture_split.section_detector.subprocess.run", side_effect=error) as mock_run:
+        with pytest.raises(subprocess.CalledProcessError):
+            detect_sections(SAMPLE_SLIDES, retries=1, backoff=0)
+    assert mock_run.call_count == 2
+
+
+@pytest.fixture
+def model_latency_claude(tmp_path, monkeypatch):
+    """A stand-in `claude` that answers after 10s for --model slow and at once otherwise."""
+    script = tmp_path / "bin" / "claude"
+    script.parent.mkdir()
+    script.write_text(
+        "#!/usr/bin/env python3\n"
+        "import sys, time\n"
+        "sys.stdin.read()\n"
+        "if sys.argv[sys.argv.index('--model') + 1] == 'slow':\n"
+        "    time.sleep(10)\n"
+        f"print({json.dumps(json.dumps(SAMPLE_RESPONSE))})\n"
+    )
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{script.parent}:{os.environ['PATH']}")
+
+
+def test_detect_sections_hedged_request_wins(model_latency_claude):
+    import time
+
+    attempts = []
+    start = time.monotonic()
+    plan = detect_sections(SAMPLE_SLIDES, model="slow", hedge_after=0.2, hedge_model="fast", attempts=attempts)
+    assert time.monotonic() - start < 5
+    assert len(plan.sections) == 4
+    assert [(a.model, a.hedge, a.won) for a in attempts] == [("slow", False, False), ("fast", True, True)]
+    assert attempts[0].outcome == "cancelled"
+
+
+def test_a_plan_won_by_the_hedge_model_is_not_cached(model_latency_claude, tmp_path):
+    cache = PlanCache(tmp_path / "cache")
+    detect_sections(SAMPLE_SLIDES, model="slow", hedge_after=0.2, hedge_model="fast", cache=cache)
+    assert not list(cache.directory.glob("*.json"))
+
+    detect_sections(SAMPLE_SLIDES, model="fast", hedge_after=5, hedge_model="slow", cache=cache)
+    assert cache.get(plan_cache_key(SAMPLE_SLIDES, model="fast", system_prompt=SYSTEM_PROMPT)) is not None
+
+
+def test_detect_sections_streaming_timeout(model_latency_claude):
+    with pytest.raises(subprocess.TimeoutExpired):
+        detect_sections(SAMPLE_SLIDES, model="slow", memory_budget=1024, timeout=0.3)
@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from functools import partial
+
+import pytest
+
+from lecture_split import fake_claude
+from lecture_split.cache import PlanCache
+from lecture_split.section_detector import detect_sections
+from lecture_split.server import JobServer
+from tests.conftest import make_test_pdf
+
+
+@pytest.fixture
+def claude_on_path(tmp_path, monkeypatch):
+    path = fake_claude.install(tmp_path / "bin", latency=0.2, section_size=2)
+    monkeypatch.setenv("PATH", f"{path.parent}:{os.environ['PATH']}")
+
+
+def _start(tmp_path, detect, **kwargs):
+    server = JobServer(("127.0.0.1", 0), detect=detect, jobs=2, upload_dir=tmp_path / "uploads", **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def _stop(server):
+    server.shutdown()
+    server.close()
+
+
+def _request(server, method, path, body=None, content_type="application/json"):
+    data = body if isinstance(body, bytes) or body is None else json.dumps(body).encode()
+    req = urllib.request.Request(
+        f"http://127.0.0.1:{server.port}{path}", data=data, method=method,
+        headers={"Content-Type": content_type},
+    )
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as err:
+        return err.code, json.loads(err.read())
+
+
+def _wait(server, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status, job = _request(server, "GET", f"/jobs/{job_id}")
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_jobs_share_a_global_claude_limit(tmp_path, claude_on_path):
+    active = peak = 0
+    lock = threading.Lock()
+
+    def detect(slides):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        try:
+            return detect_sections(slides, cache=PlanCache(tmp_path / "plans"))
+        finally:
+            with lock:
+                active -= 1
+
+    server = _start(tmp_path, detect, workers=3, max_detect_calls=1)
+    try:
+        pdfs = [make_test_pdf(tmp_path / f"deck{i}.pdf", num_pages=4 + i) for i in range(3)]
+        ids = []
+        for pdf in pdfs:
+            status, job = _request(server, "POST", "/jobs", {"pdf_path": str(pdf)})
+            assert status == 202
+            assert job["status"] in ("queued", "running")
+            ids.append(job["id"])
+        jobs = [_wait(server, i) for i in ids]
+    finally:
+        _stop(server)
+
+    assert [j["status"] for j in jobs] == ["done"] * 3
+    assert peak == 1
+    for pdf, job in zip(pdfs, jobs):
+        out = tmp_path / f"{pdf.stem}_sections"
+        assert job["output"] == str(out)
+        assert (out / "manifest.md").exists()
+        assert len(list(out.glob("section-*.pdf"))) == job["sections"]
+
+
+def test_result_and_status_endpoints(tmp_path, claude_on_path):
+    server = _start(tmp_path, partial(detect_sections), output_root=tmp_path / "out")
+    try:
+        pdf = make_test_pdf(tmp_path / "lecture.pdf")
+        _, job = _request(server, "POST", "/jobs", {"pdf_path": str(pdf)})
+        _wait(server, job["id"])
+        status, result = _request(server, "GET", f"/jobs/{job['id']}/result")
+        assert status == 200
+        assert result["plan"]["lecture_title"] == "Synthetic Lecture"
+        assert len(result["plan"]["sections"]) == 3
+        assert result["output"] == str(tmp_path / "out" / "lecture_sections")
+
+        status, health = _request(server, "GET", "/health")
+        assert status == 200 and health["jobs"]["done"] == 1
+        status, listing = _request(server, "GET", "/jobs")
+        assert [j["id"] for j in listing] == [job["id"]]
+        assert _request(server, "GET", "/jobs/nope")[0] == 404
+    finally:
+        _stop(server)
+
+
+def test_upload_and_failures(tmp_path, claude_on_path):
+    server = _start(tmp_path, partial(detect_sections))
+    try:
+        pdf = make_test_pdf(tmp_path / "lecture.pdf")
+        status, job = _request(server, "POST", "/jobs?name=week1.pdf", pdf.read_bytes(), "application/pdf")
+        assert status == 202
+        assert _wait(server, job["id"])["status"] == "done"
+        assert job["pdf_path"].startswith(str(tmp_path / "uploads"))
+        assert job["output"].endswith("week1_sections")
+
+        assert _request(server, "POST", "/jobs", {"pdf_path": str(tmp_path / "missing.pdf")})[0] == 400
+        assert _request(server, "POST", "/jobs", {"wrong": 1})[0] == 400
+
+        broken = tmp_path / "broken.pdf"
+        broken.write_bytes(b"not a pdf")
+        _, job = _request(server, "POST", "/jobs", {"pdf_path": str(broken)})
+        failed = _wait(server, job["id"])
+        assert failed["status"] == "failed" and failed["error"]
+        assert _request(server, "GET", f"/jobs/{job['id']}/result")[0] == 409
+    finally:
+        _stop(server)
+
+
+def test_requested_outputs_must_stay_under_the_output_root(tmp_path, claude_on_path):
+    pdf = make_test_pdf(tmp_path / "lecture.pdf")
+    server = _start(tmp_path, partial(detect_sections))
+    try:
+        status, error = _request(server, "POST", "/jobs", {"pdf_path": str(pdf), "output": str(tmp_path / "x")})
+        assert status == 403 and "output root" in error["error"]
+    finally:
+        _stop(server)
+
+    root = tmp_path / "out"
+    server = _start(tmp_path, partial(detect_sections), output_root=root)
+    try:
+        for escape in [str(tmp_path / "elsewhere"), "../elsewhere", "."]:
+            status, _ = _request(server, "POST", "/jobs", {"pdf_path": str(pdf), "output": escape})
+            assert status == 403
+        status, job = _request(server, "POST", "/jobs", {"pdf_path": str(pdf), "output": "course/week1"})
+        assert status == 202
+        assert _wait(server, job["id"])["status"] == "done"
+        assert (root / "course" / "week1" / "manifest.md").exists()
+    finally:
+        _stop(server)
+    assert not (tmp_path / "elsewhere").exists()
+
+
+def test_only_the_latest_finished_jobs_are_kept(tmp_path):
+    server = _start(tmp_path, lambda slides: None, workers=1, max_finished_jobs=2)
+    try:
+        ids = [server.submit(tmp_path / f"missing{i}.pdf").id for i in range(4)]
+        for job_id in ids:
+            while (job := server.get(job_id)) is not None and job.finished_at is None:
+                time.sleep(0.01)
+    finally:
+        _stop(server)
+    assert [job.id for job in server.list_jobs()] == ids[2:]
@@ -3,7 +3,7 @@ import pytest
 from pathlib import Path
 
 from lecture_split.models import Section
-from lecture_split.splitter import split_pdf
+from lecture_split.splitter import split_pdf, total_size
 
 
 @pytest.fixture
@@ -72,3 +72,32 @@ def test_split_creates_output_dir(six_page_pdf, sections, tmp_path):
     out = tmp_path / "nonexistent" / "out"
     split_pdf(six_page_pdf, sections, out)
     assert out.exists()
+
+
+def test_split_parallel_matches_serial(six_page_pdf, sections, tmp_path):
+    serial = split_pdf(six_page_pdf, sections, tmp_path / "serial")
+    parallel = split_pdf(six_page_pdf, sections, tmp_path / "parallel", workers=2)
+    assert [p.name for p in parallel] == [p.name for p in serial]
+    for a, b in zip(serial, parallel):
+        with fitz.open(str(a)) as da, fitz.open(str(b)) as db:
+            assert [p.get_text() for p in da] == [p.get_text() for p in db]
+
+
+def test_split_optimize_shrinks_output(tmp_path, sections):
+    doc = fitz.open()
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 200, 200), False)
+    pix.clear_with(200)
+    for i in range(6):
+        page = doc.new_page(width=720, height=540)
+        page.insert_text((72, 72), f"Page {i + 1}", fontsize=24)
+        page.insert_image(fitz.Rect(100, 100, 300, 300), pixmap=pix)
+    pdf_path = tmp_path / "images.pdf"
+    doc.save(str(pdf_path))
+    doc.close()
+
+    plain = split_pdf(pdf_path, sections, tmp_path / "plain")
+    optimized = split_pdf(pdf_path, sections, tmp_path / "optimized", optimize=True)
+    assert total_size(optimized) < total_size(plain)
+    with fitz.open(str(optimized[1])) as d:
+        assert len(d) == 3
+        assert "Page 3" in d[0].get_text()
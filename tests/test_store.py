@@ -0,0 +1,82 @@
+import pickle
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+from lecture_split.cache import default_cache_dir
+from lecture_split.extractor import extract_slide_texts
+from lecture_split.incremental import page_fingerprint
+from lecture_split.models import SlideText
+from lecture_split.search import default_index_path
+from lecture_split.store import ExtractionStore, default_store_path
+from tests.conftest import make_test_pdf
+
+SLIDES = [SlideText(1, "Intro"), SlideText(2, "Body text"), SlideText(3, "Outro")]
+
+
+def test_default_paths_share_the_cache_root(isolated_plan_cache, monkeypatch):
+    assert default_store_path() == isolated_plan_cache / "extracted.sqlite3"
+    assert default_index_path() == isolated_plan_cache / "search.sqlite3"
+    assert default_cache_dir() == isolated_plan_cache / "plans"
+    monkeypatch.delenv("LECTURE_SPLIT_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", "/xdg")
+    assert default_cache_dir() == Path("/xdg/lecture-split/plans")
+    assert default_store_path().parent == default_cache_dir().parent
+
+
+def test_put_and_get_round_trip(tmp_path):
+    store = ExtractionStore(tmp_path / "store.sqlite3")
+    assert store.get("abc") is None
+    store.put("abc", SLIDES)
+    assert store.get("abc") == SLIDES
+    assert store.get("abc", "outline") is None
+    assert store.fingerprints("abc") == [page_fingerprint(s.text) for s in SLIDES]
+    assert (store.hits, store.misses) == (1, 2)
+
+
+def test_put_replaces_a_document(tmp_path):
+    store = ExtractionStore(tmp_path / "store.sqlite3")
+    store.put("abc", SLIDES)
+    store.put("abc", SLIDES[:1])
+    assert store.get("abc") == SLIDES[:1]
+
+
+def test_evicts_least_recently_used(tmp_path):
+    store = ExtractionStore(tmp_path / "store.sqlite3", max_bytes=50)
+    big = [SlideText(1, "x" * 20)]
+    store.put("a", big)
+    store.put("b", big)
+    store.get("a")  # a is now more recently used than b
+    store.put("c", big)
+    assert store.get("a") is not None
+    assert store.get("b") is None
+    assert store.get("c") is not None
+
+
+def test_keeps_a_document_larger_than_the_cap(tmp_path):
+    store = ExtractionStore(tmp_path / "store.sqlite3", max_bytes=5)
+    store.put("a", SLIDES)
+    assert store.get("a") == SLIDES
+
+
+def test_pickles_without_counters(tmp_path):
+    store = ExtractionStore(tmp_path / "store.sqlite3", max_bytes=123)
+    store.put("a", SLIDES)
+    store.get("a")
+    copy = pickle.loads(pickle.dumps(store))
+    assert (copy.path, copy.max_bytes, copy.hits) == (store.path, 123, 0)
+    assert copy.get("a") == SLIDES
+
+
+def test_extract_reuses_stored_pages(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    store = ExtractionStore(tmp_path / "store.sqlite3")
+    first = extract_slide_texts(pdf_path, store=store)
+    copy = shutil.copy(pdf_path, tmp_path / "same-content.pdf")
+    with patch("lecture_split.extractor._extract") as extract:
+        again = extract_slide_texts(copy, store=store)
+    extract.assert_not_called()
+    assert again == first
+    outlines = extract_slide_texts(pdf_path, store=store, outline=True)
+    assert outlines != first
+    assert (store.hits, store.misses) == (1, 2)
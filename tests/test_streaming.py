@@ -0,0 +1,130 @@
+import json
+import os
+import time
+
+import fitz
+import pytest
+from click.testing import CliRunner
+
+from lecture_split import fake_claude
+from lecture_split.artifacts import load_plan
+from lecture_split.backends import BackendError, _cli_event_text
+from lecture_split.cli import main
+from lecture_split.document import PDFDocument
+from lecture_split.models import LecturePlan, Section
+from lecture_split.section_detector import detect_sections
+from lecture_split.splitter import SectionWriter
+from lecture_split.streaming import SectionScanner, scan_sections
+from tests.conftest import SAMPLE_RESPONSE, SAMPLE_SLIDES, make_test_pdf
+
+PLAN = LecturePlan.from_dict(SAMPLE_RESPONSE)
+
+
+def _scan(chunks):
+    found = []
+    scan_sections(chunks, lambda i, s: found.append((i, s)))
+    return found
+
+
+@pytest.mark.parametrize("size", [1, 7, 10_000])
+def test_scanner_finds_every_section_at_any_chunk_size(size):
+    text = json.dumps(SAMPLE_RESPONSE, indent=2)
+    found = _scan(text[i:i + size] for i in range(0, len(text), size))
+    assert found == list(enumerate(PLAN.sections))
+
+
+def test_scanner_handles_fences_strings_and_key_order():
+    text = (
+        'Here you go:\n```json\n{"sections": [{"title": "Braces {[ and \\"quotes\\"", '
+        '"start_page": 1, "end_page": 2, "summary": "a ] b }"}], "lecture_title": "sections"}\n```'
+    )
+    assert _scan([text]) == [(0, Section('Braces {[ and "quotes"', 1, 2, "a ] b }"))]
+    # A malformed section is left to the final parse.
+    assert SectionScanner().feed('{"sections": [{"title": "x"}, ') == []
+
+
+class _StreamingBackend:
+    """Yields a plan in small pieces and records when each one is handed out."""
+
+    def __init__(self, reply: str):
+        self.reply = reply
+        self.log = []
+
+    def stream(self, model, system, prompt, *, timeout=None):
+        for i in range(0, len(self.reply), 16):
+            self.log.append("chunk")
+            yield self.reply[i:i + 16]
+        self.log.append("end")
+
+    def complete(self, model, system, prompt, *, timeout=None, register=None):
+        return self.reply
+
+
+def test_detect_sections_reports_sections_before_the_reply_ends():
+    backend = _StreamingBackend(json.dumps(SAMPLE_RESPONSE))
+    seen = []
+    plan = detect_sections(
+        SAMPLE_SLIDES, backend=backend, on_section=lambda i, s: seen.append((i, s, len(backend.log)))
+    )
+    assert plan == detect_sections(SAMPLE_SLIDES, backend=backend)
+    assert [(i, s) for i, s, _ in seen] == list(enumerate(plan.sections))
+    assert seen[0][2] < backend.log.index("end")
+
+
+def test_detect_sections_rejects_streaming_with_hedging():
+    with pytest.raises(ValueError, match="on_section"):
+        detect_sections(SAMPLE_SLIDES, on_section=print, hedge_after=1)
+
+
+def test_cli_stream_json_events():
+    delta = {"type": "stream_event", "event": {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "{"}}}
+    result = {"type": "result", "subtype": "success", "is_error": False, "result": "{}"}
+    assert _cli_event_text(json.dumps(delta), streamed=False) == "{"
+    assert _cli_event_text(json.dumps(result), streamed=True) is None
+    assert _cli_event_text(json.dumps(result), streamed=False) == "{}"  # a CLI without partial messages
+    assert _cli_event_text('{"type": "system", "subtype": "init"}', streamed=False) is None
+    with pytest.raises(BackendError):
+        _cli_event_text(json.dumps({**result, "is_error": True, "result": "quota"}), streamed=False)
+
+
+def test_section_writer_rewrites_sections_the_final_plan_changed(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    with PDFDocument(pdf_path) as doc, SectionWriter(doc, tmp_path / "out") as writer:
+        writer(0, Section("A", 1, 2, ""))
+        writer(1, Section("B", 3, 4, ""))  # the final plan moves this boundary
+        while not writer.path(1).exists():  # A is written before B is started
+            time.sleep(0.01)
+        writer(2, Section("C", 5, 9, ""))  # out of range; not written
+        paths = writer.finish([Section("A", 1, 2, ""), Section("B", 3, 5, ""), Section("C", 6, 6, "")])
+    assert writer.early == 1
+    assert [fitz.open(p).page_count for p in paths] == [2, 3, 1]
+
+
+def test_cli_stream_matches_a_normal_run(tmp_path, monkeypatch):
+    bin_dir = fake_claude.install(tmp_path / "bin", latency=0.3, section_size=2).parent
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    runner = CliRunner()
+
+    streamed = runner.invoke(main, [str(pdf_path), "--stream", "--no-cache", "-o", str(tmp_path / "a")])
+    normal = runner.invoke(main, [str(pdf_path), "--no-cache", "-o", str(tmp_path / "b")])
+    assert streamed.exit_code == 0, streamed.output
+    assert normal.exit_code == 0, normal.output
+    assert "2 of 3 written while Claude was still answering" in streamed.output
+
+    names = sorted(p.name for p in (tmp_path / "a").iterdir())
+    assert names == sorted(p.name for p in (tmp_path / "b").iterdir())
+    for name in names:
+        a, b = tmp_path / "a" / name, tmp_path / "b" / name
+        if name.endswith(".pdf"):
+            assert [p.get_text() for p in fitz.open(a)] == [p.get_text() for p in fitz.open(b)]
+        else:
+            assert a.read_text() == b.read_text()
+    assert load_plan(tmp_path / "a") == load_plan(tmp_path / "b")
+
+
+def test_cli_stream_rejects_conflicting_options(tmp_path):
+    pdf_path = make_test_pdf(tmp_path / "lecture.pdf")
+    result = CliRunner().invoke(main, [str(pdf_path), "--stream", "--window-size", "10"])
+    assert result.exit_code != 0
+    assert "cannot be combined with --window-size" in result.output
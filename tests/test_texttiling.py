@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from lecture_split.models import SlideText
+from lecture_split import texttiling
+from lecture_split.texttiling import _term_matrix, depth_scores, detect_sections_local, gap_similarities
+
+import numpy as np
+
+TOPICS = [
+    ("Sorting Algorithms", "sorting quicksort mergesort pivot partition comparison swap array"),
+    ("Graph Traversal", "graph vertex edge breadth depth traversal queue visited neighbor"),
+    ("Hash Tables", "hash bucket collision probing chaining load factor key lookup"),
+]
+
+
+def _deck(per_topic=4):
+    slides = []
+    for title, vocab in TOPICS:
+        words = vocab.split()
+        for i in range(per_topic):
+            body = " ".join(words[(i + j) % len(words)] for j in range(6))
+            slides.append(SlideText(len(slides) + 1, f"{title} {i + 1}\n{body}"))
+    return slides
+
+
+def test_finds_topic_boundaries():
+    plan = detect_sections_local(_deck())
+    assert [(s.start_page, s.end_page) for s in plan.sections] == [(1, 4), (5, 8), (9, 12)]
+    assert [s.title.rsplit(" ", 1)[0] for s in plan.sections] == [t for t, _ in TOPICS]
+    assert plan.lecture_title == "Sorting Algorithms 1"
+
+
+def test_sections_cover_every_slide():
+    slides = _deck(per_topic=7)
+    plan = detect_sections_local(slides, min_section=3)
+    assert plan.sections[0].start_page == 1
+    assert plan.sections[-1].end_page == len(slides)
+    for prev, cur in zip(plan.sections, plan.sections[1:]):
+        assert cur.start_page == prev.end_page + 1
+        assert cur.start_page - prev.start_page >= 3
+
+
+def test_max_sections():
+    plan = detect_sections_local(_deck(), max_sections=2)
+    assert len(plan.sections) == 2
+
+
+def test_single_slide_and_textless_slides():
+    assert len(detect_sections_local([SlideText(1, "Only slide")]).sections) == 1
+    plan = detect_sections_local([SlideText(i, "") for i in range(1, 6)])
+    assert [(s.start_page, s.end_page) for s in plan.sections] == [(1, 5)]
+    assert plan.lecture_title == "Lecture"
+
+
+def test_empty_slides_raise():
+    with pytest.raises(ValueError):
+        detect_sections_local([])
+
+
+def test_gap_similarities_and_depth():
+    weights = np.array([[1.0, 0], [1, 0], [0, 1], [0, 1]])
+    sims = gap_similarities(weights, block_size=1)
+    assert sims.tolist() == [1.0, 0.0, 1.0]
+    assert depth_scores(sims).tolist() == [0.0, 2.0, 0.0]
+
+
+def test_depth_climbs_over_plateaus_to_the_nearest_peaks():
+    sims = np.array([0.9, 0.5, 0.5, 0.7, 0.2, 0.6, 0.6])
+    assert depth_scores(sims).round(2).tolist() == [0.0, 0.6, 0.6, 0.0, 0.9, 0.0, 0.0]
+    assert depth_scores(np.array([])).tolist() == []
+
+
+def test_term_matrix_keeps_the_most_widely_used_terms(monkeypatch):
+    monkeypatch.setattr(texttiling, "MAX_TERMS", 2)
+    slides = [SlideText(1, "graph vertex rare"), SlideText(2, "edge graph edge"), SlideText(3, "edge graph")]
+    weights, vocab = _term_matrix(slides)
+    assert vocab == ["graph", "edge"]  # in order of first use
+    assert weights.shape == (3, 2)
+    assert weights[0, 1] == 0 and weights[1, 1] > weights[2, 1] > 0
+
+
+def test_fast_on_hundreds_of_slides():
+    slides = _deck(per_topic=200)
+    start = time.perf_counter()
+    detect_sections_local(slides)
+    assert time.perf_counter() - start < 2.0
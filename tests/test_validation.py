@@ -0,0 +1,104 @@
+import json
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from lecture_split.models import LecturePlan, Section, SlideText
+from lecture_split.section_detector import detect_sections
+from lecture_split.validation import repair_plan, validate_plan
+
+
+def _plan(*ranges):
+    return LecturePlan("Lecture", [Section(f"S{a}", a, b, f"pages {a}-{b}") for a, b in ranges])
+
+
+def _ranges(plan):
+    return [(s.start_page, s.end_page) for s in plan.sections]
+
+
+def _no_detect(start, end):
+    raise AssertionError(f"unexpected re-detection of {start}-{end}")
+
+
+def test_valid_plan_is_returned_unchanged():
+    plan = _plan((1, 3), (4, 8))
+    assert validate_plan(plan, 8) == []
+    assert repair_plan(plan, 8, detect_range=_no_detect).plan is plan
+
+
+def test_validate_reports_each_defect():
+    kinds = [i.kind for i in validate_plan(_plan((1, 3), (3, 5), (8, 9), (7, 6)), 8)]
+    assert kinds == ["overlap", "out_of_range", "gap", "empty"]
+
+
+def test_small_defects_are_fixed_locally():
+    # Overlap of one page, a one-page gap, and a last section running past the deck.
+    plan = _plan((1, 3), (3, 5), (7, 12))
+    result = repair_plan(plan, 10, detect_range=_no_detect)
+    assert _ranges(result.plan) == [(1, 3), (4, 6), (7, 10)]
+    assert [s.title for s in result.plan.sections] == ["S1", "S3", "S7"]
+    assert result.redetected == []
+    assert validate_plan(result.plan, 10) == []
+
+
+def test_unsorted_and_missing_first_page():
+    result = repair_plan(_plan((5, 8), (2, 4)), 8)
+    assert _ranges(result.plan) == [(1, 4), (5, 8)]
+
+
+def test_large_gap_is_redetected_and_spliced():
+    calls = []
+
+    def detect_range(start, end):
+        calls.append((start, end))
+        return _plan((start, start + 2), (start + 3, end))
+
+    result = repair_plan(_plan((1, 4), (15, 20)), 20, detect_range=detect_range)
+    assert calls == [(5, 14)]
+    assert _ranges(result.plan) == [(1, 4), (5, 7), (8, 14), (15, 20)]
+    assert result.redetected == [(5, 14)]
+
+
+def test_large_overlap_redetects_both_sections():
+    result = repair_plan(
+        _plan((1, 8), (4, 12), (13, 20)), 20, detect_range=lambda a, b: _plan((a, 6), (7, b))
+    )
+    assert result.redetected == [(1, 12)]
+    assert _ranges(result.plan) == [(1, 6), (7, 12), (13, 20)]
+
+
+def test_bad_redetection_is_fixed_locally():
+    result = repair_plan(_plan((1, 4), (15, 20)), 20, detect_range=lambda a, b: _plan((a + 1, 30)))
+    assert _ranges(result.plan) == [(1, 4), (5, 14), (15, 20)]
+
+
+def test_without_detector_large_gaps_join_the_previous_section():
+    result = repair_plan(_plan((1, 4), (15, 20)), 20)
+    assert _ranges(result.plan) == [(1, 14), (15, 20)]
+
+
+def test_plan_without_usable_sections():
+    with pytest.raises(ValueError):
+        repair_plan(_plan((30, 40)), 20)
+
+
+def test_detect_sections_reprompts_only_the_bad_range():
+    slides = [SlideText(i, f"Slide {i} text") for i in range(1, 21)]
+    replies = [
+        _plan((1, 4), (15, 20)),  # pages 5-14 missing
+        _plan((1, 5), (6, 10)),  # the re-detected range, numbered from 1
+    ]
+    prompts = []
+
+    def fake_run(args, input, **kwargs):
+        prompts.append(input)
+        return subprocess.CompletedProcess(args, 0, stdout=json.dumps(replies.pop(0).to_dict()), stderr="")
+
+    with patch("lecture_split.section_detector.subprocess.run", side_effect=fake_run):
+        plan = detect_sections(slides)
+
+    assert _ranges(plan) == [(1, 4), (5, 9), (10, 14), (15, 20)]
+    assert len(prompts) == 2
+    assert prompts[1].startswith("Analyze these 10 lecture slides")
+    assert "Slide 5 text" in prompts[1] and "Slide 15 text" not in prompts[1]
@@ -0,0 +1,84 @@
+import json
+import re
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from lecture_split.models import LecturePlan, Section, SlideText
+from lecture_split.windowed import detect_sections_windowed, stitch_windows, window_ranges
+
+
+def _fake_claude(args, input, **kwargs):
+    """Answer every prompt with sections of five slides each."""
+    count = len(re.findall(r"^--- SLIDE \d+ ---$", input, re.MULTILINE))
+    sections = [
+        {"title": f"Part {start}", "start_page": start, "end_page": min(start + 4, count), "summary": "..."}
+        for start in range(1, count + 1, 5)
+    ]
+    stdout = json.dumps({"lecture_title": "Long Lecture", "sections": sections})
+    return subprocess.CompletedProcess(args=args, returncode=0, stdout=stdout, stderr="")
+
+
+def _assert_contiguous(plan, total):
+    assert plan.sections[0].start_page == 1
+    assert plan.sections[-1].end_page == total
+    for prev, cur in zip(plan.sections, plan.sections[1:]):
+        assert cur.start_page == prev.end_page + 1
+        assert cur.start_page <= cur.end_page
+
+
+def test_window_ranges_cover_deck_with_overlap():
+    assert window_ranges(100, 40, 10) == [(1, 40), (31, 70), (61, 100)]
+    assert window_ranges(30, 40, 10) == [(1, 30)]
+
+
+def test_window_ranges_rejects_bad_overlap():
+    with pytest.raises(ValueError):
+        window_ranges(100, 10, 10)
+
+
+def test_stitch_prefers_each_window_on_its_side_of_the_cut():
+    windows = [
+        (1, 20, LecturePlan("T", [Section("A", 1, 9, ""), Section("B", 10, 20, "")])),
+        (13, 30, LecturePlan("T", [Section("B'", 13, 18, ""), Section("C", 19, 30, "")])),
+    ]
+    plan = stitch_windows(windows, 30)
+    assert [(s.title, s.start_page, s.end_page) for s in plan.sections] == [
+        ("A", 1, 9), ("B", 10, 18), ("C", 19, 30),
+    ]
+
+
+def test_stitch_drops_near_duplicate_boundary_at_cut():
+    windows = [
+        (1, 20, LecturePlan("T", [Section("A", 1, 15, ""), Section("B", 16, 20, "")])),
+        (13, 30, LecturePlan("T", [Section("A'", 13, 16, ""), Section("B'", 17, 30, "")])),
+    ]
+    plan = stitch_windows(windows, 30)
+    assert [s.start_page for s in plan.sections] == [1, 16]
+    _assert_contiguous(plan, 30)
+
+
+def test_detect_windowed_produces_contiguous_plan():
+    slides = [SlideText(i, f"Slide {i}") for i in range(1, 101)]
+    with patch("lecture_split.section_detector.subprocess.run", side_effect=_fake_claude) as mock_run:
+        plan = detect_sections_windowed(slides, window_size=30, overlap=6)
+    assert mock_run.call_count == len(window_ranges(100, 30, 6))
+    assert plan.lecture_title == "Long Lecture"
+    _assert_contiguous(plan, 100)
+
+
+def test_detect_windowed_renumbers_each_window():
+    slides = [SlideText(i, f"Slide {i}") for i in range(1, 51)]
+    with patch("lecture_split.section_detector.subprocess.run", side_effect=_fake_claude) as mock_run:
+        detect_sections_windowed(slides, window_size=30, overlap=10)
+    for call in mock_run.call_args_list:
+        assert "--- SLIDE 1 ---" in call.kwargs["input"]
+
+
+def test_detect_windowed_short_deck_uses_single_call():
+    slides = [SlideText(i, f"Slide {i}") for i in range(1, 11)]
+    with patch("lecture_split.section_detector.subprocess.run", side_effect=_fake_claude) as mock_run:
+        plan = detect_sections_windowed(slides, window_size=30)
+    assert mock_run.call_count == 1
+    _assert_contiguous(plan, 10)